@@ -1,6 +1,8 @@
 import gurobipy as gp
+import numpy as np
 from gurobipy import GRB
 from base_MILP.Ascon_MILP import *
+from base_MILP import coloring_search, propagation
 from output.write_in_file_slice_32 import *
 import os
 
@@ -18,6 +20,13 @@ initial_state = [[Bit(model, f"init_z{__}_x{_}", (0, 0, 0, 0)) for _ in range(5)
 
 num_rounds = 3  # Number of rounds - 1
 
+# Encoding of the AND/XOR step of P_S: 'gadget' (AND and XOR gadgets) or 'table' (one table_MILP table per bit)
+p_s_encoding = 'gadget'
+
+# Colouring pre-pass: start the solve from the best colourings of a local search on the
+# propagation evaluator (coloring_search.prepass), the solve then focuses on the bound
+coloring_prepass = False
+
 initial_state[0][0] = Bit(model, f"init_z{0}_x{0}", (0, 0, 1, 0))
 
 # Initialize state bits
@@ -59,12 +68,12 @@ for round_num in range(num_rounds):
         temp_state_2 = None
     elif round_num == 1:
         temp_state_1, temp_state_2, ps_state, ps_vars = create_second_P_S_operation(
-            model, current_state, f"round{round_num}_PS"
+            model, current_state, f"round{round_num}_PS", encoding=p_s_encoding
         )
     else:
         # Subsequent rounds use standard P_S operation function
         temp_state_1, temp_state_2, ps_state, ps_vars = create_P_S_operation(
-            model, current_state, f"round{round_num}_PS"
+            model, current_state, f"round{round_num}_PS", encoding=p_s_encoding
         )
 
     # P_L operation
@@ -193,9 +202,41 @@ model.setObjective(temp_degree, GRB.MAXIMIZE)
 
 print("Constraints and objective function set")
 
+
+
+def coloring_score(trace):
+    """
+    Estimate of temp_degree for coloring_search, on evaluated colourings: the c5 and special_c4
+    slices of new_simple_Hash_collision add as many equations as they cut, so the equations are
+    taken as a continuous amount up to half the degrees of freedom (c4 never pays off); the
+    conditions are not modelled.
+    """
+    colouring = trace['colouring']
+    red = propagation.count(colouring, propagation.R) - propagation.total(trace, 'delta_r')
+    blue = propagation.count(colouring, propagation.B) - propagation.total(trace, 'delta_b')
+    final = trace['final']
+    usable = ((final & propagation.UL) == 0) | ((final & (propagation.R | propagation.B)) != 0)
+    c5 = usable.all(2)
+    special_c4 = usable[:, :, 1:].all(2) & ~c5
+    dof = np.minimum(red, blue) + 1.5
+    equations = np.minimum(2 * c5.sum(1) + 1.5 * special_c4.sum(1), dof / 2)
+    degree = np.minimum(dof - equations, equations)
+    degree[propagation.total(trace, 'CT') > 3] = float('-inf')
+    return degree
+
+
 # 5. Solve MILP model
 print("Starting model solution...")
 
+if coloring_prepass:
+    # The first S-box is replaced by its colour map, the search starts its output state too
+    first_P_S = coloring_search.slice_map(create_first_P_S_operation_first_one_constant_cond, slice_number)
+    coloring_search.prepass(model, initial_state,
+                            propagation.ascon_plan([None, 'second'] + ['generic'] * (num_rounds - 2),
+                                                   ['first'] + ['generic'] * (num_rounds - 1)),
+                            coloring_score, states=[(intermediate_states[0]['ps_state'], 'initial')],
+                            transform=coloring_search.slice_map_transform(first_P_S))
+
 model.optimize()
 
 # 6. Output results to file
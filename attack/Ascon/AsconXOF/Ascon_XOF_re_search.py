@@ -2,6 +2,7 @@
 import gurobipy as gp
 from gurobipy import GRB
 from base_MILP.Ascon_re_search_MILP import *
+from base_MILP.operation_MILP import fix_bit_type
 from output.re_search_write_in_file_slice_32 import *
 from attack.Ascon.AsconXOF.search_result.Ascon_XOF_round_3_preimage import *
 from attack.Ascon.AsconXOF.search_result.Ascon_precompute_for_XOF_round_3_preimage import *
@@ -20,6 +21,9 @@ print("Initializing Ascon state...")
 initial_state = [[Bit(model, f"init_z{_}_x{__}", (0, 0, 0, 0)) for _ in range(5)] for __ in range(slice_number)]
 
 num_rounds = 2  # Number of rounds - 1
+
+# Encoding of the AND/XOR step of P_S: 'gadget' (AND and XOR gadgets) or 'table' (one table_MILP table per bit)
+p_s_encoding = 'gadget'
 for z in range(slice_number):
     x = 0
     if initial_state_output[0][x][z] == 'lb':
@@ -54,12 +58,12 @@ for round_num in range(num_rounds):
         temp_state_2 = None
     elif round_num == 1:
         temp_state_1, temp_state_2, ps_state, ps_vars, without_place, linear_cancel_chi = create_second_P_S_operation(
-            model, current_state, f"round{round_num}_PS"
+            model, current_state, f"round{round_num}_PS", encoding=p_s_encoding
         )
     else:
         # Subsequent rounds use standard P_S operation function
         temp_state_1, temp_state_2, ps_state, ps_vars, without_place, linear_cancel_chi = create_P_S_operation(
-            model, current_state, f"round{round_num}_PS"
+            model, current_state, f"round{round_num}_PS", encoding=p_s_encoding
         )
 
     # P_L operation (linear layer)
@@ -73,30 +77,9 @@ for round_num in range(num_rounds):
 
     # P_L operation
     def set_type(var, type):
-        if type == 'lr':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r <= 1)
-            model.addConstr(var.b == 0)
-        elif type == 'lb':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 0)
-            model.addConstr(var.b == 1)
-        elif type == 'c':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 0)
-            model.addConstr(var.b == 0)
-        elif type == 'ur':
-            model.addConstr(var.ul == 1)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 0)
-        elif type == 'lg':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 1)
-        elif type == 'ug':
-            model.addConstr(var.ul == 1)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 1)
+        # Pinned through the variable bounds; 'u' and 'ub' bits stay free as before
+        if type in ('lr', 'lb', 'c', 'ur', 'lg', 'ug'):
+            fix_bit_type(var, type)
 
     if round_num <= 0:
         inter_state = intermediate_states_output[round_num]
@@ -283,12 +266,12 @@ for round_num in range(num_rounds):
         temp_state_2 = None
     elif round_num == 1:
         temp_state_1, temp_state_2, ps_state, ps_vars, without_place, linear_cancel_chi = create_second_P_S_operation(
-            model, pre_current_state, f"round{round_num}_PS"
+            model, pre_current_state, f"round{round_num}_PS", encoding=p_s_encoding
         )
     else:
         # Subsequent rounds use standard P_S operation function
         temp_state_1, temp_state_2, ps_state, ps_vars, without_place, linear_cancel_chi = create_P_S_operation(
-            model, pre_current_state, f"round{round_num}_PS"
+            model, pre_current_state, f"round{round_num}_PS", encoding=p_s_encoding
         )
 
     # P_L operation
@@ -302,30 +285,9 @@ for round_num in range(num_rounds):
 
     # Save all states and variables of current round
     def set_type(var, type):
-        if type == 'lr':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 0)
-        elif type == 'lb':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 0)
-            model.addConstr(var.b == 1)
-        elif type == 'c':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 0)
-            model.addConstr(var.b == 0)
-        elif type == 'ur':
-            model.addConstr(var.ul == 1)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 0)
-        elif type == 'lg':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 1)
-        elif type == 'ug':
-            model.addConstr(var.ul == 1)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 1)
+        # Pinned through the variable bounds; 'u' and 'ub' bits stay free as before
+        if type in ('lr', 'lb', 'c', 'ur', 'lg', 'ug'):
+            fix_bit_type(var, type)
 
     if round_num <= 0:
         inter_state = pre_intermediate_states_output[round_num]
@@ -1,6 +1,7 @@
 import gurobipy as gp
 from gurobipy import GRB
 from base_MILP.Ascon_re_search_MILP import *
+from base_MILP.operation_MILP import fix_bit_type
 from output.re_search_write_in_file_slice_32 import *
 
 
@@ -78,30 +79,9 @@ for round_num in range(num_rounds):
         pl_state, pl_vars, linear_cancel = create_P_L_operation(model, ps_state, f"round{round_num}_PL")
 
     def set_type(var, type):
-        if type == 'lr':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 0)
-        elif type == 'lb':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 0)
-            model.addConstr(var.b == 1)
-        elif type == 'c':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 0)
-            model.addConstr(var.b == 0)
-        elif type == 'ur':
-            model.addConstr(var.ul == 1)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 0)
-        elif type == 'lg':
-            model.addConstr(var.ul == 0)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 1)
-        elif type == 'ug':
-            model.addConstr(var.ul == 1)
-            model.addConstr(var.r == 1)
-            model.addConstr(var.b == 1)
+        # Pinned through the variable bounds; 'u' and 'ub' bits stay free as before
+        if type in ('lr', 'lb', 'c', 'ur', 'lg', 'ug'):
+            fix_bit_type(var, type)
 
     if round_num <= 1:
         inter_state = intermediate_states_output[round_num]
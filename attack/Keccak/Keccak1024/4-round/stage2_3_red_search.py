@@ -1,272 +1,563 @@
 from gurobipy import GRB
 from base_MILP.Keccak_MILP import *
+from base_MILP.cone_MILP import keccak_live_bits
+from base_MILP.scheme_sweep import add_colour
+from base_MILP import Keccak_re_search_MILP as re_search
+from base_MILP import coloring_search, propagation
+from base_MILP.scheme_runner import run_schemes, optimize, SCREEN_SCHEMES
+from base_MILP.round_search import extend_rounds
+from base_MILP.symmetry import unique_schemes
 from output.write_in_file_slice import *
+from output import re_search_write_in_file_slice_64 as re_search_output
 from attack.Keccak.Keccak1024.blue_result.SHA3_512_all_blue import all_solutions
 
-# Traverse all solutions
-for key in all_solutions.keys():
-    key_number = -1  # Scheme number
-
-    # Traverse each solution
-    for blue_scheme in all_solutions[key]:
-        key_number += 1
-
-        # Skip unnecessary schemes
-        if key < 18 or key_number < 3:
+# round number-1
+num_rounds = 3
+
+# Fused search: build the rounds with Keccak_re_search_MILP and optimize temp_degree, then the
+# inactive S-boxes, then the linear cancellations in one hierarchical solve (stage2_3 and stage4 at once)
+fused = False
+
+# Rounds (0-based) whose chi layer is built from table_MILP tables instead of AND/XOR gadgets
+# (the first round keeps its own chi); e.g. (1, 2)
+chi_table_rounds = ()
+
+
+def build_model(model, num_rounds=num_rounds):
+    """
+    Model of all rounds for every blue scheme: the colour of each initial bit is
+    left to the variables r/b, a scheme is applied through their bounds.
+    num_rounds can be lowered for the round-incremental search.
+    """
+    # 1. Initialize state
+    print("Initializing Keccak state...")
+
+    # Create 5x5x64 initial state
+    initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
+
+    # Initialize state bits: the colour of (z, 0, x) and (z, 1, x) comes from blue_scheme[z][0][x]
+    colours = dict()
+    for z in range(64):
+        for x in range(4):
+            if x == 3 and z >= 60:  # Skip specific positions
+                continue
+            bits = [initial_state[z][0][x], initial_state[z][1][x]]
+            colours[(z, 0, x)] = add_colour(model, bits, f"initial_{z}_{0}_{x}")
+
+    # Final state bits read by the equations
+    equation_bits = set()
+    for z in range(64):
+        equation_bits.update([(z, 0, 3), (z, 3, 3), ((z - 39) % 64, 2, 0), ((z - 39) % 64, 0, 0)])
+        equation_bits.update([(z, 1, 4), (z, 4, 4), ((z - 25) % 64, 3, 1), ((z - 25) % 64, 1, 1)])
+
+    # Only bits that can carry red/blue and reach the equation bits are modeled
+    live = keccak_live_bits(initial_state, num_rounds, equation_bits)
+
+    # 2. Apply round functions
+    print("Applying round functions...")
+
+    # Save intermediate states
+    intermediate_states = []
+    current_state = initial_state
+
+    # Apply multiple rounds
+    for round_num in range(num_rounds):
+        print(f"Applying round {round_num + 1}")
+
+        if fused:
+            intermediate_states.append(fused_round(model, current_state, round_num))
+            current_state = intermediate_states[-1]['rho_east']
             continue
 
-        print(f"Initial number {key}")
-
-        # Create Gurobi model
-        model = gp.Model("Keccak_MILP_Automation")
-        model.setParam('MIPFocus', 1)
-        # model.setParam('TimeLimit', 10000)
-        # round number-1
-        num_rounds = 3
-        # 1. Initialize state
-        print("Initializing Keccak state...")
-
-        # Create 5x5x64 initial state
-        initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-        # Initialize state bits
+        # Theta operation
+        print(f"  Round {round_num + 1}: Theta operation")
+        # Choose different Theta operation implementation based on round number
+        if round_num == 0:
+            theta_state, C, D, theta_vars = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
+        elif round_num == 1:
+            theta_state, C, D, theta_vars = create_second_theta_operation(model, current_state, f"round{round_num}_theta", live[round_num]['theta'])
+        else:
+            theta_state, C, D, theta_vars = create_theta_operation(model, current_state, f"round{round_num}_theta", live[round_num]['theta'])
+
+        # Rho operation
+        print(f"  Round {round_num + 1}: Rho operation")
+        rho_state = rho(theta_state)
+
+        # Pi operation
+        print(f"  Round {round_num + 1}: Pi operation")
+        pi_state = pi(rho_state)
+
+        # Chi operation
+        print(f"  Round {round_num + 1}: Chi operation")
+        # Choose different Chi operation implementation based on round number
+        if round_num == 0:
+            chi_state, chi_vars = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
+        elif round_num == 1:
+            chi_state, chi_vars = create_second_chi_operation(model, pi_state, f"round{round_num}_chi", live[round_num]['chi'],
+                                                              chi_encoding(round_num))
+        else:
+            chi_state, chi_vars = create_chi_operation(model, pi_state, f"round{round_num}_chi", live[round_num]['chi'],
+                                                       chi_encoding(round_num))
+
+        # Save current round state
+        intermediate_states.append({
+            'theta': theta_state,
+            'C': C,
+            'D': D,
+            'theta_var': theta_vars,
+            'rho_west': rho_state,
+            'chi': pi_state,
+            'rho_east': chi_state,
+            'chi_var': chi_vars
+        })
+
+        # Update current state
+        current_state = chi_state
+
+    final_state = current_state
+    print(f"Completed {num_rounds} rounds application")
+
+    # 3. Calculate equation count and variable statistics
+    print("Calculating equation count...")
+
+    # Count variable types in initial state
+    red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
+    blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
+
+    # Count intervention variables in round functions
+    delta_total_r = 0
+    delta_total_b = 0
+    sum_const_cond = 0
+    sum_quad = 0
+    sum_without_place = 0
+    sum_linear_cancel = 0
+
+    # Traverse intermediate states, count variables
+    for round_state in intermediate_states:
+        theta_vars = round_state['theta_var']
+        # Count variables in Theta operation
         for z in range(64):
-            for x in range(4):
-                if x == 3 and z >= 60:  # Skip specific positions
-                    continue
-                if blue_scheme[z][0][x] < 0.5:
-                    # Set as red bit
-                    initial_state[z][0][x].b = 0
-                    initial_state[z][0][x].r = model.addVar(vtype=GRB.BINARY, name=f"initial_{z}_{0}_{x}_r")
-                    initial_state[z][1][x].b = initial_state[z][0][x].b
-                    initial_state[z][1][x].r = initial_state[z][0][x].r
-                else:
-                    initial_state[z][0][x].r = 0
-                    initial_state[z][0][x].b = 1
-                    initial_state[z][1][x].b = initial_state[z][0][x].b
-                    initial_state[z][1][x].r = initial_state[z][0][x].r
-
-        # 2. Apply round functions
-        print("Applying round functions...")
-
-        # Save intermediate states
-        intermediate_states = []
-        current_state = initial_state
-
-        # Apply multiple rounds
-        for round_num in range(num_rounds):
-            print(f"Applying round {round_num + 1}")
-
-            # Theta operation
-            print(f"  Round {round_num + 1}: Theta operation")
-            # Choose different Theta operation implementation based on round number
-            if round_num == 0:
-                theta_state, C, D, theta_vars = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-            elif round_num == 1:
-                theta_state, C, D, theta_vars = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-            else:
-                theta_state, C, D, theta_vars = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-            # Rho operation
-            print(f"  Round {round_num + 1}: Rho operation")
-            rho_state = rho(theta_state)
-
-            # Pi operation
-            print(f"  Round {round_num + 1}: Pi operation")
-            pi_state = pi(rho_state)
-
-            # Chi operation
-            print(f"  Round {round_num + 1}: Chi operation")
-            # Choose different Chi operation implementation based on round number
-            if round_num == 0:
-                chi_state, chi_vars = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-            elif round_num == 1:
-                chi_state, chi_vars = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-            else:
-                chi_state, chi_vars = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-            # Save current round state
-            intermediate_states.append({
-                'theta': theta_state,
-                'C': C,
-                'D': D,
-                'theta_var': theta_vars,
-                'rho_west': rho_state,
-                'chi': pi_state,
-                'rho_east': chi_state,
-                'chi_var': chi_vars
-            })
-
-            # Update current state
-            current_state = chi_state
-
-        final_state = current_state
-        print(f"Completed {num_rounds} rounds application")
-
-        # 3. Calculate equation count and variable statistics
-        print("Calculating equation count...")
-
-        # Count variable types in initial state
-        red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-        blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-        # Count intervention variables in round functions
-        delta_total_r = 0
-        delta_total_b = 0
-        sum_const_cond = 0
-        sum_quad = 0
-
-        # Traverse intermediate states, count variables
-        for round_state in intermediate_states:
-            theta_vars = round_state['theta_var']
-            # Count variables in Theta operation
-            for z in range(64):
-                for x in range(5):
-                    delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-                    delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-                    sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-
-                    delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-                    delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-                    sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
+            for x in range(5):
+                delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
+                delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
+                sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
 
-                    for y in range(5):
-                        delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                        delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                        sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
+                delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
+                delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
+                sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
 
-            # Count variables in Chi operation
-            chi_vars = round_state['chi_var']
-            for z in range(64):
                 for y in range(5):
-                    for x in range(5):
-                        delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                        delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                        sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                        sum_quad += chi_vars[f"and_z{z}_y{y}_x{x}"]['quad']
-
-        # Add constraints
-        model.addConstr(sum_quad <= 6)  # Non-linear constraint limit
-        model.addConstr(blue_vars_count - delta_total_b >= key - 2)  # Blue variable constraint
+                    delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
+                    delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
+                    sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
 
-        # Calculate hash output bits
-        hash_output_bits = []  # Hash output bits
-        cut_bits = []  # The damage of probability paths to red blue sets
-
-        # Process each z value
+        # Count variables in Chi operation
+        chi_vars = round_state['chi_var']
         for z in range(64):
-            # Equation 1 constraints
-            equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-            model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-            model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-            model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r + final_state[(z - 39) % 64][2][0].b)
-            model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r + final_state[(z - 39) % 64][0][0].b)
-            hash_output_bits.append(equation1)
-
-            # Equation 2 constraints
-            equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-            model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-            model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-            model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r + final_state[(z - 25) % 64][3][1].b)
-            model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r + final_state[(z - 25) % 64][1][1].b)
-            hash_output_bits.append(equation2)
-
-            # Equation 3 constraints
-            equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-            model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-            model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-            model.addConstr(equation3 + equation1 <= 1)  # Mutually exclusive constraint
-            hash_output_bits.append(0.58 * equation3)
-            cut_bits.append(0.42 * equation3)
-
-            # Equation 4 constraints
-            equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-            model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-            model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-            model.addConstr(equation4 + equation2 <= 1)  # Mutually exclusive constraint
-            hash_output_bits.append(0.58 * equation4)
-            cut_bits.append(0.42 * equation4)
-
-        # Total equations
-        total_equations = gp.quicksum(hash_output_bits)
-        print("Equation calculation completed")
-
-        # 4. Set constraints and objective function
-        print("Setting constraints and objective function...")
-
-        # Attack complexity variable
-        temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-        # Attack complexity constraints
-        model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-        model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-        model.addConstr(temp_degree <= total_equations)
-
-        # Set objective function
+            for y in range(5):
+                for x in range(5):
+                    delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
+                    delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
+                    sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
+                    sum_quad += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
+
+        if fused:
+            round_without_place, round_linear_cancel = re_search_sums(round_state)
+            sum_without_place += round_without_place
+            sum_linear_cancel += round_linear_cancel
+
+    # Add constraints
+    model.addConstr(sum_quad <= 6)  # Non-linear constraint limit
+    # Blue variable constraint, the bound key - 2 is set per scheme
+    min_blue = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='min_blue')
+    model.addConstr(blue_vars_count - delta_total_b >= min_blue)
+
+    # Calculate hash output bits
+    hash_output_bits = []  # Hash output bits
+    cut_bits = []  # The damage of probability paths to red blue sets
+
+    # Process each z value
+    for z in range(64):
+        # Equation 1 constraints
+        equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
+        model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
+        model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
+        model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r + final_state[(z - 39) % 64][2][0].b)
+        model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r + final_state[(z - 39) % 64][0][0].b)
+        hash_output_bits.append(equation1)
+
+        # Equation 2 constraints
+        equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
+        model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
+        model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
+        model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r + final_state[(z - 25) % 64][3][1].b)
+        model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r + final_state[(z - 25) % 64][1][1].b)
+        hash_output_bits.append(equation2)
+
+        # Equation 3 constraints
+        equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
+        model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
+        model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
+        model.addConstr(equation3 + equation1 <= 1)  # Mutually exclusive constraint
+        hash_output_bits.append(0.58 * equation3)
+        cut_bits.append(0.42 * equation3)
+
+        # Equation 4 constraints
+        equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
+        model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
+        model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
+        model.addConstr(equation4 + equation2 <= 1)  # Mutually exclusive constraint
+        hash_output_bits.append(0.58 * equation4)
+        cut_bits.append(0.42 * equation4)
+
+    # Total equations
+    total_equations = gp.quicksum(hash_output_bits)
+    print("Equation calculation completed")
+
+    # 4. Set constraints and objective function
+    print("Setting constraints and objective function...")
+
+    # Attack complexity variable
+    temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
+
+    # Attack complexity constraints
+    model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
+    model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
+    model.addConstr(temp_degree <= total_equations)
+
+    # Set objective function
+    if fused:
+        model.ModelSense = GRB.MAXIMIZE
+        model.setObjectiveN(temp_degree - 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
+        model.setObjectiveN(sum_without_place, index=1, priority=2, name="SecondaryObjective")
+        model.setObjectiveN(sum_linear_cancel, index=2, priority=1, name="ThirdObjective")
+    else:
         model.setObjective(temp_degree - 0.01 * sum_const_cond, GRB.MAXIMIZE)
-        print("Constraints and objective function set")
-
-        # 5. Solve model
-        print("Starting model solution...")
-        model.optimize()
-
-
-        # Output detailed results to file
-        f = open(f"../red_result/SHA3_512_round_{num_rounds + 1}_preimage_key={key}blue_scheme_number={key_number}.py", 'w')
-
-        # Output statistical results
-        f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-        f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-        f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-        f.write(f"Total_equations={total_equations.getValue()}\n")
-        f.write(f"temp_degree={temp_degree.x}\n")
-
-        print("Keccak MILP automation modeling completed")
+    print("Constraints and objective function set")
+
+    return {
+        'colours': colours,
+        'initial_state': initial_state,
+        'intermediate_states': intermediate_states,
+        'red_vars_count': red_vars_count,
+        'blue_vars_count': blue_vars_count,
+        'delta_total_r': delta_total_r,
+        'delta_total_b': delta_total_b,
+        'sum_const_cond': sum_const_cond,
+        'sum_without_place': sum_without_place,
+        'sum_linear_cancel': sum_linear_cancel,
+        'total_equations': total_equations,
+        'min_blue': min_blue,
+        'temp_degree': temp_degree,
+    }
+
+
+def chi_encoding(round_num):
+    """Chi encoding of a round, see chi_table_rounds."""
+    return 'table' if round_num in chi_table_rounds else 'gadget'
+
+
+def fused_round(model, state, round_num):
+    """One round of the fused search, with the linear cancellation and inactive S-box variables of the re-search"""
+    print(f"  Round {round_num + 1}: Theta, Rho, Pi, Chi operations (re-search)")
+    if round_num == 0:
+        theta_state, C, D, theta_vars, linear_cancel = re_search.create_first_theta_operation(model, state, f"round{round_num}_theta")
+    elif round_num == 1:
+        theta_state, C, D, theta_vars, linear_cancel = re_search.create_second_theta_operation(model, state, f"round{round_num}_theta")
+    else:
+        theta_state, C, D, theta_vars, linear_cancel = re_search.create_theta_operation(model, state, f"round{round_num}_theta")
+    rho_state = re_search.rho(theta_state)
+    pi_state = re_search.pi(rho_state)
+    if round_num == 0:
+        chi_state, chi_vars, without_place, linear_cancel_chi = re_search.create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
+    elif round_num == 1:
+        chi_state, chi_vars, without_place, linear_cancel_chi = re_search.create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
+    else:
+        chi_state, chi_vars, without_place, linear_cancel_chi = re_search.create_chi_operation(model, pi_state, f"round{round_num}_chi")
+
+    # Same keys as the stage2_3 rounds, plus the re-search variables
+    return {
+        'theta': theta_state,
+        'C': C,
+        'D': D,
+        'theta_var': theta_vars,
+        'rho_west': rho_state,
+        'chi': pi_state,
+        'rho_east': chi_state,
+        'chi_var': chi_vars,
+        'without_place': without_place,
+        'linear_cancel': linear_cancel,
+        'linear_cancel_chi': linear_cancel_chi,
+        'round_number': round_num
+    }
+
+
+def re_search_sums(round_state):
+    """(inactive S-boxes, linear cancellations) of a fused round, counted as in the stage4 re-search"""
+    sum_without_place = 0
+    sum_linear_cancel = 0
+    for z in range(64):
+        for y in range(5):
+            sum_without_place += round_state['without_place'][z][y]
+    if round_state['round_number'] > 0:
+        for z in range(64):
+            for x in range(5):
+                sum_linear_cancel += round_state['linear_cancel'][f"C_x{x}_z{z}"]
+                sum_linear_cancel += round_state['linear_cancel'][f"D_x{x}_z{z}"]
+                for y in range(5):
+                    sum_linear_cancel += round_state['linear_cancel'][f"new_z{z}_y{y}_x{x}"]
+                    sum_linear_cancel += round_state['linear_cancel_chi'][f"new_z{z}_y{y}_x{x}"]
+    return sum_without_place, sum_linear_cancel
+
+
+# The round structure is the same for every blue scheme: build it once (or load it from
+# the model cache) and apply each scheme through the bounds of the colour variables
+def model_config(num_rounds):
+    """Model cache configuration of a build with num_rounds rounds."""
+    return {'cipher': 'SHA3-512', 'rounds': num_rounds + 1, 'lanes': 64, 'fused': fused,
+            'theta': (['first', 'second'] + ['generic'] * (num_rounds - 2))[:num_rounds],
+            'chi': (['first_512', 'second'] + ['generic'] * (num_rounds - 2))[:num_rounds],
+            'chi_encoding': [chi_encoding(r) for r in range(num_rounds)]}
+
+
+config = model_config(num_rounds)
+
+# Solve only one scheme of every z-rotation class (see symmetry.unique_schemes); only the rotations that map
+# the fixed positions onto themselves count, which is just the identity with this padding
+dedupe_rotations = False
+fixed_places = [(z, 0, 3) for z in range(60, 64)]
+
+# Colouring pre-pass: start every solve from the best colourings of a local search on the
+# propagation evaluator (coloring_search.prepass), the solve then focuses on the bound
+coloring_prepass = False
+
+# Round-incremental search: solve every scheme for these round counts in turn, seeding each
+# model with the solution of the previous one, e.g. range(2, num_rounds + 1); None runs the sweep
+incremental_rounds = None
+
+
+def apply_key(job, model, handles):
+    """Blue variable bound key - 2 of the job (the colours are set by the runner)."""
+    handles['min_blue'].LB = job[0] - 2
+
+
+def coloring_score(key):
+    """
+    Objective of build_model for coloring_search, on evaluated colourings of a job with blue bound key - 2.
+    Colourings breaking the CT or blue bound score -inf; conditional constants are not modelled.
+    """
+    def groups(*positions):
+        return [[((z + dz) % 64, y, x) for dz, y, x in positions] for z in range(64)]
+    equation1 = groups((0, 0, 3), (0, 3, 3), (-39, 2, 0), (-39, 0, 0))
+    equation2 = groups((0, 1, 4), (0, 4, 4), (-25, 3, 1), (-25, 1, 1))
+    equation3 = groups((0, 0, 3), (0, 3, 3))
+    equation4 = groups((0, 1, 4), (0, 4, 4))
+
+    def score(trace):
+        red, blue = propagation.degrees_of_freedom(trace)
+        final = trace['final']
+        full = propagation.equations(final, equation1, True) + propagation.equations(final, equation2, True)
+        # Equations 3 and 4 read a subset of the bits of 1 and 2 and only count where those fail
+        partial = propagation.equations(final, equation3, True) + propagation.equations(final, equation4, True) - full
+        degree = coloring_search.split_degree(red, blue, full, partial)
+        degree[(propagation.total(trace, 'CT') > 6) | (blue < key - 2)] = float('-inf')
+        return degree
+    return score
+
+
+def solve_scheme(job, model, handles):
+    """
+    Solve the model with the blue scheme of job applied (run in a scheme_runner worker).
+
+    Returns:
+    - dict with the metrics of the scheme and its output file
+    """
+    key, key_number, blue_scheme = job
+    print(f"Initial number {key}")
+
+    initial_state = handles['initial_state']
+    intermediate_states = handles['intermediate_states']
+    red_vars_count = handles['red_vars_count']
+    blue_vars_count = handles['blue_vars_count']
+    delta_total_r = handles['delta_total_r']
+    delta_total_b = handles['delta_total_b']
+    sum_const_cond = handles['sum_const_cond']
+    total_equations = handles['total_equations']
+    temp_degree = handles['temp_degree']
+
+    model.setParam('MIPFocus', 1)
+    # model.setParam('TimeLimit', 10000)
+
+    if coloring_prepass:
+        coloring_search.prepass(model, initial_state, propagation.keccak_plan(config['theta'], config['chi']),
+                                coloring_score(key))
+
+    # 5. Solve model
+    print("Starting model solution...")
+    if not optimize(model):
+        # Cut off by the best objective of the other schemes
+        return {'status': model.Status}
+
+    if fused:
+        return write_fused_trail(job, handles)
+
+    # Output detailed results to file
+    output = f"../red_result/SHA3_512_round_{num_rounds + 1}_preimage_key={key}blue_scheme_number={key_number}.py"
+    f = open(output, 'w')
+
+    # Output statistical results
+    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
+    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
+    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
+    f.write(f"Total_equations={total_equations.getValue()}\n")
+    f.write(f"temp_degree={temp_degree.x}\n")
+
+    print("Keccak MILP automation modeling completed")
+
+    # Output state information for LaTeX documentation
+    row_num = 0
+    temp = write_row(initial_state, row_num, '$A$')
+    f.write(f"initial_state_output = {temp}\n")
+    intermediate_states_output = []
+
+    index = 1
+    for round_state in intermediate_states:
+        round_state_output = dict()
+        theta_vars = round_state['theta_var']
+        chi_vars = round_state['chi_var']
+
+        row_num += 1
+        C = round_state['C']
+        temp = write_row_C(C, row_num, theta_vars, f'$C_{index}$')
+        round_state_output['C'] = temp
+
+        row_num += 0.4
+        D = round_state['D']
+        temp = write_row_D(D, row_num, theta_vars, f'$D_{index}$')
+        round_state_output['D'] = temp
+
+        row_num += 0.4
+        theta = round_state['theta']
+        temp = write_row_theta(theta, row_num, theta_vars, f'$\\theta_{index}$')
+        round_state_output['theta'] = temp
+
+        row_num += 1
+        rho_state = round_state['rho_west']
+        temp = write_row(rho_state, row_num, f'$\\rho_{index}$')
+        round_state_output['rho_west'] = temp
+
+        row_num += 1
+        pi_state = round_state['chi']
+        temp = write_row(pi_state, row_num, f'$\\pi_{index}$')
+        round_state_output['chi'] = temp
+
+        row_num += 1
+        chi = round_state['rho_east']
+        temp = write_row_chi(chi, row_num, chi_vars, f'$\\chi_{index}$')
+        round_state_output['rho_east'] = temp
+
+        index += 1
+        intermediate_states_output.append(round_state_output)
+
+    f.write(f"intermediate_states_output={intermediate_states_output}")
+    f.close()
+
+    return {
+        'temp_degree': temp_degree.x,
+        'Red_variables': red_vars_count.getValue() - delta_total_r.getValue(),
+        'Blue_variables': blue_vars_count.getValue() - delta_total_b.getValue(),
+        'Total_equations': total_equations.getValue(),
+        'output': output,
+    }
+
+
+def write_fused_trail(job, handles):
+    """
+    Write the solution of the fused search in the format of the stage4 re-search, ready for painting.
+
+    Returns:
+    - dict with the metrics of the scheme and its output file
+    """
+    key, key_number, blue_scheme = job
+    red_variables = handles['red_vars_count'].getValue() - handles['delta_total_r'].getValue()
+    blue_variables = handles['blue_vars_count'].getValue() - handles['delta_total_b'].getValue()
+    temp_degree = handles['temp_degree'].x
+    sum_without_place = handles['sum_without_place'].getValue()
+    sum_linear_cancel = handles['sum_linear_cancel'].getValue()
+
+    output = f"../final_result/SHA3_512_round_{num_rounds + 1}_preimage_key={key}blue_scheme_number={key_number}_for_painting.py"
+    with open(output, 'w') as f:
+        f.write(f"Red_variables={red_variables}\n")
+        f.write(f"Blue_variables={blue_variables}\n")
+        f.write(f"sum_const_cond = {handles['sum_const_cond'].getValue()}\n")
+        f.write(f"sum_without_place={sum_without_place}\n")
+        f.write(f"sum_linear_cancel = {sum_linear_cancel}\n")
+        f.write(f"temp_degree={temp_degree}\n")
 
-        # Output state information for LaTeX documentation
         row_num = 0
-        temp = write_row(initial_state, row_num, '$A$')
-        f.write(f"initial_state_output = {temp}\n")
-        intermediate_states_output = []
+        initial_state_output = re_search_output.write_row(handles['initial_state'], row_num, '$A$')
+        f.write(f"initial_state_output = {initial_state_output}\n")
 
-        index = 1
-        for round_state in intermediate_states:
+        intermediate_states_output = []
+        for index, round_state in enumerate(handles['intermediate_states']):
             round_state_output = dict()
             theta_vars = round_state['theta_var']
-            chi_vars = round_state['chi_var']
-
+            linear_cancel = round_state['linear_cancel']
             row_num += 1
-            C = round_state['C']
-            temp = write_row_C(C, row_num, theta_vars, f'$C_{index}$')
-            round_state_output['C'] = temp
-
+            round_state_output['C'] = re_search_output.write_row_C(round_state['C'], row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
             row_num += 0.4
-            D = round_state['D']
-            temp = write_row_D(D, row_num, theta_vars, f'$D_{index}$')
-            round_state_output['D'] = temp
-
+            round_state_output['D'] = re_search_output.write_row_D(round_state['D'], row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
             row_num += 0.4
-            theta = round_state['theta']
-            temp = write_row_theta(theta, row_num, theta_vars, f'$\\theta_{index}$')
-            round_state_output['theta'] = temp
-
-            row_num += 1
-            rho_state = round_state['rho_west']
-            temp = write_row(rho_state, row_num, f'$\\rho_{index}$')
-            round_state_output['rho_west'] = temp
-
-            row_num += 1
-            pi_state = round_state['chi']
-            temp = write_row(pi_state, row_num, f'$\\pi_{index}$')
-            round_state_output['chi'] = temp
-
-            row_num += 1
-            chi = round_state['rho_east']
-            temp = write_row_chi(chi, row_num, chi_vars, f'$\\chi_{index}$')
-            round_state_output['rho_east'] = temp
-
-            index += 1
+            round_state_output['theta'] = re_search_output.write_row_theta(round_state['theta'], row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
+            row_num += 0.8
+            round_state_output['rho'] = re_search_output.write_row(round_state['rho_west'], row_num, f'$\\rho^{{({index})}}$')
+            row_num += 0.8
+            round_state_output['pi'] = re_search_output.write_row(round_state['chi'], row_num, f'$\\pi^{{({index})}}$')
+            row_num += 0.8
+            round_state_output['chi'] = re_search_output.write_row_chi(round_state['rho_east'], row_num, round_state['chi_var'],
+                                                                       round_state['linear_cancel_chi'], f'$\\chi^{{({index})}}$')
+
+            without_place = round_state['without_place']
+            temp = [[0 for y in range(5)] for z in range(64)]
+            for z in range(64):
+                for y in range(5):
+                    if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
+                        temp[z][y] = 1
+            round_state_output['without_place'] = temp
             intermediate_states_output.append(round_state_output)
 
-        f.write(f"intermediate_states_output={intermediate_states_output}")
-        f.close()
\ No newline at end of file
+        f.write(f"intermediate_states_output={intermediate_states_output}\n")
+
+    return {
+        'temp_degree': temp_degree,
+        'Red_variables': red_variables,
+        'Blue_variables': blue_variables,
+        'sum_without_place': sum_without_place,
+        'sum_linear_cancel': sum_linear_cancel,
+        'output': output,
+        # Ranked by the primary objective only
+        'score': temp_degree,
+    }
+
+
+def schemes_of(key):
+    """(scheme_number, scheme) of a key, without the z-rotations of earlier schemes if dedupe_rotations is set."""
+    if dedupe_rotations:
+        return unique_schemes(all_solutions[key], 64, fixed_places)
+    return list(enumerate(all_solutions[key]))
+
+
+if __name__ == "__main__":
+    # (key, key_number, blue_scheme) jobs on a process pool, finished jobs are recorded
+    # in the results file and skipped when the sweep is restarted
+    jobs = ((key, key_number, blue_scheme)
+            for key in all_solutions.keys()
+            for key_number, blue_scheme in schemes_of(key))
+    if incremental_rounds:
+        for job in jobs:
+            extend_rounds(build_model, incremental_rounds, job, ('theta', 'rho_east'), model_config,
+                          prepare=apply_key, solve=solve_scheme, name="Keccak_MILP_Automation")
+    else:
+        run_schemes(config, build_model, solve_scheme, jobs,
+                    f"../red_result/SHA3_512_round_{num_rounds + 1}_runs.jsonl", "Keccak_MILP_Automation",
+                    prepare=apply_key, screen=SCREEN_SCHEMES and not fused)
@@ -1,5 +1,6 @@
 from gurobipy import GRB
 from base_MILP.Keccak_re_search_MILP import *
+from base_MILP.operation_MILP import fix_bit_type
 from output.re_search_write_in_file_slice_64 import *
 from attack.Keccak.Keccak1024.final_result.SHA3_512_round_4_preimage import initial_state_output, intermediate_states_output
 
@@ -41,30 +42,9 @@ current_state = initial_state
 
 
 def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
+    # Pinned through the variable bounds; 'u' and 'ub' bits stay free as before
+    if type in ('lr', 'lb', 'c', 'ur', 'lg', 'ug'):
+        fix_bit_type(var, type)
 
 
 # Apply multiple rounds
@@ -1,7 +1,8 @@
 import gurobipy as gp
 from gurobipy import GRB
-from base_MILP.Keccak_MILP_32 import *
-from output.write_in_file_slice_32 import *
+# SHA3-512 uses 64-bit lanes: the state below has 64 slices
+from base_MILP.Keccak_MILP import *
+from output.write_in_file_slice_64 import *
 from attack.Keccak.Keccak1024.blue_result.SHA3_512_all_blue import all_solutions
 
 # Create Gurobi model
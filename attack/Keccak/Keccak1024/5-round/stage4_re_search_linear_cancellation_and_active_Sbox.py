@@ -1,6300 +1,457 @@
-from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
+import os
+import runpy
 
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
+from gurobipy import GRB
+from base_MILP.Keccak_re_search_MILP import *
+from base_MILP.operation_MILP import fix_bit_type
+from base_MILP.scheme_sweep import add_colour
+from base_MILP.scheme_runner import run_schemes
+from output.re_search_write_in_file_slice_64 import *
 
 num_rounds = 3  # Number of rounds-1
 
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
+# Trails of the red search to re-search, one variant per file; all variants share one model
+# (built once, or loaded from the model cache) and run in parallel
+trails = [
+    "../final_result/SHA3_512_round_4_preimage.py",
+]
 
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
 
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
+def read_trail(path):
+    """Variables of a trail file (initial_state_output, intermediate_states_output, ...)"""
+    return runpy.run_path(path)
 
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
 
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
+def colour_places(paths):
+    """Initial positions (z, y, x) that are not constant in at least one trail"""
+    places = set()
+    for path in paths:
+        initial_state_output = read_trail(path)['initial_state_output']
+        for z in range(64):
             for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
+                for y in range(5):
+                    if initial_state_output[0][x][y][z] != 'c':
+                        places.add((z, y, x))
+    return sorted(places)
+
+
+places = colour_places(trails)
+
+
+def build_model(model):
+    """
+    Re-search model shared by all trails: the initial bits that are not constant in some
+    trail get colour variables r/b, a trail is applied through the bounds (apply_trail).
+    """
+    # 1. Initialize state
+    print("Initializing Keccak state...")
+
+    # Create 5x5x64 initial state
+    initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
+
+    colours = dict()
+    for z, y, x in places:
+        colours[(z, y, x)] = add_colour(model, [initial_state[z][y][x]], f"initial_{z}_{y}_{x}")
+
+    # 2. Apply round functions
+    print("Applying round functions...")
+
+    # Save intermediate states
+    intermediate_states = []
+    current_state = initial_state
+
+    # Apply multiple rounds
+    for round_num in range(num_rounds):
+        print(f"Applying round {round_num + 1}")
+
+        # Theta operation
+        print(f"  Round {round_num + 1}: Theta operation")
+        if round_num == 0:
+            theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
+        elif round_num == 1:
+            theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
+        else:
+            theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
+
+        # Rho operation (bit rotation)
+        print(f"  Round {round_num + 1}: Rho operation")
+        rho_state = rho(theta_state)
+
+        # Pi operation (position permutation)
+        print(f"  Round {round_num + 1}: Pi operation")
+        pi_state = pi(rho_state)
+
+        # Chi operation
+        print(f"  Round {round_num + 1}: Chi operation")
+
+        if round_num == 0:
+            chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
+        elif round_num == 1:
+            chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
+        else:
+            chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
+
+        intermediate_states.append({
+            'theta': theta_state,
+            'C': C,
+            'D': D,
+            'theta_var': theta_vars,
+            'rho': rho_state,
+            'pi': pi_state,
+            'chi': chi_state,
+            'chi_var': chi_vars,
+            'without_place': without_place,
+            "linear_cancel": linear_cancel,
+            'round_number': round_num,
+            "linear_cancel_chi": linear_cancel_chi
+        })
+
+        # Update current state
+        current_state = chi_state
+
+    final_state = current_state
+    print(f"Completed {num_rounds} rounds application")
+
+    # 3. Calculate equation count and variable statistics
+    print("Calculating equation count...")
+
+    # Count variable types in initial state
+    red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
+    blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
+
+    # Count intervention variables in round functions
+    delta_total_r = 0
+    delta_total_b = 0
+    sum_const_cond = 0
+    sum_CT = 0
+    sum_without_place = 0
+    sum_linear_cancel = 0
     for round_state in intermediate_states:
-        round_state_output = dict()
+        round_number = round_state['round_number']
         theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
         linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
 
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
         for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
             for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
+                delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
+                delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
+                sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
                 if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
+                    sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
 
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
+                delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
+                delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
+                sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
+                if round_number > 0:
+                    sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
 
-    intermediate_states_output = []
-    index = 0
+                for y in range(5):
+                    delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
+                    delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
+                    sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
+                    if round_number > 0:
+                        sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
 
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
         chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
         without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
+        linear_cancel_chi = round_state['linear_cancel_chi']
         for z in range(64):
             for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
+                sum_without_place += without_place[z][y]
+                for x in range(5):
+                    delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
+                    delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
+                    sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
+                    sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
+                    if round_number > 0:
+                        sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
+
+    # Add constraints
+    model.addConstr(sum_CT <= 6)
+
+    # Calculate hash output bits
+    hash_output_bits = []
+    cut_bits = []
+
+    equations = []
+    for z in range(64):
+        # Equation 1 constraints
+        equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
+        model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
+        model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
+        model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
+                        final_state[(z - 39) % 64][2][0].b)
+        model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
+                        final_state[(z - 39) % 64][0][0].b)
+        hash_output_bits.append(equation1)
+
+        # Equation 2 constraints
+        equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
+        model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
+        model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
+        model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
+                        final_state[(z - 25) % 64][3][1].b)
+        model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
+                        final_state[(z - 25) % 64][1][1].b)
+        hash_output_bits.append(equation2)
+
+        equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
+        model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
+        model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
+        hash_output_bits.append(0.58 * equation3)
+        cut_bits.append(0.42 * equation3)
+
+        equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
+        model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
+        model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
+        hash_output_bits.append(0.58 * equation4)
+        cut_bits.append(0.42 * equation4)
+        equations.append([equation1, equation2, equation3, equation4])
+
+        model.addConstr(equation1 + equation3 <= 1)
+        model.addConstr(equation2 + equation4 <= 1)
+
+    # Total equations
+    total_equations = gp.quicksum(hash_output_bits)
+
+    print("Equation calculation completed")
+
+    # 4. Set constraints and objective function
+    print("Setting constraints and objective function...")
+
+    # Complexity variable
+    temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
+
+    # Attack complexity constraints
+    model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
+    model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
+    model.addConstr(temp_degree <= total_equations)
+
+    # Set objectives
+    model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
+    model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
+    model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
+
+    print("Constraints and objective function set")
+
+    return {
+        'colours': colours,
+        'initial_state': initial_state,
+        'intermediate_states': intermediate_states,
+        'red_vars_count': red_vars_count,
+        'blue_vars_count': blue_vars_count,
+        'delta_total_r': delta_total_r,
+        'delta_total_b': delta_total_b,
+        'sum_const_cond': sum_const_cond,
+        'sum_without_place': sum_without_place,
+        'sum_linear_cancel': sum_linear_cancel,
+        'equations': equations,
+        'temp_degree': temp_degree,
+    }
+
+
+# The round network is the same for every trail: build it once (or load it from the
+# model cache) and pin each trail through variable bounds
+config = {'cipher': 'SHA3-512', 'stage': 're-search', 'rounds': num_rounds + 1, 'lanes': 64,
+          'colour_places': places}
 
 
 def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
+    # Pinned through the variable bounds; 'u' and 'ub' bits stay free as before
+    if type in ('lr', 'lb', 'c', 'ur', 'lg', 'ug'):
+        fix_bit_type(var, type)
+
+
+def trail_scheme(path):
+    """Blue scheme [z][y][x] of the initial state of a trail, used by the runner to set the colours"""
+    initial_state_output = read_trail(path)['initial_state_output']
+    return [[[1 if initial_state_output[0][x][y][z] == 'lb' else 0 for x in range(5)] for y in range(5)]
+            for z in range(64)]
+
+
+def apply_trail(job, model, handles):
+    """
+    Pin the initial state and the C, D, theta and chi bits of every round to the trail of job.
+    The pins of the previous trail solved on the same model are released first.
+    """
+    trail = read_trail(job[0])
+    initial_state_output = trail['initial_state_output']
+    intermediate_states_output = trail['intermediate_states_output']
+    initial_state = handles['initial_state']
+    intermediate_states = handles['intermediate_states']
+
+    bits = []
     for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
         for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
+            for x in range(5):
+                bits += [round_state['C'][z][x], round_state['D'][z][x]]
+                for y in range(5):
+                    bits += [round_state['theta'][z][y][x], round_state['chi'][z][y][x]]
+    flags = [flag for bit in bits for flag in (bit.ul, bit.r, bit.b) if isinstance(flag, gp.Var)]
+    if 'bounds' not in handles:
+        handles['bounds'] = (model.getAttr('LB', flags), model.getAttr('UB', flags))
+    model.setAttr('LB', flags, handles['bounds'][0])
+    model.setAttr('UB', flags, handles['bounds'][1])
 
+    # Initial state bits: the runner fixed the blue ones, the red/constant ones are pinned here
     for z in range(64):
         for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
             for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
+                bit_type = initial_state_output[0][x][y][z]
+                if bit_type not in ('lr', 'lb', 'c'):
+                    raise ValueError(f"Unexpected initial bit type {bit_type} at z={z}, y={y}, x={x} in {job[0]}")
+                fix_bit_type(initial_state[z][y][x], bit_type)
 
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
+    for round_num in range(num_rounds):
+        inter_state = intermediate_states_output[round_num]
+        round_state = intermediate_states[round_num]
+        for z in range(64):
             for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
-        for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
-    from gurobipy import GRB
-from new_code.base.simple_Keccak_search_Sbox import *
-from new_code.latex.write_output import *
-from new_code.attack.Keccak.SHA3512.result.SHA3_512_round_4_preimage111 import initial_state_output, intermediate_states_output
-
-# Create Gurobi model
-model = gp.Model("Keccak_MILP_Automation")
-model.setParam('MIPFocus', 1)
-
-# 1. Initialize state
-print("Initializing Keccak state...")
-
-# Create 5x5x64 initial state
-initial_state = [[[Bit(model, 'constant', 'uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-num_rounds = 3  # Number of rounds-1
-
-# Initialize state bits
-for z in range(64):
-    for x in range(5):
-        for y in range(5):
-            if initial_state_output[0][x][y][z] == 'lr':
-                initial_state[z][y][x].r = 1
-                initial_state[z][y][x].b = 0
-            elif initial_state_output[0][x][y][z] == 'lb':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 1
-            elif initial_state_output[0][x][y][z] == 'c':
-                initial_state[z][y][x].r = 0
-                initial_state[z][y][x].b = 0
-            else:
-                print(initial_state_output[0][z][y][x])
-                exit(1)
-
-# 2. Apply round functions
-print("Applying round functions...")
-
-# Save intermediate states
-intermediate_states = []
-current_state = initial_state
-
-
-def set_type(var, type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-
-
-# Apply multiple rounds
-for round_num in range(num_rounds):
-    inter_state = intermediate_states_output[round_num]
-    print(f"Applying round {round_num + 1}")
-
-    # Theta operation
-    print(f"  Round {round_num + 1}: Theta operation")
-    if round_num == 0:
-        theta_state, C, D, theta_vars, linear_cancel = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-    elif round_num == 1:
-        theta_state, C, D, theta_vars, linear_cancel = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-    else:
-        theta_state, C, D, theta_vars, linear_cancel = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-    # Rho operation (bit rotation)
-    print(f"  Round {round_num + 1}: Rho operation")
-    rho_state = rho(theta_state)
-
-    # Pi operation (position permutation)
-    print(f"  Round {round_num + 1}: Pi operation")
-    pi_state = pi(rho_state)
-
-    # Chi operation
-    print(f"  Round {round_num + 1}: Chi operation")
-
-    if round_num == 0:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_first_chi_operation_512(model, pi_state, f"round{round_num}_chi")
-    elif round_num == 1:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-    else:
-        chi_state, chi_vars, without_place, linear_cancel_chi = create_chi_operation(model, pi_state, f"round{round_num}_chi")
-
-    for z in range(64):
-        for x in range(5):
-            set_type(C[z][x], inter_state['C'][0][x][z])
-            set_type(D[z][x], inter_state['D'][0][x][z])
-            for y in range(5):
-                set_type(theta_state[z][y][x], inter_state['theta'][0][x][y][z])
-                set_type(chi_state[z][y][x], inter_state['chi'][0][x][y][z])
-
-    intermediate_states.append({
-        'theta': theta_state,
-        'C': C,
-        'D': D,
-        'theta_var': theta_vars,
-        'rho': rho_state,
-        'pi': pi_state,
-        'chi': chi_state,
-        'chi_var': chi_vars,
-        'without_place': without_place,
-        "linear_cancel": linear_cancel,
-        'round_number': round_num,
-        "linear_cancel_chi": linear_cancel_chi
-    })
-
-    # Update current state
-    current_state = chi_state
-
-final_state = current_state
-print(f"Completed {num_rounds} rounds application")
-
-# 3. Calculate equation count and variable statistics
-print("Calculating equation count...")
-
-# Count variable types in initial state
-red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-
-# Count intervention variables in round functions
-delta_total_r = 0
-delta_total_b = 0
-sum_const_cond = 0
-sum_CT = 0
-sum_without_place = 0
-sum_linear_cancel = 0
-for round_state in intermediate_states:
-    round_number = round_state['round_number']
-    theta_vars = round_state['theta_var']
-    linear_cancel = round_state['linear_cancel']
-
-    for z in range(64):
-        for x in range(5):
-            delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"C_x{x}_z{z}"]
-
-            delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-            delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-            sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
-            if round_number > 0:
-                sum_linear_cancel += linear_cancel[f"D_x{x}_z{z}"]
-
-            for y in range(5):
-                delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel[f"new_z{z}_y{y}_x{x}"]
-
-    chi_vars = round_state['chi_var']
-    without_place = round_state['without_place']
-    linear_cancel_chi = round_state['linear_cancel_chi']
-    for z in range(64):
-        for y in range(5):
-            sum_without_place += without_place[z][y]
-            for x in range(5):
-                delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-                if round_number > 0:
-                    sum_linear_cancel += linear_cancel_chi[f"new_z{z}_y{y}_x{x}"]
-
-# Add constraints
-model.addConstr(sum_CT <= 6)
-
-# Calculate hash output bits
-hash_output_bits = []
-cut_bits = []
-
-equations = []
-for z in range(64):
-    # Equation 1 constraints
-    equation1 = model.addVar(vtype=GRB.BINARY, name=f'equation1_{z}')
-    model.addConstr(equation1 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation1 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][2][0].ul + final_state[(z - 39) % 64][2][0].r +
-                    final_state[(z - 39) % 64][2][0].b)
-    model.addConstr(equation1 <= 1 - final_state[(z - 39) % 64][0][0].ul + final_state[(z - 39) % 64][0][0].r +
-                    final_state[(z - 39) % 64][0][0].b)
-    hash_output_bits.append(equation1)
-
-    # Equation 2 constraints
-    equation2 = model.addVar(vtype=GRB.BINARY, name=f'equation2_{z}')
-    model.addConstr(equation2 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation2 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][3][1].ul + final_state[(z - 25) % 64][3][1].r +
-                    final_state[(z - 25) % 64][3][1].b)
-    model.addConstr(equation2 <= 1 - final_state[(z - 25) % 64][1][1].ul + final_state[(z - 25) % 64][1][1].r +
-                    final_state[(z - 25) % 64][1][1].b)
-    hash_output_bits.append(equation2)
-
-    equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-    model.addConstr(equation3 <= 1 - final_state[z][0][3].ul + final_state[z][0][3].r + final_state[z][0][3].b)
-    model.addConstr(equation3 <= 1 - final_state[z][3][3].ul + final_state[z][3][3].r + final_state[z][3][3].b)
-    hash_output_bits.append(0.58 * equation3)
-    cut_bits.append(0.42 * equation3)
-
-    equation4 = model.addVar(vtype=GRB.BINARY, name=f'equation4_{z}')
-    model.addConstr(equation4 <= 1 - final_state[z][1][4].ul + final_state[z][1][4].r + final_state[z][1][4].b)
-    model.addConstr(equation4 <= 1 - final_state[z][4][4].ul + final_state[z][4][4].r + final_state[z][4][4].b)
-    hash_output_bits.append(0.58 * equation4)
-    cut_bits.append(0.42 * equation4)
-    equations.append([equation1, equation2, equation3, equation4])
-
-    model.addConstr(equation1 + equation3 <= 1)
-    model.addConstr(equation2 + equation4 <= 1)
-
-# Total equations
-total_equations = gp.quicksum(hash_output_bits)
-
-print("Equation calculation completed")
-
-# 4. Set constraints and objective function
-print("Setting constraints and objective function...")
-
-# Complexity variable
-temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-# Attack complexity constraints
-model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-model.addConstr(temp_degree <= total_equations)
-
-# Set objectives
-model.setObjectiveN(-1 * temp_degree + 0.01 * sum_const_cond, index=0, priority=3, name="PrimaryObjective")
-model.setObjectiveN(-1 * sum_without_place, index=1, priority=2, name="SecondaryObjective")
-model.setObjectiveN(-1 * sum_linear_cancel, index=3, priority=1, name="ThirdObjective")
-
-print("Constraints and objective function set")
-
-# Solve model
-print("Starting model solution...")
-model.optimize()
-
-# Output results to file
-with open(f"../final_result/SHA3_512_round_{num_rounds + 1}_preimage_for_painting.py", 'w') as f:
-    # Output statistical results
-    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-    f.write(f"sum_without_place={sum_without_place.getValue()}\n")
-    f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
-    f.write(f"temp_degree={temp_degree.x}\n")
-
-    print("Keccak MILP automation modeling completed")
-
-    # Output state information for LaTeX documentation
-    row_num = 0
-    initial_state_output = write_row(initial_state, row_num, '$A$')
-    f.write(f"initial_state_output = {initial_state_output}\n")
-
-    intermediate_states_output = []
-    index = 0
-
-    for round_state in intermediate_states:
-        round_state_output = dict()
-        theta_vars = round_state['theta_var']
-        chi_vars = round_state['chi_var']
-        linear_cancel = round_state['linear_cancel']
-        linear_cancel_chi = round_state['linear_cancel_chi']
-        row_num += 1
-
-        C = round_state['C']
-        C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
-        round_state_output['C'] = C_output
-        row_num += 0.4
-
-        D = round_state['D']
-        D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
-        round_state_output['D'] = D_output
-        row_num += 0.4
-
-        theta = round_state['theta']
-        theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
-        round_state_output['theta'] = theta_output
-        row_num += 0.8
-
-        rho_state = round_state['rho']
-        rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
-        round_state_output['rho'] = rho_output
-        row_num += 0.8
-
-        pi_state = round_state['pi']
-        pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
-        round_state_output['pi'] = pi_output
-        row_num += 0.8
-
-        chi = round_state['chi']
-        chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
-        round_state_output['chi'] = chi_output
-
-        without_place = round_state['without_place']
-        temp = [[0 for y in range(5)] for z in range(64)]
+                set_type(round_state['C'][z][x], inter_state['C'][0][x][z])
+                set_type(round_state['D'][z][x], inter_state['D'][0][x][z])
+                for y in range(5):
+                    set_type(round_state['theta'][z][y][x], inter_state['theta'][0][x][y][z])
+                    set_type(round_state['chi'][z][y][x], inter_state['chi'][0][x][y][z])
+
+
+def solve_trail(job, model, handles):
+    """
+    Re-search one trail (run in a scheme_runner worker) and write it for painting.
+
+    Returns:
+    - dict with the metrics of the trail and its output file
+    """
+    initial_state = handles['initial_state']
+    intermediate_states = handles['intermediate_states']
+    red_vars_count = handles['red_vars_count']
+    blue_vars_count = handles['blue_vars_count']
+    delta_total_r = handles['delta_total_r']
+    delta_total_b = handles['delta_total_b']
+    sum_const_cond = handles['sum_const_cond']
+    sum_without_place = handles['sum_without_place']
+    sum_linear_cancel = handles['sum_linear_cancel']
+    equations = handles['equations']
+    temp_degree = handles['temp_degree']
+
+    model.setParam('MIPFocus', 1)
+
+    # Solve model (hierarchical objectives, so no shared cutoff between the trails)
+    print(f"Starting model solution for {job[0]}...")
+    model.optimize()
+    if model.SolCount == 0:
+        return {'status': model.Status}
+
+    # Output results to file
+    output = f"../final_result/{os.path.splitext(os.path.basename(job[0]))[0]}_for_painting.py"
+    with open(output, 'w') as f:
+        # Output statistical results
+        f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
+        f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
+        f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
+        f.write(f"sum_without_place={sum_without_place.getValue()}\n")
+        f.write(f"sum_linear_cancel = {sum_linear_cancel.getValue()}\n")
+        f.write(f"temp_degree={temp_degree.x}\n")
+
+        print("Keccak MILP automation modeling completed")
+
+        # Output state information for LaTeX documentation
+        row_num = 0
+        initial_state_output = write_row(initial_state, row_num, '$A$')
+        f.write(f"initial_state_output = {initial_state_output}\n")
+
+        intermediate_states_output = []
+        index = 0
+
+        for round_state in intermediate_states:
+            round_state_output = dict()
+            theta_vars = round_state['theta_var']
+            chi_vars = round_state['chi_var']
+            linear_cancel = round_state['linear_cancel']
+            linear_cancel_chi = round_state['linear_cancel_chi']
+            row_num += 1
+
+            C = round_state['C']
+            C_output = write_row_C(C, row_num, theta_vars, linear_cancel, f'$C^{{({index})}}$')
+            round_state_output['C'] = C_output
+            row_num += 0.4
+
+            D = round_state['D']
+            D_output = write_row_D(D, row_num, theta_vars, linear_cancel, f'$D^{{({index})}}$')
+            round_state_output['D'] = D_output
+            row_num += 0.4
+
+            theta = round_state['theta']
+            theta_output = write_row_theta(theta, row_num, theta_vars, linear_cancel, f'$\\theta^{{({index})}}$')
+            round_state_output['theta'] = theta_output
+            row_num += 0.8
+
+            rho_state = round_state['rho']
+            rho_output = write_row(rho_state, row_num, f'$\\rho^{{({index})}}$')
+            round_state_output['rho'] = rho_output
+            row_num += 0.8
+
+            pi_state = round_state['pi']
+            pi_output = write_row(pi_state, row_num, f'$\\pi^{{({index})}}$')
+            round_state_output['pi'] = pi_output
+            row_num += 0.8
+
+            chi = round_state['chi']
+            chi_output = write_row_chi(chi, row_num, chi_vars, linear_cancel_chi, f'$\\chi^{{({index})}}$')
+            round_state_output['chi'] = chi_output
+
+            without_place = round_state['without_place']
+            temp = [[0 for y in range(5)] for z in range(64)]
+            for z in range(64):
+                for y in range(5):
+                    if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
+                        temp[z][y] = 1
+            round_state_output['without_place'] = temp
+
+            index += 1
+            intermediate_states_output.append(round_state_output)
+
+        f.write(f"intermediate_states_output={intermediate_states_output}\n")
+
+        final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
         for z in range(64):
-            for y in range(5):
-                if type(without_place[z][y]) != int and without_place[z][y].x > 0.5:
-                    temp[z][y] = 1
-        round_state_output['without_place'] = temp
-
-        index += 1
-        intermediate_states_output.append(round_state_output)
-
-    f.write(f"intermediate_states_output={intermediate_states_output}\n")
-
-    final_state_output = [[[None for z in range(64)] for y in range(5)] for x in range(5)]
-    for z in range(64):
-        eq1, eq2, eq3, eq4 = equations[z]
-        if eq1.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            final_state_output[0][2][(z - 39) % 64] = 'eq'
-            final_state_output[0][0][(z - 39) % 64] = 'eq'
-            print(1, (z))
-        if eq2.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            final_state_output[1][3][(z - 25) % 64] = 'eq'
-            final_state_output[1][1][(z - 25) % 64] = 'eq'
-            print(2, (z))
-        if eq3.x > 0.5:
-            final_state_output[3][0][z] = 'eq'
-            final_state_output[3][3][z] = 'eq'
-            print(3, (z))
-        if eq4.x > 0.5:
-            final_state_output[4][4][z] = 'eq'
-            final_state_output[4][1][z] = 'eq'
-            print(4, (z))
-    f.write(f"final_state={final_state_output}")
\ No newline at end of file
+            eq1, eq2, eq3, eq4 = equations[z]
+            if eq1.x > 0.5:
+                final_state_output[3][0][z] = 'eq'
+                final_state_output[3][3][z] = 'eq'
+                final_state_output[0][2][(z - 39) % 64] = 'eq'
+                final_state_output[0][0][(z - 39) % 64] = 'eq'
+                print(1, (z))
+            if eq2.x > 0.5:
+                final_state_output[4][4][z] = 'eq'
+                final_state_output[4][1][z] = 'eq'
+                final_state_output[1][3][(z - 25) % 64] = 'eq'
+                final_state_output[1][1][(z - 25) % 64] = 'eq'
+                print(2, (z))
+            if eq3.x > 0.5:
+                final_state_output[3][0][z] = 'eq'
+                final_state_output[3][3][z] = 'eq'
+                print(3, (z))
+            if eq4.x > 0.5:
+                final_state_output[4][4][z] = 'eq'
+                final_state_output[4][1][z] = 'eq'
+                print(4, (z))
+        f.write(f"final_state={final_state_output}")
+
+    return {
+        'temp_degree': temp_degree.x,
+        'Red_variables': red_vars_count.getValue() - delta_total_r.getValue(),
+        'Blue_variables': blue_vars_count.getValue() - delta_total_b.getValue(),
+        'sum_without_place': sum_without_place.getValue(),
+        'sum_linear_cancel': sum_linear_cancel.getValue(),
+        'score': temp_degree.x,
+        'output': output,
+    }
+
+
+if __name__ == "__main__":
+    # One (trail, blue_scheme) job per trail on a process pool; finished trails are recorded
+    # in the results file and skipped when the batch is restarted
+    jobs = [(path, trail_scheme(path)) for path in trails]
+    run_schemes(config, build_model, solve_trail, jobs,
+                f"../final_result/SHA3_512_round_{num_rounds + 1}_re_search_runs.jsonl", "Keccak_MILP_Automation",
+                prepare=apply_trail, screen=False)
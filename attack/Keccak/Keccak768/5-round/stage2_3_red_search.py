@@ -1,237 +1,353 @@
 from gurobipy import GRB
 from base_MILP.Keccak_MILP import *
+from base_MILP.cone_MILP import keccak_live_bits
+from base_MILP.scheme_sweep import add_colour, apply_scheme
+from base_MILP.scheme_runner import run_schemes, optimize
+from base_MILP.symmetry import unique_schemes
+from base_MILP.model_cache import cached_model
+from base_MILP.round_search import prefix_states
+from base_MILP.lns import slice_lns, start_from_trail
+from base_MILP import coloring_search, propagation
 from output.write_in_file_slice_64 import *
 from attack.Keccak.Keccak768.blue_result.blue_scheme import all_solutions
 
-for key in all_solutions.keys():
-    blue_scheme_number = 0
-
-    for blue_scheme in all_solutions[key]:
-        print(f"key={key},blue_scheme_number = {blue_scheme_number}")
-        print(f"Initial count {key}")
-        # Create Gurobi model
-        model = gp.Model("Keccak_MILP_Automation")
-        model.setParam('MIPFocus', 1)
-        # model.setParam('MIPGap', 0.0)
-        # model.setParam('TimeLimit', 6000)
-        # 1. Initialize state
-        print("Initializing Keccak state...")
-
-        # Create 5x5x64 initial state
-        initial_state = [[[Bit(model,'constant','uc') for x in range(5)] for y in range(5)] for z in range(64)]
-
-
-        num_rounds = 4  # rounds-1
-        # Initialize state bits
+num_rounds = 4  # rounds-1
+
+
+def scheme_rows(z, x):
+    """Rows y of the initial state whose bit (z, y, x) takes the colour of blue_scheme[z][0][x]"""
+    if x <= 2 and not (x == 2 and z >= 60):
+        return [0, 1, 2]
+    return [0, 1]
+
+
+def build_model(model):
+    """
+    Model of all rounds for every blue scheme: the colour of each initial bit is
+    left to the variables r/b, a scheme is applied through their bounds.
+    """
+    # 1. Initialize state
+    print("Initializing Keccak state...")
+
+    # Create 5x5x64 initial state
+    initial_state = [[[Bit(model,'constant','uc') for x in range(5)] for y in range(5)] for z in range(64)]
+
+    # Initialize state bits
+    colours = dict()
+    for z in range(64):
+        for x in range(5):
+            bits = [initial_state[z][y][x] for y in scheme_rows(z, x)]
+            colours[(z, 0, x)] = add_colour(model, bits, f"inital_{z}_{0}_{x}")
+
+    # Only bits that can carry red/blue and reach the equation bits
+    # final_state[z][0][3] and final_state[z][3][3] are modeled
+    live = keccak_live_bits(initial_state, num_rounds, {(z, y, 3) for z in range(64) for y in (0, 3)})
+
+    # 2. Apply round functions
+    print("Applying round functions...")
+
+    # Save intermediate states
+    intermediate_states = []
+    current_state = initial_state
+
+    # Apply multiple rounds
+    for round_num in range(num_rounds):
+        print(f"Applying round {round_num + 1}")
+
+        # Theta operation
+        print(f"  Round {round_num + 1}: Theta operation")
+        # Choose different Theta operation implementation based on round number
+        if round_num == 0:
+            theta_state, C, D, theta_vars = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
+        elif round_num == 1:
+            theta_state, C, D, theta_vars = create_second_theta_operation(model, current_state, f"round{round_num}_theta", live[round_num]['theta'])
+        else:
+            theta_state, C, D, theta_vars = create_theta_operation(model, current_state, f"round{round_num}_theta", live[round_num]['theta'])
+
+        # Rho operation (bit rotation)
+        print(f"  Round {round_num + 1}: Rho operation")
+        rho_state = rho(theta_state)
+
+        # Pi operation (position permutation)
+        print(f"  Round {round_num + 1}: Pi operation")
+        pi_state = pi(rho_state)
+
+        # Chi operation
+        print(f"  Round {round_num + 1}: Chi operation")
+
+        # Choose different Chi operation implementation based on round number
+        if round_num == 0:
+            chi_state, chi_vars = create_first_chi_operation_384(model, pi_state, f"round{round_num}_chi")
+        elif round_num == 1:
+            chi_state, chi_vars = create_second_chi_operation(model, pi_state, f"round{round_num}_chi", live[round_num]['chi'])
+        else:
+            chi_state, chi_vars = create_chi_operation(model, pi_state, f"round{round_num}_chi", live[round_num]['chi'])
+
+        # Save current round state
+        intermediate_states.append({
+            'theta': theta_state,
+            'C': C,
+            'D': D,
+            'theta_var': theta_vars,
+            'rho_west': rho_state,
+            'chi': pi_state,
+            'rho_east': chi_state,
+            'chi_var': chi_vars
+        })
+
+        # Update current state
+        current_state = chi_state
+
+    final_state = current_state
+    print(f"Completed {num_rounds} rounds application")
+
+    # 3. Calculate equation count and variable statistics
+    print("Calculating equation count...")
+
+    # Count variable types in initial state
+    red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
+    blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
+    
+    # Count intervention variables in round functions
+    delta_total_r = 0
+    delta_total_b = 0
+    sum_const_cond = 0
+    sum_CT = 0
+
+    flag=1
+    for round_state in intermediate_states:
+
+        theta_vars = round_state['theta_var']
+        # Count variables in Theta operation
         for z in range(64):
             for x in range(5):
-                if blue_scheme[z][0][x]<0.5:
-                    initial_state[z][0][x].b = 0
-                    initial_state[z][0][x].r = model.addVar(vtype=GRB.BINARY, name=f"inital_{z}_{0}_{x}_r")
-                    initial_state[z][1][x].b = initial_state[z][0][x].b
-                    initial_state[z][1][x].r = initial_state[z][0][x].r
-                else:
-                    initial_state[z][0][x].r = 0
-                    initial_state[z][0][x].b = 1
-                    initial_state[z][1][x].b = initial_state[z][0][x].b
-                    initial_state[z][1][x].r = initial_state[z][0][x].r
-                if x<=2:
-                    if x == 2 and z >= 60:
-                        continue
-                    initial_state[z][2][x].b = initial_state[z][0][x].b
-                    initial_state[z][2][x].r = initial_state[z][0][x].r
-
-
-        # 2. Apply round functions
-        print("Applying round functions...")
-
-        # Save intermediate states
-        intermediate_states = []
-        current_state = initial_state
-
-        # Apply multiple rounds
-        for round_num in range(num_rounds):
-            print(f"Applying round {round_num + 1}")
-
-            # Theta operation
-            print(f"  Round {round_num + 1}: Theta operation")
-            # Choose different Theta operation implementation based on round number
-            if round_num == 0:
-                theta_state, C, D, theta_vars = create_first_theta_operation(model, current_state, f"round{round_num}_theta")
-            elif round_num == 1:
-                theta_state, C, D, theta_vars = create_second_theta_operation(model, current_state, f"round{round_num}_theta")
-            else:
-                theta_state, C, D, theta_vars = create_theta_operation(model, current_state, f"round{round_num}_theta")
-
-            # Rho operation (bit rotation)
-            print(f"  Round {round_num + 1}: Rho operation")
-            rho_state = rho(theta_state)
-
-            # Pi operation (position permutation)
-            print(f"  Round {round_num + 1}: Pi operation")
-            pi_state = pi(rho_state)
-
-            # Chi operation
-            print(f"  Round {round_num + 1}: Chi operation")
-
-            # Choose different Chi operation implementation based on round number
-            if round_num == 0:
-                chi_state, chi_vars = create_first_chi_operation_384(model, pi_state, f"round{round_num}_chi")
-            elif round_num == 1:
-                chi_state, chi_vars = create_second_chi_operation(model, pi_state, f"round{round_num}_chi")
-            else:
-                chi_state, chi_vars = create_chi_operation(model, pi_state,  f"round{round_num}_chi")
-
-            # Save current round state
-            intermediate_states.append({
-                'theta': theta_state,
-                'C': C,
-                'D': D,
-                'theta_var': theta_vars,
-                'rho_west': rho_state,
-                'chi': pi_state,
-                'rho_east': chi_state,
-                'chi_var': chi_vars
-            })
-
-            # Update current state
-            current_state = chi_state
-
-        final_state = current_state
-        print(f"Completed {num_rounds} rounds application")
-
-        # 3. Calculate equation count and variable statistics
-        print("Calculating equation count...")
-
-        # Count variable types in initial state
-        red_vars_count = gp.quicksum(initial_state[z][y][x].r for z in range(64) for y in range(5) for x in range(5))
-        blue_vars_count = gp.quicksum(initial_state[z][y][x].b for z in range(64) for y in range(5) for x in range(5))
-        
-        # Count intervention variables in round functions
-        delta_total_r = 0
-        delta_total_b = 0
-        sum_const_cond = 0
-        sum_CT = 0
-
-        flag=1
-        for round_state in intermediate_states:
-
-            theta_vars = round_state['theta_var']
-            # Count variables in Theta operation
-            for z in range(64):
-                for x in range(5):
-                    delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
-                    delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
-                    sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
+                delta_total_r += theta_vars[f"C_x{x}_z{z}"]['delta_r']
+                delta_total_b += theta_vars[f"C_x{x}_z{z}"]['delta_b']
+                sum_const_cond += theta_vars[f"C_x{x}_z{z}"]['new_cond']
 
 
-                    delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
-                    delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
-                    sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
+                delta_total_r += theta_vars[f"D_x{x}_z{z}"]['delta_r']
+                delta_total_b += theta_vars[f"D_x{x}_z{z}"]['delta_b']
+                sum_const_cond += theta_vars[f"D_x{x}_z{z}"]['new_cond']
 
 
-                    for y in range(5):
-                        delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                        delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                        sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-            # Count variables in Chi operation
-            chi_vars = round_state['chi_var']
-            for z in range(64):
                 for y in range(5):
-                    for x in range(5):
-                        delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
-                        delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
-                        sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
-                        sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
-        model.addConstr(sum_CT <= 6)
-
-        # Calculate hash output bits
-        # Assume hash output is specific positions of final state
-        hash_output_bits = []
-
-        cut_bits = []
-        # Handle other z values
+                    delta_total_r += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
+                    delta_total_b += theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
+                    sum_const_cond += theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
+        # Count variables in Chi operation
+        chi_vars = round_state['chi_var']
         for z in range(64):
-            equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
-            # Equation constraint: two bits cannot be non-linear
-            model.addConstr(equation3 <= 1 - final_state[z][0][3].ul+final_state[z][0][3].r+final_state[z][0][3].b)
-            model.addConstr(equation3 <= 1 - final_state[z][3][3].ul+final_state[z][3][3].r+final_state[z][3][3].b)
-            hash_output_bits.append(0.58*equation3)
-            cut_bits.append(0.42*equation3)
-        # Total equations
-        total_equations = gp.quicksum(hash_output_bits)
-
-        print("Equation calculation completed")
-
-        # 4. Set constraints and objective function
-        print("Setting constraints and objective function...")
-
-        # Main constraint: guesses + conditions + equations <= variables
-
-        temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
-
-        # Attack complexity constraints
-        model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
-        model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
-        model.addConstr(temp_degree <= total_equations)
-
-        # Set objective
-        model.setObjective(temp_degree-0.01*sum_const_cond, GRB.MAXIMIZE)
-        print("Constraints and objective function set")
-
-        # Solve model
-        print("Starting model solution...")
-        model.optimize()
-
-        # Output results to file
-        f = open(f"../final_result/SHA3_384_round_{num_rounds + 1}_preimage{key}_{blue_scheme_number}.py", 'w')
-        blue_scheme_number+=1
-
-
-        # Output statistical results
-        f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
-        f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
-        f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
-        f.write(f"Total_equations={total_equations.getValue()}\n")
-
-        print("Keccak MILP automation modeling completed")
-
-        # Output state information for LaTeX documentation
-        row_num = 0
-        if_blue = write_row(initial_state, row_num, '$A$')
-        f.write(f"initial_state_output = {if_blue}\n")
-        intermediate_states_output = []
-
-        index = 1
-        for round_state in intermediate_states:
-            round_state_output = dict()
-            theta_vars = round_state['theta_var']
-            chi_vars = round_state['chi_var']
-            row_num += 1
-            C = round_state['C']
-            if_blue = write_row_C(C, row_num, theta_vars, f'$C_{index}$')
-            round_state_output['C'] = if_blue
-            row_num += 0.4
-            D = round_state['D']
-            if_blue = write_row_D(D, row_num, theta_vars, f'$D_{index}$')
-            round_state_output['D'] = if_blue
-            row_num += 0.4
-            theta = round_state['theta']
-            if_blue = write_row_theta(theta, row_num, theta_vars, f'$\\theta_{index}$')
-            round_state_output['theta'] = if_blue
-            row_num += 1
-            rho_state = round_state['rho_west']
-            if_blue = write_row(rho_state, row_num, f'$\\rho_{index}$')
-            round_state_output['rho_west'] = if_blue
-            row_num += 1
-            pi_state = round_state['chi']
-            if_blue = write_row(pi_state, row_num, f'$\\pi_{index}$')
-            round_state_output['chi'] = if_blue
-            row_num += 1
-            chi = round_state['rho_east']
-            if_blue = write_row_chi(chi, row_num, chi_vars, f'$\\chi_{index}$')
-            round_state_output['rho_east'] = if_blue
-            index += 1
-            intermediate_states_output.append(round_state_output)
-
-        f.write(f"intermediate_states_output={intermediate_states_output}")
\ No newline at end of file
+            for y in range(5):
+                for x in range(5):
+                    delta_total_r += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
+                    delta_total_b += chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_b']
+                    sum_const_cond += chi_vars[f"new_z{z}_y{y}_x{x}"]['new_cond']
+                    sum_CT += chi_vars[f"and_z{z}_y{y}_x{x}"]['CT']
+    model.addConstr(sum_CT <= 6)
+
+    # Calculate hash output bits
+    # Assume hash output is specific positions of final state
+    hash_output_bits = []
+
+    cut_bits = []
+    # Handle other z values
+    for z in range(64):
+        equation3 = model.addVar(vtype=GRB.BINARY, name=f'equation3_{z}')
+        # Equation constraint: two bits cannot be non-linear
+        model.addConstr(equation3 <= 1 - final_state[z][0][3].ul+final_state[z][0][3].r+final_state[z][0][3].b)
+        model.addConstr(equation3 <= 1 - final_state[z][3][3].ul+final_state[z][3][3].r+final_state[z][3][3].b)
+        hash_output_bits.append(0.58*equation3)
+        cut_bits.append(0.42*equation3)
+    # Total equations
+    total_equations = gp.quicksum(hash_output_bits)
+
+    print("Equation calculation completed")
+
+    # 4. Set constraints and objective function
+    print("Setting constraints and objective function...")
+
+    # Main constraint: guesses + conditions + equations <= variables
+
+    temp_degree = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name='complexity')
+
+    # Attack complexity constraints
+    model.addConstr(temp_degree <= red_vars_count - delta_total_r - gp.quicksum(cut_bits))
+    model.addConstr(temp_degree <= blue_vars_count - delta_total_b - gp.quicksum(cut_bits))
+    model.addConstr(temp_degree <= total_equations)
+
+    # Set objective
+    model.setObjective(temp_degree-0.01*sum_const_cond, GRB.MAXIMIZE)
+    print("Constraints and objective function set")
+
+    return {
+        'colours': colours,
+        'initial_state': initial_state,
+        'intermediate_states': intermediate_states,
+        'red_vars_count': red_vars_count,
+        'blue_vars_count': blue_vars_count,
+        'delta_total_r': delta_total_r,
+        'delta_total_b': delta_total_b,
+        'sum_const_cond': sum_const_cond,
+        'total_equations': total_equations,
+        'temp_degree': temp_degree,
+    }
+
+
+# The round structure is the same for every blue scheme: build it once (or load it from
+# the model cache) and apply each scheme through the bounds of the colour variables
+config = {'cipher': 'SHA3-384', 'rounds': num_rounds + 1, 'lanes': 64,
+          'theta': ['first', 'second', 'generic', 'generic'],
+          'chi': ['first_384', 'second', 'generic', 'generic']}
+
+# Solve only one scheme of every z-rotation class (see symmetry.unique_schemes); only the rotations that map
+# the fixed positions onto themselves count, which is just the identity with this padding
+dedupe_rotations = False
+# Scheme positions whose rows differ from the rest of their x column (scheme_rows), so they are not free to rotate
+fixed_places = [(z, 0, x) for z in range(64) for x in range(5) if scheme_rows(z, x) != scheme_rows(0, x)]
+
+# Improve a stored trail of this search by slice_lns instead of running the sweep:
+# result file (../final_result/SHA3_384_round_5_preimage{key}_{blue_scheme_number}.py) and its (key, blue_scheme_number)
+lns_trail = None
+lns_job = None
+
+# Colouring pre-pass: start every solve of the sweep from the best colourings of a local search
+# on the propagation evaluator (coloring_search.prepass), the solve then focuses on the bound
+coloring_prepass = False
+
+
+def coloring_score(trace):
+    """
+    Objective of build_model for coloring_search, on evaluated colourings.
+    Colourings breaking the CT bound score -inf; conditional constants are not modelled.
+    """
+    red, blue = propagation.degrees_of_freedom(trace)
+    equation3 = propagation.equations(trace['final'], [[(z, 0, 3), (z, 3, 3)] for z in range(64)], True)
+    degree = coloring_search.split_degree(red, blue, 0, equation3)
+    degree[propagation.total(trace, 'CT') > 6] = float('-inf')
+    return degree
+
+
+def solve_scheme(job, model, handles):
+    """
+    Solve the model with the blue scheme of job applied (run in a scheme_runner worker).
+
+    Returns:
+    - dict with the metrics of the scheme and its output file
+    """
+    key, blue_scheme_number, blue_scheme = job
+    print(f"key={key},blue_scheme_number = {blue_scheme_number}")
+    print(f"Initial count {key}")
+
+    initial_state = handles['initial_state']
+    intermediate_states = handles['intermediate_states']
+    red_vars_count = handles['red_vars_count']
+    blue_vars_count = handles['blue_vars_count']
+    delta_total_r = handles['delta_total_r']
+    delta_total_b = handles['delta_total_b']
+    sum_const_cond = handles['sum_const_cond']
+    total_equations = handles['total_equations']
+    temp_degree = handles['temp_degree']
+
+    model.setParam('MIPFocus', 1)
+    # model.setParam('MIPGap', 0.0)
+    # model.setParam('TimeLimit', 6000)
+
+    # The LNS path already starts from its trail
+    if coloring_prepass and lns_trail is None:
+        coloring_search.prepass(model, initial_state, propagation.keccak_plan(config['theta'], config['chi']),
+                                coloring_score)
+
+    # Solve model
+    print("Starting model solution...")
+    if not optimize(model):
+        # Cut off by the best objective of the other schemes
+        return {'status': model.Status}
+
+    # Output results to file
+    output = f"../final_result/SHA3_384_round_{num_rounds + 1}_preimage{key}_{blue_scheme_number}.py"
+    f = open(output, 'w')
+
+    # Output statistical results
+    f.write(f"Red_variables={red_vars_count.getValue() - delta_total_r.getValue()}\n")
+    f.write(f"Blue_variables={blue_vars_count.getValue() - delta_total_b.getValue()}\n")
+    f.write(f"sum_const_cond = {sum_const_cond.getValue()}\n")
+    f.write(f"Total_equations={total_equations.getValue()}\n")
+
+    print("Keccak MILP automation modeling completed")
+
+    # Output state information for LaTeX documentation
+    row_num = 0
+    if_blue = write_row(initial_state, row_num, '$A$')
+    f.write(f"initial_state_output = {if_blue}\n")
+    intermediate_states_output = []
+
+    index = 1
+    for round_state in intermediate_states:
+        round_state_output = dict()
+        theta_vars = round_state['theta_var']
+        chi_vars = round_state['chi_var']
+        row_num += 1
+        C = round_state['C']
+        if_blue = write_row_C(C, row_num, theta_vars, f'$C_{index}$')
+        round_state_output['C'] = if_blue
+        row_num += 0.4
+        D = round_state['D']
+        if_blue = write_row_D(D, row_num, theta_vars, f'$D_{index}$')
+        round_state_output['D'] = if_blue
+        row_num += 0.4
+        theta = round_state['theta']
+        if_blue = write_row_theta(theta, row_num, theta_vars, f'$\\theta_{index}$')
+        round_state_output['theta'] = if_blue
+        row_num += 1
+        rho_state = round_state['rho_west']
+        if_blue = write_row(rho_state, row_num, f'$\\rho_{index}$')
+        round_state_output['rho_west'] = if_blue
+        row_num += 1
+        pi_state = round_state['chi']
+        if_blue = write_row(pi_state, row_num, f'$\\pi_{index}$')
+        round_state_output['chi'] = if_blue
+        row_num += 1
+        chi = round_state['rho_east']
+        if_blue = write_row_chi(chi, row_num, chi_vars, f'$\\chi_{index}$')
+        round_state_output['rho_east'] = if_blue
+        index += 1
+        intermediate_states_output.append(round_state_output)
+
+    f.write(f"intermediate_states_output={intermediate_states_output}")
+    f.close()
+
+    return {
+        'temp_degree': temp_degree.x,
+        'Red_variables': red_vars_count.getValue() - delta_total_r.getValue(),
+        'Blue_variables': blue_vars_count.getValue() - delta_total_b.getValue(),
+        'Total_equations': total_equations.getValue(),
+        'output': output,
+    }
+
+
+def schemes_of(key):
+    """(scheme_number, scheme) of a key, without the z-rotations of earlier schemes if dedupe_rotations is set."""
+    if dedupe_rotations:
+        return unique_schemes(all_solutions[key], 64, fixed_places)
+    return list(enumerate(all_solutions[key]))
+
+
+if __name__ == "__main__":
+    # (key, blue_scheme_number, blue_scheme) jobs on a process pool, finished jobs are
+    # recorded in the results file and skipped when the sweep is restarted
+    jobs = ((key, blue_scheme_number, blue_scheme)
+            for key in all_solutions.keys()
+            for blue_scheme_number, blue_scheme in schemes_of(key))
+    if lns_trail is not None:
+        key, blue_scheme_number = lns_job
+        job = (key, blue_scheme_number, all_solutions[key][blue_scheme_number])
+        model, handles = cached_model(config, build_model, "Keccak_MILP_Automation")
+        apply_scheme(handles['colours'], job[-1])
+        start_from_trail(handles, lns_trail, ('theta', 'rho_east'))
+        slice_lns(model, prefix_states(handles, ('theta', 'rho_east')))
+        # The flags are fixed to the best trail, this only writes it out
+        solve_scheme(job, model, handles)
+    else:
+        run_schemes(config, build_model, solve_scheme, jobs,
+                    f"../final_result/SHA3_384_round_{num_rounds + 1}_runs.jsonl", "Keccak_MILP_Automation")
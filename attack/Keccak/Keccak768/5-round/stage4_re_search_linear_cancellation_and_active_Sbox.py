@@ -1,5 +1,6 @@
 from gurobipy import GRB
 from base_MILP.Keccak_re_search_MILP import *
+from base_MILP.operation_MILP import fix_bit_type
 from output.re_search_write_in_file_slice_64 import *
 from attack.Keccak.Keccak768.final_result.best_SHA3_384_round_5_preimage import initial_state_output,intermediate_states_output
 # Create Gurobi model
@@ -38,31 +39,10 @@ print("Applying round functions...")
 # Save intermediate states
 intermediate_states = []
 current_state = initial_state
-def set_type(var,type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
+def set_type(var, type):
+    # Pinned through the variable bounds; 'u' and 'ub' bits stay free as before
+    if type in ('lr', 'lb', 'c', 'ur', 'lg', 'ug'):
+        fix_bit_type(var, type)
 # Apply multiple rounds
 for round_num in range(num_rounds):
     inter_state = intermediate_states_output[round_num]
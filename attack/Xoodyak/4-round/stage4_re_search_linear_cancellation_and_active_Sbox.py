@@ -1,6 +1,7 @@
 import gurobipy as gp
 from gurobipy import GRB
 from base_MILP.Xoodyak_re_search_MILP  import *
+from base_MILP.operation_MILP import fix_bit_type
 from output.re_search_write_in_file_Xoodyak import *
 from attack.Xoodyak.final_result import initial_state_output,intermediate_states_output
 
@@ -17,6 +18,9 @@ initial_state = [[[Bit(model, 'constant', 'uc') for x in range(4)] for y in rang
 
 num_rounds = 4  # Number of rounds-1
 
+# Chi encoding: 'gadget' (AND and XOR gadgets) or 'table' (one table_MILP table per bit)
+chi_encoding = 'gadget'
+
 # Initialize state bits
 for z in range(32):
     for x in range(4):
@@ -42,31 +46,10 @@ print("Applying round functions...")
 # Save intermediate states
 intermediate_states = []
 current_state = initial_state
-def set_type(var,type):
-    if type == 'lr':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lb':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 1)
-    elif type == 'c':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 0)
-        model.addConstr(var.b == 0)
-    elif type == 'ur':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 0)
-    elif type == 'lg':
-        model.addConstr(var.ul == 0)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
-    elif type == 'ug':
-        model.addConstr(var.ul == 1)
-        model.addConstr(var.r == 1)
-        model.addConstr(var.b == 1)
+def set_type(var, type):
+    # Pinned through the variable bounds; 'u' and 'ub' bits stay free as before
+    if type in ('lr', 'lb', 'c', 'ur', 'lg', 'ug'):
+        fix_bit_type(var, type)
 # Apply multiple rounds
 for round_num in range(num_rounds):
 
@@ -99,9 +82,9 @@ for round_num in range(num_rounds):
         break
     rho_west_state = rho_west(theta_state)
     if round_num == 0:
-        chi_state, chi_vars,without_place,linear_cancel_chi  = create_first_chi_operation(model, rho_west_state, f"round{round_num}_chi")
+        chi_state, chi_vars,without_place,linear_cancel_chi  = create_first_chi_operation(model, rho_west_state, f"round{round_num}_chi", encoding=chi_encoding)
     else:
-        chi_state, chi_vars,without_place,linear_cancel_chi  = create_chi_operation(model,rho_west_state,f"round{round_num}_chi")
+        chi_state, chi_vars,without_place,linear_cancel_chi  = create_chi_operation(model,rho_west_state,f"round{round_num}_chi", encoding=chi_encoding)
     rho_east_state = rho_east(chi_state)
     if round_num==0:
         inter_state = intermediate_states_output[round_num]
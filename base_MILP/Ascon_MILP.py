@@ -1,10 +1,24 @@
 from base_MILP.operation_MILP import *
+from base_MILP import table_MILP
 from gurobipy import GRB
 
 slice_number = 32  # Number of slices
 
+# Encoding of the AND/XOR step of create_P_S_operation / create_second_P_S_operation:
+# 'gadget' builds an AND and an XOR gadget per bit, 'table' one table_MILP table per bit
+P_S_ENCODING = 'gadget'
 
-def create_P_L_operation(model, old_state, operation_name="P_L"):
+# P_L rotation offsets of each column
+P_L_offsets = [
+    [19, 28],  # x=0
+    [61, 39],  # x=1
+    [1, 6],    # x=2
+    [10, 17],  # x=3
+    [7, 41]    # x=4
+]
+
+
+def create_P_L_operation(model, old_state, operation_name="P_L", live=None):
     """
     MILP modeling for P_L function
 
@@ -12,6 +26,8 @@ def create_P_L_operation(model, old_state, operation_name="P_L"):
     - model: Gurobi model object
     - old_state: 64x5 2D state array [z][x]
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, x) new state bits to build (see cone_MILP); the other
+      bits become constant 'uc' bits
 
     Returns:
     - new_state: New state after P_L operation
@@ -19,37 +35,32 @@ def create_P_L_operation(model, old_state, operation_name="P_L"):
     """
 
     # Initialize new state
-    new_state = [[None for _ in range(5)] for _ in range(slice_number)]
+    new_state = empty_state_like(old_state, (slice_number, 5))
     P_L_vars = {}
 
     # Define index offsets for each column
-    offsets = [
-        [19, 28],  # x=0
-        [61, 39],  # x=1
-        [1, 6],    # x=2
-        [10, 17],  # x=3
-        [7, 41]    # x=4
-    ]
+    offsets = P_L_offsets
 
     # Calculate new state
+    positions, jobs = [], []
     for z in range(slice_number):
         for x in range(5):
-            # Create new state bit
-            new_bit = Bit(model, f"{operation_name}_new_z{z}_x{x}", ('*', '*', '*', 0))
-
             # Get input bits
             input_bits = [
                 old_state[z][x],  # old_state[z][x]
                 old_state[(z + offsets[x][0]) % slice_number][x],  # first offset
                 old_state[(z + offsets[x][1]) % slice_number][x]   # second offset
             ]
+            positions.append((z, x))
+            jobs.append((input_bits, f"{operation_name}_new_z{z}_x{x}"))
 
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, input_bits, new_bit, f"{operation_name}_new_z{z}_x{x}")
+    # Create new state bits and XOR operations for the whole layer
+    new_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live, positions))
 
-            # Store new state and variables
-            new_state[z][x] = new_bit
-            P_L_vars[f"new_z{z}_x{x}"] = xor_vars
+    # Store new state and variables
+    for (z, x), new_bit, xor_vars in zip(positions, new_bits, layer_vars):
+        new_state[z][x] = new_bit
+        P_L_vars[f"new_z{z}_x{x}"] = xor_vars
 
     # # Add condition constant propagation constraints
     # _add_P_L_condition_constraints(model, P_L_vars, old_state, new_state, offsets, operation_name)
@@ -57,7 +68,7 @@ def create_P_L_operation(model, old_state, operation_name="P_L"):
     return new_state, P_L_vars
 
 
-def create_first_P_L_operation(model, old_state, operation_name="P_L"):
+def create_first_P_L_operation(model, old_state, operation_name="P_L", live=None):
     """
     MILP modeling for first round P_L function (special handling)
 
@@ -65,6 +76,8 @@ def create_first_P_L_operation(model, old_state, operation_name="P_L"):
     - model: Gurobi model object
     - old_state: 64x5 2D state array [z][x]
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, x) new state bits to build (see cone_MILP); the other
+      bits become constant 'uc' bits
 
     Returns:
     - new_state: New state after P_L operation
@@ -72,37 +85,32 @@ def create_first_P_L_operation(model, old_state, operation_name="P_L"):
     """
 
     # Initialize new state
-    new_state = [[None for _ in range(5)] for _ in range(slice_number)]
+    new_state = empty_state_like(old_state, (slice_number, 5))
     P_L_vars = {}
 
     # Define index offsets for each column
-    offsets = [
-        [19, 28],  # x=0
-        [61, 39],  # x=1
-        [1, 6],    # x=2
-        [10, 17],  # x=3
-        [7, 41]    # x=4
-    ]
+    offsets = P_L_offsets
 
     # Calculate new state
+    positions, jobs = [], []
     for z in range(slice_number):
         for x in range(5):
-            # Create new state bit (special bit type)
-            new_bit = Bit(model, f"{operation_name}_new_z{z}_x{x}", (0, '*', '*', '*'))
-
             # Get input bits
             input_bits = [
                 old_state[z][x],  # old_state[z][x]
                 old_state[(z + offsets[x][0]) % slice_number][x],  # first offset
                 old_state[(z + offsets[x][1]) % slice_number][x]   # second offset
             ]
+            positions.append((z, x))
+            jobs.append((input_bits, f"{operation_name}_new_z{z}_x{x}"))
 
-            # Create XOR operation
-            xor_vars = xor_with_ul_input(model, input_bits, new_bit, f"{operation_name}_new_z{z}_x{x}")
+    # Create new state bits (special bit type) and XOR operations for the whole layer
+    new_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input, (0, '*', '*', '*'), live_mask(live, positions))
 
-            # Store new state and variables
-            new_state[z][x] = new_bit
-            P_L_vars[f"new_z{z}_x{x}"] = xor_vars
+    # Store new state and variables
+    for (z, x), new_bit, xor_vars in zip(positions, new_bits, layer_vars):
+        new_state[z][x] = new_bit
+        P_L_vars[f"new_z{z}_x{x}"] = xor_vars
 
     # Add condition constant propagation constraints
     _add_P_L_condition_constraints(model, P_L_vars, old_state, new_state, offsets, operation_name)
@@ -157,7 +165,69 @@ def _add_P_L_condition_constraints(model, P_L_vars, old_state, new_state, offset
             model.addConstr(new_state[z][x].cond >= P_L_vars[f"new_z{z}_x{x}"]['new_cond'])
 
 
-def create_P_S_operation(model, old_state, operation_name="P_S"):
+def _P_S_live_bits(live):
+    """
+    Intermediate P_S bits needed by the live new state bits.
+
+    Parameters:
+    - live: set of (z, x) new state bits, or None
+
+    Returns:
+    - live_temp_1: set of (z, x) temp_state_1 bits, or None
+    - live_temp_2: set of (z, x) temp_state_2 bits, or None
+    """
+    if live is None:
+        return None, None
+    new_inputs = {0: (0, 4), 1: (1, 0), 3: (2, 3)}
+    live_temp_2 = {(z, i) for (z, x) in live for i in new_inputs.get(x, (x,))}
+    live_temp_1 = {(z, (x + k) % 5) for (z, x) in live_temp_2 for k in range(3)}
+    return live_temp_1, live_temp_2
+
+
+def _P_S_chi_layer(model, temp_state_1, operation_name, and_gadget, live_temp_2, encoding):
+    """
+    temp_state_2 of P_S: temp_state_1[z][x] ⊕ (temp_state_1[z][x+1] AND temp_state_1[z][x+2]).
+    With the 'gadget' encoding every bit is an AND and an XOR gadget; with 'table' every bit
+    whose inputs are not all constant is one table_MILP table (the AND bit is not built).
+
+    Returns:
+    - xor_bits, and_vars, xor_vars: temp_state_2 bits and the AND / XOR results, in (z, x) order
+    """
+    positions = [(z, x) for z in range(slice_number) for x in range(5)]
+    tabled = []
+    live_gadget = live_temp_2
+    if (encoding or P_S_ENCODING) == 'table':
+        live_gadget = set()
+        for z, x in positions:
+            if live_temp_2 is not None and (z, x) not in live_temp_2:
+                continue
+            if table_MILP.is_constant([temp_state_1[z][(x + k) % 5] for k in range(3)]):
+                live_gadget.add((z, x))
+            else:
+                tabled.append((z, x))
+
+    # Create all AND operation bits of the layer
+    jobs = [((temp_state_1[z][(x + 1) % 5], temp_state_1[z][(x + 2) % 5]), f"{operation_name}_and_z{z}_x{x}")
+            for z in range(slice_number) for x in range(5)]
+    and_bits, and_vars = emit_and_layer(model, jobs, and_gadget, ('*', '*', '*', 0), live_mask(live_gadget, positions))
+
+    # Create all XOR operation bits of the layer
+    jobs = [([temp_state_1[z][x], and_bits[5 * z + x]], f"{operation_name}_xor_z{z}_x{x}")
+            for z in range(slice_number) for x in range(5)]
+    xor_bits, xor_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live_gadget, positions))
+
+    # Tabled bits replace their constant 'uc' placeholders
+    if tabled:
+        table = table_MILP.chi_table(and_gadget, xor_with_ul_input_no_delta_b)
+        for z, x in tabled:
+            k = 5 * z + x
+            inputs = [temp_state_1[z][(x + i) % 5] for i in range(3)]
+            xor_bits[k], and_vars[k], xor_vars[k] = table_MILP.add_chi_bit(
+                model, table, inputs, f"{operation_name}_xor_z{z}_x{x}", f"{operation_name}_and_z{z}_x{x}")
+    return xor_bits, and_vars, xor_vars
+
+
+def create_P_S_operation(model, old_state, operation_name="P_S", live=None, encoding=None):
     """
     MILP modeling for P_S function
 
@@ -165,6 +235,9 @@ def create_P_S_operation(model, old_state, operation_name="P_S"):
     - model: Gurobi model object
     - old_state: 64x5 2D state array [z][x]
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, x) new state bits to build (see cone_MILP); the other
+      bits, and the intermediate bits only they need, become constant 'uc' bits
+    - encoding: 'gadget' or 'table' for the AND/XOR step, P_S_ENCODING by default
 
     Returns:
     - temp_state_1: Intermediate state after XOR operation in P_S
@@ -174,86 +247,59 @@ def create_P_S_operation(model, old_state, operation_name="P_S"):
     """
 
     # Initialize intermediate states and new state
-    temp_state_1 = [[None for _ in range(5)] for _ in range(slice_number)]
-    temp_state_2 = [[None for _ in range(5)] for _ in range(slice_number)]
-    new_state = [[None for _ in range(5)] for _ in range(slice_number)]
+    temp_state_1 = empty_state_like(old_state, (slice_number, 5))
+    temp_state_2 = empty_state_like(old_state, (slice_number, 5))
+    new_state = empty_state_like(old_state, (slice_number, 5))
     P_S_vars = {}
+    live_temp_1, live_temp_2 = _P_S_live_bits(live)
 
     # Step 1: Calculate temp_state_1
+    # x=0: temp_state_1[z][0] = old_state[z][0] + old_state[z][4]
+    # x=2: temp_state_1[z][2] = old_state[z][1] + old_state[z][2]
+    # x=4: temp_state_1[z][4] = old_state[z][3] + old_state[z][4]
+    # x=1, x=3: direct copy of old_state[z][x]
+    xor_inputs = {0: (0, 4), 2: (1, 2), 4: (3, 4)}
+    jobs = [([old_state[z][i] for i in xor_inputs[x]], f"{operation_name}_temp1_z{z}_x{x}")
+            for z in range(slice_number) for x in sorted(xor_inputs)]
+    positions = [(z, x) for z in range(slice_number) for x in sorted(xor_inputs)]
+    layer_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live_temp_1, positions))
+    results = iter(zip(layer_bits, layer_vars))
     for z in range(slice_number):
-        # x=0: temp_state_1[z][0] = old_state[z][0] + old_state[z][4]
-        bit0 = Bit(model, f"{operation_name}_temp1_z{z}_x0", ('*', '*', '*', 0))
-        xor_vars0 = xor_with_ul_input_no_delta_b(model, [old_state[z][0], old_state[z][4]], bit0, f"{operation_name}_temp1_z{z}_x0")
-        temp_state_1[z][0] = bit0
-        P_S_vars[f"temp1_z{z}_x0"] = xor_vars0
-
-        # x=1: temp_state_1[z][1] = old_state[z][1] (direct copy)
-        temp_state_1[z][1] = old_state[z][1]
-        P_S_vars[f"temp1_z{z}_x1"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
-
-        # x=2: temp_state_1[z][2] = old_state[z][1] + old_state[z][2]
-        bit2 = Bit(model, f"{operation_name}_temp1_z{z}_x2", ('*', '*', '*', 0))
-        xor_vars2 = xor_with_ul_input_no_delta_b(model, [old_state[z][1], old_state[z][2]], bit2, f"{operation_name}_temp1_z{z}_x2")
-        temp_state_1[z][2] = bit2
-        P_S_vars[f"temp1_z{z}_x2"] = xor_vars2
-
-        # x=3: temp_state_1[z][3] = old_state[z][3] (direct copy)
-        temp_state_1[z][3] = old_state[z][3]
-        P_S_vars[f"temp1_z{z}_x3"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
-
-        # x=4: temp_state_1[z][4] = old_state[z][3] + old_state[z][4]
-        bit4 = Bit(model, f"{operation_name}_temp1_z{z}_x4", ('*', '*', '*', 0))
-        xor_vars4 = xor_with_ul_input_no_delta_b(model, [old_state[z][3], old_state[z][4]], bit4, f"{operation_name}_temp1_z{z}_x4")
-        temp_state_1[z][4] = bit4
-        P_S_vars[f"temp1_z{z}_x4"] = xor_vars4
+        for x in range(5):
+            if x in xor_inputs:
+                temp_state_1[z][x], P_S_vars[f"temp1_z{z}_x{x}"] = next(results)
+            else:
+                temp_state_1[z][x] = old_state[z][x]
+                P_S_vars[f"temp1_z{z}_x{x}"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
 
     # Step 2: Calculate temp_state_2 (includes AND operations)
+    xor_bits, and_vars, xor_vars = _P_S_chi_layer(model, temp_state_1, operation_name, and_operation_no_cond, live_temp_2, encoding)
+
+    # Store intermediate results and variables
     for z in range(slice_number):
         for x in range(5):
-            # Create AND operation bit
-            and_bit_name = f"{operation_name}_and_z{z}_x{x}"
-            and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
-            and_vars = and_operation_no_cond(model, temp_state_1[z][(x + 1) % 5], temp_state_1[z][(x + 2) % 5], and_bit, operation_name=and_bit_name)
-
-            # Store intermediate results and variables
-            P_S_vars[f"and_z{z}_x{x}"] = and_vars
-
-            # Create XOR operation bit
-            xor_bit_name = f"{operation_name}_xor_z{z}_x{x}"
-            xor_bit = Bit(model, xor_bit_name, ('*', '*', '*', 0))
-
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, [temp_state_1[z][x], and_bit], xor_bit, operation_name=xor_bit_name)
-            temp_state_2[z][x] = xor_bit
-            P_S_vars[f"temp2_z{z}_x{x}"] = xor_vars
+            P_S_vars[f"and_z{z}_x{x}"] = and_vars[5 * z + x]
+            temp_state_2[z][x] = xor_bits[5 * z + x]
+            P_S_vars[f"temp2_z{z}_x{x}"] = xor_vars[5 * z + x]
 
     # Step 3: Calculate new_state
+    # x=0: new_state[z][0] = temp_state_2[z][0] + temp_state_2[z][4]
+    # x=1: new_state[z][1] = temp_state_2[z][1] + temp_state_2[z][0]
+    # x=3: new_state[z][3] = temp_state_2[z][2] + temp_state_2[z][3]
+    # x=2, x=4: direct copy of temp_state_2[z][x]
+    xor_inputs = {0: (0, 4), 1: (1, 0), 3: (2, 3)}
+    jobs = [([temp_state_2[z][i] for i in xor_inputs[x]], f"{operation_name}_new_z{z}_x{x}")
+            for z in range(slice_number) for x in sorted(xor_inputs)]
+    positions = [(z, x) for z in range(slice_number) for x in sorted(xor_inputs)]
+    layer_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live, positions))
+    results = iter(zip(layer_bits, layer_vars))
     for z in range(slice_number):
-        # x=0: new_state[z][0] = temp_state_2[z][0] + temp_state_2[z][4]
-        new_bit0 = Bit(model, f"{operation_name}_new_z{z}_x0", ('*', '*', '*', 0))
-        xor_vars_new0 = xor_with_ul_input_no_delta_b(model, [temp_state_2[z][0], temp_state_2[z][4]], new_bit0, f"{operation_name}_new_z{z}_x0")
-        new_state[z][0] = new_bit0
-        P_S_vars[f"new_z{z}_x0"] = xor_vars_new0
-
-        # x=1: new_state[z][1] = temp_state_2[z][1] + temp_state_2[z][0]
-        new_bit1 = Bit(model, f"{operation_name}_new_z{z}_x1", ('*', '*', '*', 0))
-        xor_vars_new1 = xor_with_ul_input_no_delta_b(model, [temp_state_2[z][1], temp_state_2[z][0]], new_bit1, f"{operation_name}_new_z{z}_x1")
-        new_state[z][1] = new_bit1
-        P_S_vars[f"new_z{z}_x1"] = xor_vars_new1
-
-        # x=2: new_state[z][2] = temp_state_2[z][2] + 1 (direct copy)
-        new_state[z][2] = temp_state_2[z][2]
-        P_S_vars[f"new_z{z}_x2"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
-
-        # x=3: new_state[z][3] = temp_state_2[z][2] + temp_state_2[z][3]
-        new_bit3 = Bit(model, f"{operation_name}_new_z{z}_x3", ('*', '*', '*', 0))
-        xor_vars_new3 = xor_with_ul_input_no_delta_b(model, [temp_state_2[z][2], temp_state_2[z][3]], new_bit3, f"{operation_name}_new_z{z}_x3")
-        new_state[z][3] = new_bit3
-        P_S_vars[f"new_z{z}_x3"] = xor_vars_new3
-
-        # x=4: new_state[z][4] = temp_state_2[z][4] (direct copy)
-        new_state[z][4] = temp_state_2[z][4]
-        P_S_vars[f"new_z{z}_x4"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
+        for x in range(5):
+            if x in xor_inputs:
+                new_state[z][x], P_S_vars[f"new_z{z}_x{x}"] = next(results)
+            else:
+                new_state[z][x] = temp_state_2[z][x]
+                P_S_vars[f"new_z{z}_x{x}"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
 
     # # Add condition constant propagation constraints
     # _add_P_S_condition_constraints(model, P_S_vars, old_state, temp_state_1, temp_state_2, new_state, operation_name)
@@ -261,7 +307,7 @@ def create_P_S_operation(model, old_state, operation_name="P_S"):
     return temp_state_1, temp_state_2, new_state, P_S_vars
 
 
-def create_second_P_S_operation(model, old_state, operation_name="P_S"):
+def create_second_P_S_operation(model, old_state, operation_name="P_S", live=None, encoding=None):
     """
     MILP modeling for P_S function
 
@@ -269,6 +315,9 @@ def create_second_P_S_operation(model, old_state, operation_name="P_S"):
     - model: Gurobi model object
     - old_state: 64x5 2D state array [z][x]
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, x) new state bits to build (see cone_MILP); the other
+      bits, and the intermediate bits only they need, become constant 'uc' bits
+    - encoding: 'gadget' or 'table' for the AND/XOR step, P_S_ENCODING by default
 
     Returns:
     - temp_state_1: Intermediate state after XOR operation in P_S
@@ -278,86 +327,59 @@ def create_second_P_S_operation(model, old_state, operation_name="P_S"):
     """
 
     # Initialize intermediate states and new state
-    temp_state_1 = [[None for _ in range(5)] for _ in range(slice_number)]
-    temp_state_2 = [[None for _ in range(5)] for _ in range(slice_number)]
-    new_state = [[None for _ in range(5)] for _ in range(slice_number)]
+    temp_state_1 = empty_state_like(old_state, (slice_number, 5))
+    temp_state_2 = empty_state_like(old_state, (slice_number, 5))
+    new_state = empty_state_like(old_state, (slice_number, 5))
     P_S_vars = {}
+    live_temp_1, live_temp_2 = _P_S_live_bits(live)
 
     # Step 1: Calculate temp_state_1
+    # x=0: temp_state_1[z][0] = old_state[z][0] + old_state[z][4]
+    # x=2: temp_state_1[z][2] = old_state[z][1] + old_state[z][2]
+    # x=4: temp_state_1[z][4] = old_state[z][3] + old_state[z][4]
+    # x=1, x=3: direct copy of old_state[z][x]
+    xor_inputs = {0: (0, 4), 2: (1, 2), 4: (3, 4)}
+    jobs = [([old_state[z][i] for i in xor_inputs[x]], f"{operation_name}_temp1_z{z}_x{x}")
+            for z in range(slice_number) for x in sorted(xor_inputs)]
+    positions = [(z, x) for z in range(slice_number) for x in sorted(xor_inputs)]
+    layer_bits, layer_vars = emit_xor_layer(model, jobs, xor_without_ul_input, '', live_mask(live_temp_1, positions))
+    results = iter(zip(layer_bits, layer_vars))
     for z in range(slice_number):
-        # x=0: temp_state_1[z][0] = old_state[z][0] + old_state[z][4]
-        bit0 = Bit(model, f"{operation_name}_temp1_z{z}_x0")
-        xor_vars0 = xor_without_ul_input(model, [old_state[z][0], old_state[z][4]], bit0, f"{operation_name}_temp1_z{z}_x0")
-        temp_state_1[z][0] = bit0
-        P_S_vars[f"temp1_z{z}_x0"] = xor_vars0
-
-        # x=1: temp_state_1[z][1] = old_state[z][1] (direct copy)
-        temp_state_1[z][1] = old_state[z][1]
-        P_S_vars[f"temp1_z{z}_x1"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
-
-        # x=2: temp_state_1[z][2] = old_state[z][1] + old_state[z][2]
-        bit2 = Bit(model, f"{operation_name}_temp1_z{z}_x2")
-        xor_vars2 = xor_without_ul_input(model, [old_state[z][1], old_state[z][2]], bit2, f"{operation_name}_temp1_z{z}_x2")
-        temp_state_1[z][2] = bit2
-        P_S_vars[f"temp1_z{z}_x2"] = xor_vars2
-
-        # x=3: temp_state_1[z][3] = old_state[z][3] (direct copy)
-        temp_state_1[z][3] = old_state[z][3]
-        P_S_vars[f"temp1_z{z}_x3"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
-
-        # x=4: temp_state_1[z][4] = old_state[z][3] + old_state[z][4]
-        bit4 = Bit(model, f"{operation_name}_temp1_z{z}_x4")
-        xor_vars4 = xor_without_ul_input(model, [old_state[z][3], old_state[z][4]], bit4, f"{operation_name}_temp1_z{z}_x4")
-        temp_state_1[z][4] = bit4
-        P_S_vars[f"temp1_z{z}_x4"] = xor_vars4
+        for x in range(5):
+            if x in xor_inputs:
+                temp_state_1[z][x], P_S_vars[f"temp1_z{z}_x{x}"] = next(results)
+            else:
+                temp_state_1[z][x] = old_state[z][x]
+                P_S_vars[f"temp1_z{z}_x{x}"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
 
     # Step 2: Calculate temp_state_2 (includes AND operations)
+    xor_bits, and_vars, xor_vars = _P_S_chi_layer(model, temp_state_1, operation_name, and_operation, live_temp_2, encoding)
+
+    # Store intermediate results and variables
     for z in range(slice_number):
         for x in range(5):
-            # Create AND operation bit
-            and_bit_name = f"{operation_name}_and_z{z}_x{x}"
-            and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
-            and_vars = and_operation(model, temp_state_1[z][(x + 1) % 5], temp_state_1[z][(x + 2) % 5], and_bit, operation_name=and_bit_name)
-
-            # Store intermediate results and variables
-            P_S_vars[f"and_z{z}_x{x}"] = and_vars
-
-            # Create XOR operation bit
-            xor_bit_name = f"{operation_name}_xor_z{z}_x{x}"
-            xor_bit = Bit(model, xor_bit_name, ('*', '*', '*', 0))
-
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, [temp_state_1[z][x], and_bit], xor_bit, operation_name=xor_bit_name)
-            temp_state_2[z][x] = xor_bit
-            P_S_vars[f"temp2_z{z}_x{x}"] = xor_vars
+            P_S_vars[f"and_z{z}_x{x}"] = and_vars[5 * z + x]
+            temp_state_2[z][x] = xor_bits[5 * z + x]
+            P_S_vars[f"temp2_z{z}_x{x}"] = xor_vars[5 * z + x]
 
     # Step 3: Calculate new_state
+    # x=0: new_state[z][0] = temp_state_2[z][0] + temp_state_2[z][4]
+    # x=1: new_state[z][1] = temp_state_2[z][1] + temp_state_2[z][0]
+    # x=3: new_state[z][3] = temp_state_2[z][2] + temp_state_2[z][3]
+    # x=2, x=4: direct copy of temp_state_2[z][x]
+    xor_inputs = {0: (0, 4), 1: (1, 0), 3: (2, 3)}
+    jobs = [([temp_state_2[z][i] for i in xor_inputs[x]], f"{operation_name}_new_z{z}_x{x}")
+            for z in range(slice_number) for x in sorted(xor_inputs)]
+    positions = [(z, x) for z in range(slice_number) for x in sorted(xor_inputs)]
+    layer_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live, positions))
+    results = iter(zip(layer_bits, layer_vars))
     for z in range(slice_number):
-        # x=0: new_state[z][0] = temp_state_2[z][0] + temp_state_2[z][4]
-        new_bit0 = Bit(model, f"{operation_name}_new_z{z}_x0", ('*', '*', '*', 0))
-        xor_vars_new0 = xor_with_ul_input_no_delta_b(model, [temp_state_2[z][0], temp_state_2[z][4]], new_bit0, f"{operation_name}_new_z{z}_x0")
-        new_state[z][0] = new_bit0
-        P_S_vars[f"new_z{z}_x0"] = xor_vars_new0
-
-        # x=1: new_state[z][1] = temp_state_2[z][1] + temp_state_2[z][0]
-        new_bit1 = Bit(model, f"{operation_name}_new_z{z}_x1", ('*', '*', '*', 0))
-        xor_vars_new1 = xor_with_ul_input_no_delta_b(model, [temp_state_2[z][1], temp_state_2[z][0]], new_bit1, f"{operation_name}_new_z{z}_x1")
-        new_state[z][1] = new_bit1
-        P_S_vars[f"new_z{z}_x1"] = xor_vars_new1
-
-        # x=2: new_state[z][2] = temp_state_2[z][2] + 1 (direct copy)
-        new_state[z][2] = temp_state_2[z][2]
-        P_S_vars[f"new_z{z}_x2"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
-
-        # x=3: new_state[z][3] = temp_state_2[z][2] + temp_state_2[z][3]
-        new_bit3 = Bit(model, f"{operation_name}_new_z{z}_x3", ('*', '*', '*', 0))
-        xor_vars_new3 = xor_with_ul_input_no_delta_b(model, [temp_state_2[z][2], temp_state_2[z][3]], new_bit3, f"{operation_name}_new_z{z}_x3")
-        new_state[z][3] = new_bit3
-        P_S_vars[f"new_z{z}_x3"] = xor_vars_new3
-
-        # x=4: new_state[z][4] = temp_state_2[z][4] (direct copy)
-        new_state[z][4] = temp_state_2[z][4]
-        P_S_vars[f"new_z{z}_x4"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
+        for x in range(5):
+            if x in xor_inputs:
+                new_state[z][x], P_S_vars[f"new_z{z}_x{x}"] = next(results)
+            else:
+                new_state[z][x] = temp_state_2[z][x]
+                P_S_vars[f"new_z{z}_x{x}"] = {'delta_r': 0, 'delta_b': 0, 'new_cond': 0}
 
     # Add condition constant propagation constraints
     _add_P_S_condition_constraints(model, P_S_vars, old_state, temp_state_1, temp_state_2, new_state, operation_name)
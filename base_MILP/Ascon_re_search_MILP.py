@@ -1,8 +1,12 @@
 from base_MILP.operation_MILP import *
+from base_MILP import table_MILP
 from gurobipy import GRB
 
 slice_number = 32  # Number of slices
 
+# Encoding of the AND/XOR step of create_P_S_operation / create_second_P_S_operation (see Ascon_MILP)
+P_S_ENCODING = 'gadget'
+
 def create_P_L_operation(model, old_state, operation_name="P_L"):
     """
     MILP modeling for P_L function
@@ -168,7 +172,7 @@ def _add_P_L_condition_constraints(model, P_L_vars, old_state, new_state, offset
             model.addConstr(new_state[z][x].cond <= input1_cond + input2_cond + input3_cond + P_L_vars[f"new_z{z}_x{x}"]['new_cond'])
             model.addConstr(new_state[z][x].cond >= P_L_vars[f"new_z{z}_x{x}"]['new_cond'])
 
-def create_P_S_operation(model, old_state, operation_name="P_S"):
+def create_P_S_operation(model, old_state, operation_name="P_S", encoding=None):
     """
     MILP modeling for P_S function
 
@@ -176,6 +180,7 @@ def create_P_S_operation(model, old_state, operation_name="P_S"):
     - model: Gurobi model object
     - old_state: 64x5 2D state array [z][x]
     - operation_name: Operation name for variable naming
+    - encoding: 'gadget' or 'table' for the AND/XOR step, P_S_ENCODING by default
 
     Returns:
     - temp_state_1: Intermediate state after XOR operation in P_S
@@ -241,21 +246,29 @@ def create_P_S_operation(model, old_state, operation_name="P_S"):
     # Step 2: Calculate temp_state_2 (includes AND operations)
     for z in range(slice_number):
         for x in range(5):
-            # Create AND operation bit
             and_bit_name = f"{operation_name}_and_z{z}_x{x}"
-            and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
-            and_vars = and_operation_no_cond(model, temp_state_1[z][(x + 1) % 5], temp_state_1[z][(x + 2) % 5], and_bit, operation_name=and_bit_name)
-
-            # Store intermediate results and variables
-            P_S_vars[f"and_z{z}_x{x}"] = and_vars
-
-            # Create XOR operation bit
             xor_bit_name = f"{operation_name}_xor_z{z}_x{x}"
-            xor_bit = Bit(model, xor_bit_name, ('*', '*', '*', 0))
-
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, [temp_state_1[z][x], and_bit], xor_bit, operation_name=xor_bit_name)
-            temp_state_2[z][x] = xor_bit
+            inputs = [temp_state_1[z][(x + k) % 5] for k in range(3)]
+            if (encoding or P_S_ENCODING) == 'table' and not table_MILP.is_constant(inputs):
+                # AND and XOR as one table, without the AND bit
+                xor_bit, and_vars, xor_vars = table_MILP.add_chi_bit(
+                    model, table_MILP.chi_table(and_operation_no_cond, xor_with_ul_input_no_delta_b), inputs, xor_bit_name, and_bit_name)
+                P_S_vars[f"and_z{z}_x{x}"] = and_vars
+                temp_state_2[z][x] = xor_bit
+            else:
+                # Create AND operation bit
+                and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
+                and_vars = and_operation_no_cond(model, temp_state_1[z][(x + 1) % 5], temp_state_1[z][(x + 2) % 5], and_bit, operation_name=and_bit_name)
+
+                # Store intermediate results and variables
+                P_S_vars[f"and_z{z}_x{x}"] = and_vars
+
+                # Create XOR operation bit
+                xor_bit = Bit(model, xor_bit_name, ('*', '*', '*', 0))
+
+                # Create XOR operation
+                xor_vars = xor_with_ul_input_no_delta_b(model, [temp_state_1[z][x], and_bit], xor_bit, operation_name=xor_bit_name)
+                temp_state_2[z][x] = xor_bit
             P_S_vars[f"temp2_z{z}_x{x}"] = xor_vars
 
             if_linear_cancel_r = model.addVar(vtype=GRB.BINARY, name=f"if_linear_cancel_r_{operation_name}_temp1_z{z}_x4")
@@ -339,7 +352,7 @@ def create_P_S_operation(model, old_state, operation_name="P_S"):
 
     return temp_state_1, temp_state_2, re_new_state, P_S_vars, without_place, linear_cancel
 
-def create_second_P_S_operation(model, old_state, operation_name="P_S"):
+def create_second_P_S_operation(model, old_state, operation_name="P_S", encoding=None):
     """
     MILP modeling for P_S function (second round)
 
@@ -347,6 +360,7 @@ def create_second_P_S_operation(model, old_state, operation_name="P_S"):
     - model: Gurobi model object
     - old_state: 64x5 2D state array [z][x]
     - operation_name: Operation name for variable naming
+    - encoding: 'gadget' or 'table' for the AND/XOR step, P_S_ENCODING by default
 
     Returns:
     - temp_state_1: Intermediate state after XOR operation in P_S
@@ -412,21 +426,29 @@ def create_second_P_S_operation(model, old_state, operation_name="P_S"):
     # Step 2: Calculate temp_state_2 (includes AND operations)
     for z in range(slice_number):
         for x in range(5):
-            # Create AND operation bit
             and_bit_name = f"{operation_name}_and_z{z}_x{x}"
-            and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
-            and_vars = and_operation(model, temp_state_1[z][(x + 1) % 5], temp_state_1[z][(x + 2) % 5], and_bit, operation_name=and_bit_name)
-
-            # Store intermediate results and variables
-            P_S_vars[f"and_z{z}_x{x}"] = and_vars
-
-            # Create XOR operation bit
             xor_bit_name = f"{operation_name}_xor_z{z}_x{x}"
-            xor_bit = Bit(model, xor_bit_name, ('*', '*', '*', 0))
-
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, [temp_state_1[z][x], and_bit], xor_bit, operation_name=xor_bit_name)
-            temp_state_2[z][x] = xor_bit
+            inputs = [temp_state_1[z][(x + k) % 5] for k in range(3)]
+            if (encoding or P_S_ENCODING) == 'table' and not table_MILP.is_constant(inputs):
+                # AND and XOR as one table, without the AND bit
+                xor_bit, and_vars, xor_vars = table_MILP.add_chi_bit(
+                    model, table_MILP.chi_table(and_operation, xor_with_ul_input_no_delta_b), inputs, xor_bit_name, and_bit_name)
+                P_S_vars[f"and_z{z}_x{x}"] = and_vars
+                temp_state_2[z][x] = xor_bit
+            else:
+                # Create AND operation bit
+                and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
+                and_vars = and_operation(model, temp_state_1[z][(x + 1) % 5], temp_state_1[z][(x + 2) % 5], and_bit, operation_name=and_bit_name)
+
+                # Store intermediate results and variables
+                P_S_vars[f"and_z{z}_x{x}"] = and_vars
+
+                # Create XOR operation bit
+                xor_bit = Bit(model, xor_bit_name, ('*', '*', '*', 0))
+
+                # Create XOR operation
+                xor_vars = xor_with_ul_input_no_delta_b(model, [temp_state_1[z][x], and_bit], xor_bit, operation_name=xor_bit_name)
+                temp_state_2[z][x] = xor_bit
             P_S_vars[f"temp2_z{z}_x{x}"] = xor_vars
 
             if_linear_cancel_r = model.addVar(vtype=GRB.BINARY, name=f"if_linear_cancel_r_{operation_name}_temp1_z{z}_x4")
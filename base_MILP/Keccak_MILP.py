@@ -1,15 +1,18 @@
 from base_MILP.operation_MILP import *
+from base_MILP import table_MILP
 from gurobipy import GRB
 
 
-def create_theta_operation(model, state, operation_name="theta"):
+def create_theta_operation(model, state, operation_name="theta", live=None):
     """
     MILP modeling for SHA3 theta function.
 
     Parameters:
     - model: Gurobi model object
-    - state: 64x5x5 3D state array [z][y][x]
+    - state: wx5x5 3D state array [z][y][x] (lane width w = len(state))
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, y, x) new state bits to build (see cone_MILP); the other
+      bits, and the C/D bits only they need, become constant 'uc' bits
 
     Returns:
     - new_state: New state after theta operation
@@ -17,65 +20,75 @@ def create_theta_operation(model, state, operation_name="theta"):
     - D: Intermediate variable D [z][x]
     - theta_vars: Variables related to theta operation
     """
+    lanes = len(state)
 
     # Initialize new state
-    new_state = [[[None for _ in range(5)] for _ in range(5)] for _ in range(64)]
+    new_state = empty_state_like(state, (lanes, 5, 5))
     theta_vars = {}
 
+    # D[z][x] and C[z][x] needed by the live new state bits
+    live_D = live_C = None
+    if live is not None:
+        live_D = {(x, z) for (z, y, x) in live}
+        live_C = {((x - 1) % 5, z) for (x, z) in live_D} | {((x + 1) % 5, (z - 1) % lanes) for (x, z) in live_D}
+
     # Step 1: Calculate C[z][x] = A[z][0][x] ⊕ A[z][1][x] ⊕ A[z][2][x] ⊕ A[z][3][x] ⊕ A[z][4][x]
-    C = [[None for _ in range(5)] for _ in range(64)]
+    C = empty_state_like(state, (lanes, 5))
 
+    positions, jobs = [], []
     for x in range(5):
-        for z in range(64):
-            # Create C[z][x] bit
-            C_bit = Bit(model, f"{operation_name}_C_x{x}_z{z}",('*','*','*',0))
-
+        for z in range(lanes):
             # Get input bits list
             input_bits = [state[z][y][x] for y in range(5)]
+            positions.append((x, z))
+            jobs.append((input_bits, f"{operation_name}_C_x{x}_z{z}"))
 
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, input_bits, C_bit, f"{operation_name}_C_x{x}_z{z}")
+    # Create C[z][x] bits and XOR operations for the whole layer
+    C_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live_C, positions))
 
-            # Store variables
-            theta_vars[f"C_x{x}_z{z}"] = xor_vars
-            C[z][x] = C_bit
+    # Store variables
+    for (x, z), C_bit, xor_vars in zip(positions, C_bits, layer_vars):
+        theta_vars[f"C_x{x}_z{z}"] = xor_vars
+        C[z][x] = C_bit
 
-    # Step 2: Calculate D[z][x] = C[z][(x-1)%5] ⊕ C[(z-1)%64][(x+1)%5]
-    D = [[None for _ in range(5)] for _ in range(64)]
+    # Step 2: Calculate D[z][x] = C[z][(x-1)%5] ⊕ C[(z-1)%lanes][(x+1)%5]
+    D = empty_state_like(state, (lanes, 5))
 
+    positions, jobs = [], []
     for x in range(5):
-        for z in range(64):
-            # Create D[z][x] bit
-            D_bit = Bit(model, f"{operation_name}_D_x{x}_z{z}",('*','*','*',0))
-
+        for z in range(lanes):
             # Get input bits
             input_bit1 = C[z][(x - 1) % 5]
-            input_bit2 = C[(z - 1) % 64][(x + 1) % 5]
+            input_bit2 = C[(z - 1) % lanes][(x + 1) % 5]
+            positions.append((x, z))
+            jobs.append(([input_bit1, input_bit2], f"{operation_name}_D_x{x}_z{z}"))
 
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, [input_bit1, input_bit2], D_bit, f"{operation_name}_D_x{x}_z{z}")
+    # Create D[z][x] bits and XOR operations for the whole layer
+    D_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live_D, positions))
 
-            # Store variables
-            theta_vars[f"D_x{x}_z{z}"] = xor_vars
-            D[z][x] = D_bit
+    # Store variables
+    for (x, z), D_bit, xor_vars in zip(positions, D_bits, layer_vars):
+        theta_vars[f"D_x{x}_z{z}"] = xor_vars
+        D[z][x] = D_bit
 
     # Step 3: Calculate new state A'[z][y][x] = A[z][y][x] ⊕ D[z][x]
-    for z in range(64):
+    positions, jobs = [], []
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
-                # Create new state bit
-                new_bit = Bit(model, f"{operation_name}_new_z{z}_y{y}_x{x}",('*','*','*',0))
-
                 # Get input bits
                 input_bit1 = state[z][y][x]
                 input_bit2 = D[z][x]
+                positions.append((z, y, x))
+                jobs.append(([input_bit1, input_bit2], f"{operation_name}_new_z{z}_y{y}_x{x}"))
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input_no_delta_b(model, [input_bit1, input_bit2], new_bit, f"{operation_name}_new_z{z}_y{y}_x{x}")
+    # Create new state bits and XOR operations for the whole layer
+    new_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live, positions))
 
-                # Store new state and variables
-                new_state[z][y][x] = new_bit
-                theta_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
+    # Store new state and variables
+    for (z, y, x), new_bit, xor_vars in zip(positions, new_bits, layer_vars):
+        new_state[z][y][x] = new_bit
+        theta_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
 
     # Step 4: Add condition constant propagation constraints (commented out)
     # _add_theta_condition_constraints(model, theta_vars, state, C, D, new_state, operation_name)
@@ -83,14 +96,16 @@ def create_theta_operation(model, state, operation_name="theta"):
     return new_state, C, D, theta_vars
 
 
-def create_second_theta_operation(model, state, operation_name="theta"):
+def create_second_theta_operation(model, state, operation_name="theta", live=None):
     """
     MILP modeling for SHA3 second theta function.
 
     Parameters:
     - model: Gurobi model object
-    - state: 64x5x5 3D state array [z][y][x]
+    - state: wx5x5 3D state array [z][y][x] (lane width w = len(state))
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, y, x) new state bits to build (see cone_MILP); the other
+      bits, and the C/D bits only they need, become constant 'uc' bits
 
     Returns:
     - new_state: New state after theta operation
@@ -98,86 +113,96 @@ def create_second_theta_operation(model, state, operation_name="theta"):
     - D: Intermediate variable D [z][x]
     - theta_vars: Variables related to theta operation
     """
+    lanes = len(state)
 
     # Initialize new state
-    new_state = [[[None for _ in range(5)] for _ in range(5)] for _ in range(64)]
+    new_state = empty_state_like(state, (lanes, 5, 5))
     theta_vars = {}
 
+    # D[z][x] and C[z][x] needed by the live new state bits
+    live_D = live_C = None
+    if live is not None:
+        live_D = {(x, z) for (z, y, x) in live}
+        live_C = {((x - 1) % 5, z) for (x, z) in live_D} | {((x + 1) % 5, (z - 1) % lanes) for (x, z) in live_D}
+
     # Step 1: Calculate C[z][x] = A[z][0][x] ⊕ A[z][1][x] ⊕ A[z][2][x] ⊕ A[z][3][x] ⊕ A[z][4][x]
-    C = [[None for _ in range(5)] for _ in range(64)]
+    C = empty_state_like(state, (lanes, 5))
 
+    positions, jobs = [], []
     for x in range(5):
-        for z in range(64):
-            # Create C[z][x] bit
-            C_bit = Bit(model, f"{operation_name}_C_x{x}_z{z}")
-
+        for z in range(lanes):
             # Get input bits list
             input_bits = [state[z][y][x] for y in range(5)]
+            positions.append((x, z))
+            jobs.append((input_bits, f"{operation_name}_C_x{x}_z{z}"))
 
-            # Create XOR operation
-            xor_vars = xor_with_ul_input(model, input_bits, C_bit, f"{operation_name}_C_x{x}_z{z}")
+    # Create C[z][x] bits and XOR operations for the whole layer
+    C_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input, '', live_mask(live_C, positions))
 
-            # Store variables
-            theta_vars[f"C_x{x}_z{z}"] = xor_vars
-            C[z][x] = C_bit
+    # Store variables
+    for (x, z), C_bit, xor_vars in zip(positions, C_bits, layer_vars):
+        theta_vars[f"C_x{x}_z{z}"] = xor_vars
+        C[z][x] = C_bit
 
-    # Step 2: Calculate D[z][x] = C[z][(x-1)%5] ⊕ C[(z-1)%64][(x+1)%5]
-    D = [[None for _ in range(5)] for _ in range(64)]
+    # Step 2: Calculate D[z][x] = C[z][(x-1)%5] ⊕ C[(z-1)%lanes][(x+1)%5]
+    D = empty_state_like(state, (lanes, 5))
 
+    positions, jobs = [], []
     for x in range(5):
-        for z in range(64):
-            # Create D[z][x] bit
-            D_bit = Bit(model, f"{operation_name}_D_x{x}_z{z}")
-
+        for z in range(lanes):
             # Get input bits
             input_bit1 = C[z][(x - 1) % 5]
-            input_bit2 = C[(z - 1) % 64][(x + 1) % 5]
+            input_bit2 = C[(z - 1) % lanes][(x + 1) % 5]
+            positions.append((x, z))
+            jobs.append(([input_bit1, input_bit2], f"{operation_name}_D_x{x}_z{z}"))
 
-            # Create XOR operation
-            xor_vars = xor_with_ul_input(model, [input_bit1, input_bit2], D_bit, f"{operation_name}_D_x{x}_z{z}")
+    # Create D[z][x] bits and XOR operations for the whole layer
+    D_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input, '', live_mask(live_D, positions))
 
-            # Store variables
-            theta_vars[f"D_x{x}_z{z}"] = xor_vars
-            D[z][x] = D_bit
+    # Store variables
+    for (x, z), D_bit, xor_vars in zip(positions, D_bits, layer_vars):
+        theta_vars[f"D_x{x}_z{z}"] = xor_vars
+        D[z][x] = D_bit
 
     # Step 3: Calculate new state A'[z][y][x] = A[z][y][x] ⊕ D[z][x]
-    for z in range(64):
+    positions, jobs = [], []
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
-                # Create new state bit
-                new_bit = Bit(model, f"{operation_name}_new_z{z}_y{y}_x{x}")
-
                 # Get input bits
                 input_bit1 = state[z][y][x]
                 input_bit2 = D[z][x]
+                positions.append((z, y, x))
+                jobs.append(([input_bit1, input_bit2], f"{operation_name}_new_z{z}_y{y}_x{x}"))
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input(model, [input_bit1, input_bit2], new_bit, f"{operation_name}_new_z{z}_y{y}_x{x}")
+    # Create new state bits and XOR operations for the whole layer
+    new_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input, '', live_mask(live, positions))
 
-                # Store new state and variables
-                new_state[z][y][x] = new_bit
-                theta_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
+    # Store new state and variables
+    for (z, y, x), new_bit, xor_vars in zip(positions, new_bits, layer_vars):
+        new_state[z][y][x] = new_bit
+        theta_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
 
     # Nonlinear bit cancellation will suppress subsequent deterministic bit cancellation
     for x in range(5):
-        for z in range(64):
+        for z in range(lanes):
             from_ul_to_c = model.addVar(vtype=GRB.BINARY,name=f"{operation_name}_C_x{x}_z{z}_from_ul_to_c")
             model.addConstr(theta_vars[f"C_x{x}_z{z}"]['has_ul']==C[z][x].ul+from_ul_to_c)
             model.addConstr(1 - from_ul_to_c>=D[z][(x+1)%5].cond)
-            model.addConstr(1 - from_ul_to_c>=D[(z+1)%64][(x-1)%5].cond)
+            model.addConstr(1 - from_ul_to_c>=D[(z+1)%lanes][(x-1)%5].cond)
             model.addConstr(1 - from_ul_to_c >= new_state[z][0][(x + 1) % 5].cond)
             model.addConstr(1 - from_ul_to_c >= new_state[z][1][(x + 1) % 5].cond)
             model.addConstr(1 - from_ul_to_c >= new_state[z][2][(x + 1) % 5].cond)
             model.addConstr(1 - from_ul_to_c >= new_state[z][3][(x + 1) % 5].cond)
             model.addConstr(1 - from_ul_to_c >= new_state[z][4][(x + 1) % 5].cond)
-            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % 64][0][(x - 1) % 5].cond)
-            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % 64][1][(x - 1) % 5].cond)
-            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % 64][2][(x - 1) % 5].cond)
-            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % 64][3][(x - 1) % 5].cond)
-            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % 64][4][(x - 1) % 5].cond)
+            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % lanes][0][(x - 1) % 5].cond)
+            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % lanes][1][(x - 1) % 5].cond)
+            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % lanes][2][(x - 1) % 5].cond)
+            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % lanes][3][(x - 1) % 5].cond)
+            model.addConstr(1 - from_ul_to_c >= new_state[(z + 1) % lanes][4][(x - 1) % 5].cond)
 
     for x in range(5):
-        for z in range(64):
+        for z in range(lanes):
             from_ul_to_c = model.addVar(vtype=GRB.BINARY,name=f"{operation_name}_D_x{x}_z{z}_from_ul_to_c")
             model.addConstr(theta_vars[f"D_x{x}_z{z}"]['has_ul']==D[z][x].ul+from_ul_to_c)
             model.addConstr(1 - from_ul_to_c >= new_state[z][0][x].cond)
@@ -199,7 +224,7 @@ def create_first_theta_operation(model, state, operation_name="theta"):
 
     Parameters:
     - model: Gurobi model object
-    - state: 64x5x5 3D state array [z][y][x]
+    - state: wx5x5 3D state array [z][y][x] (lane width w = len(state))
     - operation_name: Operation name for variable naming
 
     Returns:
@@ -208,12 +233,13 @@ def create_first_theta_operation(model, state, operation_name="theta"):
     - D: Intermediate variable D [z][x]
     - theta_vars: Variables related to theta operation
     """
+    lanes = len(state)
 
     theta_vars = {}
 
-    C = [[Bit(model, f"{operation_name}_C_x{x}_z{z}", 'uc') for x in range(5)] for z in range(64)]
-    D = [[Bit(model, f"{operation_name}_D_x{x}_z{z}", 'uc') for x in range(5)] for z in range(64)]
-    for z in range(64):
+    C = [[Bit(model, f"{operation_name}_C_x{x}_z{z}", 'uc') for x in range(5)] for z in range(lanes)]
+    D = [[Bit(model, f"{operation_name}_D_x{x}_z{z}", 'uc') for x in range(5)] for z in range(lanes)]
+    for z in range(lanes):
         for x in range(5):
             # Store theta operation variables
             theta_vars[f"C_x{x}_z{z}"] = {'delta_r': state[z][0][x].r, 'delta_b': state[z][0][x].b, 'delta_r_ul': 0, 'new_cond': 0}
@@ -237,40 +263,41 @@ def _add_theta_condition_constraints(model, theta_vars, old_state, C, D, new_sta
     - new_state: New state [z][y][x]
     - operation_name: Operation name
     """
+    lanes = len(old_state)
     # Construct auxiliary variables x_ij
     # Condition constant propagation from old state to C
     x_old_state2C = [[[model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_x_old_state({z},{y},{x})2C({z},{x})")
-                       for x in range(5)] for y in range(5)] for z in range(64)]
+                       for x in range(5)] for y in range(5)] for z in range(lanes)]
 
     # Condition constant propagation from old state to new state
     x_old_state2new_state = [[[model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_x_old_state({z},{y},{x})2new_state({z},{y},{x})")
-                               for x in range(5)] for y in range(5)] for z in range(64)]
+                               for x in range(5)] for y in range(5)] for z in range(lanes)]
 
     # Condition constant propagation from C to D
     x_C2D_1 = [[model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_x_C({z},{x})2D({z},{(x + 1) % 5})")
-                for x in range(5)] for z in range(64)]
-    x_C2D_2 = [[model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_x_C({z},{x})2D({(z + 1) % 64},{(x - 1) % 5})")
-                for x in range(5)] for z in range(64)]
+                for x in range(5)] for z in range(lanes)]
+    x_C2D_2 = [[model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_x_C({z},{x})2D({(z + 1) % lanes},{(x - 1) % 5})")
+                for x in range(5)] for z in range(lanes)]
 
     # Condition constant propagation from D to new state
     x_D2new_state = [[[model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_x_D({z},{x})2new_state({z},{y},{x})")
-                       for x in range(5)] for y in range(5)] for z in range(64)]
+                       for x in range(5)] for y in range(5)] for z in range(lanes)]
 
     # Each condition constant has exactly one propagation bit
 
     # Condition output constraints for old state
-    for z in range(64):
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
                 model.addConstr(old_state[z][y][x].cond == x_old_state2C[z][y][x] + x_old_state2new_state[z][y][x])
 
     # Condition output constraints for C
-    for z in range(64):
+    for z in range(lanes):
         for x in range(5):
             model.addConstr(C[z][x].cond == x_C2D_1[z][x] + x_C2D_2[z][x])
 
     # Condition output constraints for D
-    for z in range(64):
+    for z in range(lanes):
         for x in range(5):
             model.addConstr(D[z][x].cond == (x_D2new_state[z][0][x] + x_D2new_state[z][1][x] +
                                              x_D2new_state[z][2][x] + x_D2new_state[z][3][x] +
@@ -279,7 +306,7 @@ def _add_theta_condition_constraints(model, theta_vars, old_state, C, D, new_sta
     # Each condition constant has exactly one input bit
 
     # Condition input constraints for C
-    for z in range(64):
+    for z in range(lanes):
         for x in range(5):
             delta_r = theta_vars[f"C_x{x}_z{z}"]['delta_r']
             delta_b = theta_vars[f"C_x{x}_z{z}"]['delta_b']
@@ -293,7 +320,7 @@ def _add_theta_condition_constraints(model, theta_vars, old_state, C, D, new_sta
             model.addConstr(C[z][x].cond >= theta_vars[f"C_x{x}_z{z}"]['new_cond'])
 
     # Condition input constraints for D
-    for z in range(64):
+    for z in range(lanes):
         for x in range(5):
             delta_r = theta_vars[f"D_x{x}_z{z}"]['delta_r']
             delta_b = theta_vars[f"D_x{x}_z{z}"]['delta_b']
@@ -301,11 +328,11 @@ def _add_theta_condition_constraints(model, theta_vars, old_state, C, D, new_sta
             theta_vars[f"D_x{x}_z{z}"]['new_cond'] = model.addVar(vtype=GRB.BINARY, name=f'D_x{x}_z{z}_new_cond')
             model.addConstr(theta_vars[f"D_x{x}_z{z}"]['new_cond'] <= delta_r + delta_b)
             model.addConstr(theta_vars[f"D_x{x}_z{z}"]['new_cond'] <= 1 - has_ul)
-            model.addConstr(D[z][x].cond <= x_C2D_1[z][(x - 1) % 5] + x_C2D_2[(z - 1) % 64][(x + 1) % 5] + theta_vars[f"D_x{x}_z{z}"]['new_cond'])
+            model.addConstr(D[z][x].cond <= x_C2D_1[z][(x - 1) % 5] + x_C2D_2[(z - 1) % lanes][(x + 1) % 5] + theta_vars[f"D_x{x}_z{z}"]['new_cond'])
             model.addConstr(D[z][x].cond >= theta_vars[f"D_x{x}_z{z}"]['new_cond'])
 
     # Condition input constraints for new state
-    for z in range(64):
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
                 delta_r = theta_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
@@ -318,27 +345,23 @@ def _add_theta_condition_constraints(model, theta_vars, old_state, C, D, new_sta
                 model.addConstr(new_state[z][y][x].cond >= theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond'])
 
 
-def create_chi_operation(model, state, operation_name="rho_east"):
-    """
-    MILP modeling for SHA3 chi function.
+# Encoding of the chi layers built by create_chi_operation / create_second_chi_operation:
+# 'gadget' builds an AND and an XOR gadget per bit, 'table' one table_MILP table per bit
+CHI_ENCODING = 'gadget'
 
-    Parameters:
-    - model: Gurobi model object
-    - state: 64x5x5 3D state array [z][y][x]
-    - operation_name: Operation name for variable naming
 
-    Returns:
-    - new_state: New state after chi operation
-    - chi_vars: Variables related to chi operation
-    """
+def _chi_gadget_layer(model, state, operation_name, and_gadget, xor_gadget, live):
+    """Chi layer from one AND gadget and one XOR gadget per bit, see create_chi_operation."""
+    lanes = len(state)
     # Initialize new state
-    new_state = [[[None for _ in range(5)] for _ in range(5)] for _ in range(64)]
+    new_state = empty_state_like(state, (lanes, 5, 5))
     # Initialize intermediate AND operation results
-    and_bits = [[[None for _ in range(5)] for _ in range(5)] for _ in range(64)]
+    and_bits = empty_state_like(state, (lanes, 5, 5))
     chi_vars = {}
 
     # Step 1: Calculate all AND terms A[z][y][(x+1)%5] AND A[z][y][(x+2)%5]
-    for z in range(64):
+    positions, jobs = [], []
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
                 # Get input bit positions
@@ -346,101 +369,117 @@ def create_chi_operation(model, state, operation_name="rho_east"):
                 x2 = (x + 2) % 5
                 bit1 = state[z][y][x1]
                 bit2 = state[z][y][x2]
+                positions.append((z, y, x))
+                jobs.append(((bit1, bit2), f"{operation_name}_and_z{z}_y{y}_x{x}"))
 
-                # Create AND operation bit
-                and_bit_name = f"{operation_name}_and_z{z}_y{y}_x{x}"
-                and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
-
-                # Create AND operation
-                and_vars = and_operation_no_cond(model, bit1, bit2, and_bit, operation_name=and_bit_name)
+    # Create AND operation bits and AND operations for the whole layer
+    layer_bits, layer_vars = emit_and_layer(model, jobs, and_gadget, ('*', '*', '*', 0), live_mask(live, positions))
 
-                # Store intermediate results and variables
-                and_bits[z][y][x] = and_bit
-                chi_vars[f"and_z{z}_y{y}_x{x}"] = and_vars
+    # Store intermediate results and variables
+    for (z, y, x), and_bit, and_vars in zip(positions, layer_bits, layer_vars):
+        and_bits[z][y][x] = and_bit
+        chi_vars[f"and_z{z}_y{y}_x{x}"] = and_vars
 
     # Step 2: Calculate new state A'[z][y][x] = A[z][y][x] ⊕ (A[z][y][(x+1)%5] AND A[z][y][(x+2)%5])
-    for z in range(64):
+    positions, jobs = [], []
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
                 # Get input bits
                 original_bit = state[z][y][x]
                 and_bit = and_bits[z][y][x]
+                positions.append((z, y, x))
+                jobs.append(([original_bit, and_bit], f"{operation_name}_new_z{z}_y{y}_x{x}"))
 
-                # Create new state bit
-                new_bit_name = f"{operation_name}_new_z{z}_y{y}_x{x}"
-                new_bit = Bit(model, new_bit_name,('*','*','*',0))
+    # Create new state bits and XOR operations for the whole layer
+    new_bits, layer_vars = emit_xor_layer(model, jobs, xor_gadget, ('*', '*', '*', 0), live_mask(live, positions))
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input(model, [original_bit, and_bit], new_bit, operation_name=new_bit_name)
+    # Store new state and variables
+    for (z, y, x), new_bit, xor_vars in zip(positions, new_bits, layer_vars):
+        new_state[z][y][x] = new_bit
+        chi_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
 
-                # Store new state and variables
-                new_state[z][y][x] = new_bit
-                chi_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
+    return new_state, chi_vars
 
-    # Step 3: Add condition constant propagation constraints (commented out)
-    # _add_chi_condition_constraints(model, state, new_state, chi_vars, operation_name)
+
+def _chi_table_layer(model, state, operation_name, and_gadget, xor_gadget, live):
+    """
+    Chi layer with one table per output bit: the AND term and the XOR of A'[z][y][x] are
+    described together by the inequalities of table_MILP, without the intermediate AND bit.
+    Bits whose inputs are all constant still go through the gadgets, which fold them.
+    The chi_vars entries keep the keys of the gadgets (CT, const_cond, delta_r, delta_b, ...).
+    """
+    lanes = len(state)
+    table = table_MILP.chi_table(and_gadget, xor_gadget)
+    tabled, folded = [], set()
+    for z in range(lanes):
+        for y in range(5):
+            for x in range(5):
+                if live is not None and (z, y, x) not in live:
+                    continue
+                if table_MILP.is_constant([state[z][y][(x + k) % 5] for k in range(3)]):
+                    folded.add((z, y, x))
+                else:
+                    tabled.append((z, y, x))
+
+    # Dead and tabled bits get constant 'uc' placeholders here and are replaced below
+    new_state, chi_vars = _chi_gadget_layer(model, state, operation_name, and_gadget, xor_gadget, folded)
+
+    for z, y, x in tabled:
+        inputs = [state[z][y][(x + k) % 5] for k in range(3)]
+        new_state[z][y][x], chi_vars[f"and_z{z}_y{y}_x{x}"], chi_vars[f"new_z{z}_y{y}_x{x}"] = table_MILP.add_chi_bit(
+            model, table, inputs, f"{operation_name}_new_z{z}_y{y}_x{x}", f"{operation_name}_and_z{z}_y{y}_x{x}")
 
     return new_state, chi_vars
 
 
-def create_second_chi_operation(model, state, operation_name="rho_east"):
+def create_chi_operation(model, state, operation_name="rho_east", live=None, encoding=None):
     """
-    MILP modeling for SHA3 second chi function.
+    MILP modeling for SHA3 chi function.
 
     Parameters:
     - model: Gurobi model object
-    - state: 64x5x5 3D state array [z][y][x]
+    - state: wx5x5 3D state array [z][y][x] (lane width w = len(state))
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, y, x) new state bits to build (see cone_MILP); the other
+      bits and their AND terms become constant 'uc' bits
+    - encoding: 'gadget' or 'table', CHI_ENCODING by default
 
     Returns:
     - new_state: New state after chi operation
     - chi_vars: Variables related to chi operation
     """
-    # Initialize new state
-    new_state = [[[None for _ in range(5)] for _ in range(5)] for _ in range(64)]
-    # Initialize intermediate AND operation results
-    and_bits = [[[None for _ in range(5)] for _ in range(5)] for _ in range(64)]
-    chi_vars = {}
-
-    # Step 1: Calculate all AND terms A[z][y][(x+1)%5] AND A[z][y][(x+2)%5]
-    for z in range(64):
-        for y in range(5):
-            for x in range(5):
-                # Get input bit positions
-                x1 = (x + 1) % 5
-                x2 = (x + 2) % 5
-                bit1 = state[z][y][x1]
-                bit2 = state[z][y][x2]
+    if (encoding or CHI_ENCODING) == 'table':
+        new_state, chi_vars = _chi_table_layer(model, state, operation_name, and_operation_no_cond, xor_with_ul_input, live)
+    else:
+        new_state, chi_vars = _chi_gadget_layer(model, state, operation_name, and_operation_no_cond, xor_with_ul_input, live)
 
-                # Create AND operation bit
-                and_bit_name = f"{operation_name}_and_z{z}_y{y}_x{x}"
-                and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
+    # Step 3: Add condition constant propagation constraints (commented out)
+    # _add_chi_condition_constraints(model, state, new_state, chi_vars, operation_name)
 
-                # Create AND operation
-                and_vars = and_operation(model, bit1, bit2, and_bit, operation_name=and_bit_name)
+    return new_state, chi_vars
 
-                # Store intermediate results and variables
-                and_bits[z][y][x] = and_bit
-                chi_vars[f"and_z{z}_y{y}_x{x}"] = and_vars
 
-    # Step 2: Calculate new state A'[z][y][x] = A[z][y][x] ⊕ (A[z][y][(x+1)%5] AND A[z][y][(x+2)%5])
-    for z in range(64):
-        for y in range(5):
-            for x in range(5):
-                # Get input bits
-                original_bit = state[z][y][x]
-                and_bit = and_bits[z][y][x]
-
-                # Create new state bit
-                new_bit_name = f"{operation_name}_new_z{z}_y{y}_x{x}"
-                new_bit = Bit(model, new_bit_name, ('*', '*', '*', 0))
+def create_second_chi_operation(model, state, operation_name="rho_east", live=None, encoding=None):
+    """
+    MILP modeling for SHA3 second chi function.
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input_no_delta_b(model, [original_bit, and_bit], new_bit, operation_name=new_bit_name)
+    Parameters:
+    - model: Gurobi model object
+    - state: wx5x5 3D state array [z][y][x] (lane width w = len(state))
+    - operation_name: Operation name for variable naming
+    - live: optional set of (z, y, x) new state bits to build (see cone_MILP); the other
+      bits and their AND terms become constant 'uc' bits
+    - encoding: 'gadget' or 'table', CHI_ENCODING by default
 
-                # Store new state and variables
-                new_state[z][y][x] = new_bit
-                chi_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
+    Returns:
+    - new_state: New state after chi operation
+    - chi_vars: Variables related to chi operation
+    """
+    if (encoding or CHI_ENCODING) == 'table':
+        new_state, chi_vars = _chi_table_layer(model, state, operation_name, and_operation, xor_with_ul_input_no_delta_b, live)
+    else:
+        new_state, chi_vars = _chi_gadget_layer(model, state, operation_name, and_operation, xor_with_ul_input_no_delta_b, live)
 
     # Step 3: Add condition constant propagation constraints
     _add_chi_condition_constraints(model, state, new_state, chi_vars, operation_name)
@@ -455,15 +494,16 @@ def create_first_chi_operation_512(model, state, operation_name="rho_east"):
 
     Parameters:
     - model: Gurobi model object
-    - state: 64x5x5 3D state array [z][y][x]
+    - state: wx5x5 3D state array [z][y][x] (lane width w = len(state))
     - operation_name: Operation name for variable naming
 
     Returns:
     - new_state: New state after chi operation
     - chi_vars: Variables related to chi operation
     """
+    lanes = len(state)
     # Constraint: red and blue cannot be adjacent
-    for z in range(64):
+    for z in range(lanes):
         for y in [0, 2, 4]:
             model.addConstr(state[z][y][0].r + state[z][y][1].b <= 1)
             model.addConstr(state[z][y][0].b + state[z][y][1].r <= 1)
@@ -471,10 +511,10 @@ def create_first_chi_operation_512(model, state, operation_name="rho_east"):
     chi_vars = dict()
 
     # Initialize new state
-    new_state = [[[None for _ in range(5)] for _ in range(5)] for _ in range(64)]
+    new_state = empty_state_like(state, (lanes, 5, 5))
 
     # Initialize intermediate AND operation results
-    for z in range(64):
+    for z in range(lanes):
         # Whether column 0 has red bits
         r_col_0 = model.addVar(vtype=GRB.BINARY, name=f'r_col_0{z}')
         # Whether column 4 has red bits
@@ -589,15 +629,16 @@ def create_first_chi_operation_384(model, state, operation_name="rho_east"):
 
     Parameters:
     - model: Gurobi model object
-    - state: 64x5x5 3D state array [z][y][x]
+    - state: wx5x5 3D state array [z][y][x] (lane width w = len(state))
     - operation_name: Operation name for variable naming
 
     Returns:
     - new_state: New state after chi operation
     - chi_vars: Variables related to chi operation
     """
+    lanes = len(state)
     # Constraint: red and blue cannot be in the same row
-    for z in range(64):
+    for z in range(lanes):
         for y in [0, 1, 3]:
             model.addConstr(state[z][y][0].r + state[z][y][1].b <= 1)
             model.addConstr(state[z][y][0].b + state[z][y][1].r <= 1)
@@ -614,10 +655,10 @@ def create_first_chi_operation_384(model, state, operation_name="rho_east"):
     chi_vars = dict()
 
     # Initialize new state
-    new_state = [[[None for _ in range(5)] for _ in range(5)] for _ in range(64)]
+    new_state = empty_state_like(state, (lanes, 5, 5))
 
     # Initialize intermediate AND operation results
-    for z in range(64):
+    for z in range(lanes):
         # Whether columns 0, 1, 4 have red bits
         r_col_0 = model.addVar(vtype=GRB.BINARY, name=f'r_col_0{z}')
         r_col_1 = model.addVar(vtype=GRB.BINARY, name=f'r_col_1{z}')
@@ -735,31 +776,32 @@ def _add_chi_condition_constraints(model, old_state, new_state, chi_vars, operat
     - chi_vars: Variables related to Chi operation
     - operation_name: Operation name
     """
+    lanes = len(old_state)
     # Construct auxiliary variables
 
     # Condition constant propagation from old state to first input of AND operation
     x_old_state2and_1 = [[[model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_x_old_state2and_1_z{z}_y{y}_x{(x - 1) % 5}")
-                           for x in range(5)] for y in range(5)] for z in range(64)]
+                           for x in range(5)] for y in range(5)] for z in range(lanes)]
 
     # Condition constant propagation from old state to second input of AND operation
     x_old_state2and_2 = [[[model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_x_old_state2and_2_z{z}_y{y}_x{(x - 2) % 5}")
-                           for x in range(5)] for y in range(5)] for z in range(64)]
+                           for x in range(5)] for y in range(5)] for z in range(lanes)]
 
     # Condition output constraints for old state
-    for z in range(64):
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
                 model.addConstr(old_state[z][y][x].cond == (x_old_state2and_1[z][y][x] + x_old_state2and_2[z][y][x]))
 
     # Condition input constraints for AND operation
-    for z in range(64):
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
                 const_cond = chi_vars[f"and_z{z}_y{y}_x{x}"]["const_cond"]
                 model.addConstr(const_cond == x_old_state2and_1[z][y][(x + 1) % 5] + x_old_state2and_2[z][y][(x + 2) % 5])
 
     # Condition input constraints for new state (commented out)
-    # for z in range(64):
+    # for z in range(lanes):
     #     for y in range(5):
     #         for x in range(5):
     #             delta_r = chi_vars[f"new_z{z}_y{y}_x{x}"]['delta_r']
@@ -772,6 +814,7 @@ def _add_chi_condition_constraints(model, old_state, new_state, chi_vars, operat
 # Cyclic shift constants for Rho operation
 # Defines cyclic shift offsets for each position in 5x5 matrix
 # Each element represents cyclic shift amount in z-direction for corresponding lane
+# (offsets of the 64-bit lanes, rho reduces them mod the lane width)
 rho_box = [
     [0, 1, 62, 28, 27],
     [36, 44, 6, 55, 20],
@@ -786,21 +829,25 @@ def rho(old_state):
     SHA3 Rho function: performs cyclic shift operation in z-direction on the state.
 
     Parameters:
-    - old_state: 64x5x5 3D input state array [z][y][x]
+    - old_state: wx5x5 3D input state array [z][y][x] (lane width w = len(old_state))
 
     Returns:
     - new_state: New state array after Rho operation
     """
+    lanes = len(old_state)
+    if isinstance(old_state, BitState):
+        return permutation_view(old_state, 'rho', lambda z, y, x: ((z - rho_box[y][x]) % lanes, y, x))
+
     # Initialize new state array
-    new_state = [[[0 for _ in range(5)] for _ in range(5)] for _ in range(64)]
+    new_state = [[[0 for _ in range(5)] for _ in range(5)] for _ in range(lanes)]
 
     # Iterate through all bit positions
-    for z in range(64):
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
                 # Perform cyclic shift according to offsets in rho_box
-                # New z value comes from (z - offset) mod 64 in old state
-                new_state[z][y][x] = old_state[(z - rho_box[y][x]) % 64][y][x]
+                # New z value comes from (z - offset) mod lanes in old state
+                new_state[z][y][x] = old_state[(z - rho_box[y][x]) % lanes][y][x]
 
     return new_state
 
@@ -810,16 +857,20 @@ def pi(old_state):
     SHA3 Pi function: performs lane position permutation on the state.
 
     Parameters:
-    - old_state: 64x5x5 3D input state array [z][y][x]
+    - old_state: wx5x5 3D input state array [z][y][x] (lane width w = len(old_state))
 
     Returns:
     - new_state: New state array after Pi operation
     """
+    lanes = len(old_state)
+    if isinstance(old_state, BitState):
+        return permutation_view(old_state, 'pi', lambda z, y, x: (z, x, (x + 3 * y) % 5))
+
     # Initialize new state array
-    new_state = [[[0 for _ in range(5)] for _ in range(5)] for _ in range(64)]
+    new_state = [[[0 for _ in range(5)] for _ in range(5)] for _ in range(lanes)]
 
     # Iterate through all bit positions
-    for z in range(64):
+    for z in range(lanes):
         for y in range(5):
             for x in range(5):
                 # Perform Pi permutation: move lane from position (y,x) to position (x, (x + 3*y) % 5)
@@ -760,6 +760,9 @@ def rho(old_state):
     Returns:
     - new_state: New state array after Rho operation
     """
+    if isinstance(old_state, BitState):
+        return permutation_view(old_state, 'rho', lambda z, y, x: ((z - rho_box[y][x]) % slice_numebr, y, x))
+
     new_state = [[[0 for _ in range(5)] for _ in range(5)] for _ in range(slice_numebr)]
 
     for z in range(slice_numebr):
@@ -780,6 +783,9 @@ def pi(old_state):
     Returns:
     - new_state: New state array after Pi operation
     """
+    if isinstance(old_state, BitState):
+        return permutation_view(old_state, 'pi', lambda z, y, x: (z, x, (x + 3 * y) % 5))
+
     new_state = [[[0 for _ in range(5)] for _ in range(5)] for _ in range(slice_numebr)]
 
     for z in range(slice_numebr):
@@ -1,8 +1,9 @@
 from base_MILP.operation_MILP import *
+from base_MILP import table_MILP
 from gurobipy import GRB
 
 
-def create_theta_operation(model, state, operation_name="xoodyak_theta"):
+def create_theta_operation(model, state, operation_name="xoodyak_theta", live=None):
     """
     MILP modeling for Xoodyak theta function.
 
@@ -10,6 +11,8 @@ def create_theta_operation(model, state, operation_name="xoodyak_theta"):
     - model: Gurobi model object
     - state: 32x3x4 3D state array [z][y][x]
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, y, x) new state bits to build (see cone_MILP); the other
+      bits, and the C/D bits only they need, become constant 'uc' bits
 
     Returns:
     - new_state: New state after theta operation
@@ -19,63 +22,72 @@ def create_theta_operation(model, state, operation_name="xoodyak_theta"):
     """
 
     # Initialize new state
-    new_state = [[[None for _ in range(4)] for _ in range(3)] for _ in range(32)]
+    new_state = empty_state_like(state, (32, 3, 4))
     theta_vars = {}
 
+    # D[z][x] and C[z][x] needed by the live new state bits
+    live_D = live_C = None
+    if live is not None:
+        live_D = {(x, z) for (z, y, x) in live}
+        live_C = {((x - 1) % 4, (z - 5) % 32) for (x, z) in live_D} | {((x - 1) % 4, (z - 14) % 32) for (x, z) in live_D}
+
     # Step 1: Calculate C[z][x] = state[z][0][x] ⊕ state[z][1][x] ⊕ state[z][2][x]
-    C = [[None for _ in range(4)] for _ in range(32)]
+    C = empty_state_like(state, (32, 4))
 
+    positions, jobs = [], []
     for x in range(4):
         for z in range(32):
-            # Create C[z][x] bit
-            C_bit = Bit(model, f"{operation_name}_C_x{x}_z{z}", ('*', '*', '*', 0))
-
             # Get input bits list
             input_bits = [state[z][y][x] for y in range(3)]
+            positions.append((x, z))
+            jobs.append((input_bits, f"{operation_name}_C_x{x}_z{z}"))
 
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, input_bits, C_bit, f"{operation_name}_C_x{x}_z{z}")
+    # Create C[z][x] bits and XOR operations for the whole layer
+    C_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live_C, positions))
 
-            # Store variables
-            theta_vars[f"C_x{x}_z{z}"] = xor_vars
-            C[z][x] = C_bit
+    # Store variables
+    for (x, z), C_bit, xor_vars in zip(positions, C_bits, layer_vars):
+        theta_vars[f"C_x{x}_z{z}"] = xor_vars
+        C[z][x] = C_bit
 
     # Step 2: Calculate D[z][x] = C[(z-5)%32][(x-1)%4] ⊕ C[(z-14)%32][(x-1)%4]
-    D = [[None for _ in range(4)] for _ in range(32)]
+    D = empty_state_like(state, (32, 4))
 
+    positions, jobs = [], []
     for x in range(4):
         for z in range(32):
-            # Create D[z][x] bit
-            D_bit = Bit(model, f"{operation_name}_D_x{x}_z{z}", ('*', '*', '*', 0))
-
             # Get input bits
             input_bit1 = C[(z - 5) % 32][(x - 1) % 4]
             input_bit2 = C[(z - 14) % 32][(x - 1) % 4]
+            positions.append((x, z))
+            jobs.append(([input_bit1, input_bit2], f"{operation_name}_D_x{x}_z{z}"))
 
-            # Create XOR operation
-            xor_vars = xor_with_ul_input_no_delta_b(model, [input_bit1, input_bit2], D_bit, f"{operation_name}_D_x{x}_z{z}")
+    # Create D[z][x] bits and XOR operations for the whole layer
+    D_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live_D, positions))
 
-            # Store variables
-            theta_vars[f"D_x{x}_z{z}"] = xor_vars
-            D[z][x] = D_bit
+    # Store variables
+    for (x, z), D_bit, xor_vars in zip(positions, D_bits, layer_vars):
+        theta_vars[f"D_x{x}_z{z}"] = xor_vars
+        D[z][x] = D_bit
 
     # Step 3: Calculate new state state'[z][y][x] = state[z][y][x] ⊕ D[z][x]
+    positions, jobs = [], []
     for z in range(32):
         for y in range(3):
             for x in range(4):
-                # Create new state bit
-                new_bit = Bit(model, f"{operation_name}_new_z{z}_y{y}_x{x}",('*','*','*',0))
-
                 # Get input bits
                 input_bit1 = state[z][y][x]
                 input_bit2 = D[z][x]
+                positions.append((z, y, x))
+                jobs.append(([input_bit1, input_bit2], f"{operation_name}_new_z{z}_y{y}_x{x}"))
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input_no_delta_b(model, [input_bit1, input_bit2], new_bit, f"{operation_name}_new_z{z}_y{y}_x{x}")
+    # Create new state bits and XOR operations for the whole layer
+    new_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live, positions))
 
-                # Store new state and variables
-                new_state[z][y][x] = new_bit
-                theta_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
+    # Store new state and variables
+    for (z, y, x), new_bit, xor_vars in zip(positions, new_bits, layer_vars):
+        new_state[z][y][x] = new_bit
+        theta_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
 
     # # Step 4: Add condition constant propagation constraints (commented out in original)
     # _add_theta_condition_constraints(model, theta_vars, state, C, D, new_state, operation_name)
@@ -100,11 +112,11 @@ def create_first_theta_operation(model, state, operation_name="theta"):
     """
 
     # Initialize new state
-    new_state = [[[None for _ in range(4)] for _ in range(3)] for _ in range(32)]
+    new_state = empty_state_like(state, (32, 3, 4))
     theta_vars = {}
 
     # Step 1: Calculate C[z][x] = state[z][0][x] ⊕ state[z][1][x] ⊕ state[z][2][x]
-    C = [[None for _ in range(4)] for _ in range(32)]
+    C = empty_state_like(state, (32, 4))
 
     for x in range(4):
         for z in range(32):
@@ -124,7 +136,7 @@ def create_first_theta_operation(model, state, operation_name="theta"):
             C[z][x] = C_bit
 
     # Step 2: Calculate D[z][x] = C[(z-5)%32][(x-1)%4] ⊕ C[(z-14)%32][(x-1)%4]
-    D = [[None for _ in range(4)] for _ in range(32)]
+    D = empty_state_like(state, (32, 4))
 
     for x in range(4):
         for z in range(32):
@@ -260,26 +272,22 @@ def _add_theta_condition_constraints(model, theta_vars, old_state, C, D, new_sta
                 model.addConstr(new_state[z][y][x].cond >= theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond'])
 
 
-def create_chi_operation(model, state, operation_name="xoodyak_chi"):
-    """
-    MILP modeling for Xoodyak chi function.
+# Encoding of the chi layers: 'gadget' builds an AND and an XOR gadget per bit, 'table' one
+# table_MILP table per bit (the bits of a column share only their inputs, so the tables of
+# its three bits describe the whole column relation)
+CHI_ENCODING = 'gadget'
 
-    Parameters:
-    - model: Gurobi model object
-    - state: 32x3x4 3D state array [z][y][x]
-    - operation_name: Operation name for variable naming
 
-    Returns:
-    - new_state: New state after chi operation
-    - chi_vars: Variables related to chi operation
-    """
+def _chi_gadget_layer(model, state, operation_name, and_gadget, live):
+    """Chi layer from one AND gadget and one XOR gadget per bit, see create_chi_operation."""
     # Initialize new state
-    new_state = [[[None for _ in range(4)] for _ in range(3)] for _ in range(32)]
+    new_state = empty_state_like(state, (32, 3, 4))
     # Initialize intermediate AND operation results
-    and_bits = [[[None for _ in range(4)] for _ in range(3)] for _ in range(32)]
+    and_bits = empty_state_like(state, (32, 3, 4))
     chi_vars = {}
 
     # Step 1: Calculate all AND terms state[z][(y+1)%3][x] AND state[z][(y+2)%3][x]
+    positions, jobs = [], []
     for z in range(32):
         for y in range(3):
             for x in range(4):
@@ -288,101 +296,115 @@ def create_chi_operation(model, state, operation_name="xoodyak_chi"):
                 y2 = (y + 2) % 3
                 bit1 = state[z][y1][x]
                 bit2 = state[z][y2][x]
+                positions.append((z, y, x))
+                jobs.append(((bit1, bit2), f"{operation_name}_and_z{z}_y{y}_x{x}"))
 
-                # Create AND operation bit
-                and_bit_name = f"{operation_name}_and_z{z}_y{y}_x{x}"
-                and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
+    # Create AND operation bits and AND operations for the whole layer
+    layer_bits, layer_vars = emit_and_layer(model, jobs, and_gadget, ('*', '*', '*', 0), live_mask(live, positions))
 
-                # Create AND operation
-                and_vars = and_operation_no_cond(model, bit1, bit2, and_bit, operation_name=and_bit_name)
-
-                # Store intermediate results and variables
-                and_bits[z][y][x] = and_bit
-                chi_vars[f"and_z{z}_y{y}_x{x}"] = and_vars
+    # Store intermediate results and variables
+    for (z, y, x), and_bit, and_vars in zip(positions, layer_bits, layer_vars):
+        and_bits[z][y][x] = and_bit
+        chi_vars[f"and_z{z}_y{y}_x{x}"] = and_vars
 
     # Step 2: Calculate new state state'[z][y][x] = state[z][y][x] ⊕ (state[z][(y+1)%3][x] AND state[z][(y+2)%3][x])
+    positions, jobs = [], []
     for z in range(32):
         for y in range(3):
             for x in range(4):
                 # Get input bits
                 original_bit = state[z][y][x]
                 and_bit = and_bits[z][y][x]
+                positions.append((z, y, x))
+                jobs.append(([original_bit, and_bit], f"{operation_name}_new_z{z}_y{y}_x{x}"))
 
-                # Create new state bit
-                new_bit_name = f"{operation_name}_new_z{z}_y{y}_x{x}"
-                new_bit = Bit(model, new_bit_name,('*','*','*',0))
+    # Create new state bits and XOR operations for the whole layer
+    new_bits, layer_vars = emit_xor_layer(model, jobs, xor_with_ul_input_no_delta_b, ('*', '*', '*', 0), live_mask(live, positions))
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input_no_delta_b(model, [original_bit, and_bit], new_bit, operation_name=new_bit_name)
+    # Store new state and variables
+    for (z, y, x), new_bit, xor_vars in zip(positions, new_bits, layer_vars):
+        new_state[z][y][x] = new_bit
+        chi_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
 
-                # Store new state and variables
-                new_state[z][y][x] = new_bit
-                chi_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
+    return new_state, chi_vars
 
-    # Step 3: Add condition constant propagation constraints
-    _add_xoodyak_chi_condition_constraints(model, state, new_state, chi_vars, operation_name)
+
+def _chi_table_layer(model, state, operation_name, and_gadget, live):
+    """
+    Chi layer with one table_MILP table per bit state[z][y][x] ⊕ (state[z][y+1][x] AND state[z][y+2][x]),
+    without the intermediate AND bits. Bits whose inputs are all constant still go through the
+    gadgets, which fold them; chi_vars keeps the keys of the gadgets.
+    """
+    table = table_MILP.chi_table(and_gadget, xor_with_ul_input_no_delta_b)
+    tabled, folded = [], set()
+    for z in range(32):
+        for y in range(3):
+            for x in range(4):
+                if live is not None and (z, y, x) not in live:
+                    continue
+                if table_MILP.is_constant([state[z][(y + k) % 3][x] for k in range(3)]):
+                    folded.add((z, y, x))
+                else:
+                    tabled.append((z, y, x))
+
+    # Dead and tabled bits get constant 'uc' placeholders here and are replaced below
+    new_state, chi_vars = _chi_gadget_layer(model, state, operation_name, and_gadget, folded)
+
+    for z, y, x in tabled:
+        inputs = [state[z][(y + k) % 3][x] for k in range(3)]
+        new_state[z][y][x], chi_vars[f"and_z{z}_y{y}_x{x}"], chi_vars[f"new_z{z}_y{y}_x{x}"] = table_MILP.add_chi_bit(
+            model, table, inputs, f"{operation_name}_new_z{z}_y{y}_x{x}", f"{operation_name}_and_z{z}_y{y}_x{x}")
 
     return new_state, chi_vars
 
 
-def create_first_chi_operation(model, state, operation_name="xoodyak_chi"):
+def create_chi_operation(model, state, operation_name="xoodyak_chi", live=None, encoding=None):
     """
-    MILP modeling for the first round Xoodyak chi function.
+    MILP modeling for Xoodyak chi function.
 
     Parameters:
     - model: Gurobi model object
     - state: 32x3x4 3D state array [z][y][x]
     - operation_name: Operation name for variable naming
+    - live: optional set of (z, y, x) new state bits to build (see cone_MILP); the other
+      bits and their AND terms become constant 'uc' bits
+    - encoding: 'gadget' or 'table', CHI_ENCODING by default
 
     Returns:
     - new_state: New state after chi operation
     - chi_vars: Variables related to chi operation
     """
-    # Initialize new state
-    new_state = [[[None for _ in range(4)] for _ in range(3)] for _ in range(32)]
-    # Initialize intermediate AND operation results
-    and_bits = [[[None for _ in range(4)] for _ in range(3)] for _ in range(32)]
-    chi_vars = {}
-
-    # Step 1: Calculate all AND terms state[z][(y+1)%3][x] AND state[z][(y+2)%3][x]
-    for z in range(32):
-        for y in range(3):
-            for x in range(4):
-                # Get input bit positions
-                y1 = (y + 1) % 3
-                y2 = (y + 2) % 3
-                bit1 = state[z][y1][x]
-                bit2 = state[z][y2][x]
+    if (encoding or CHI_ENCODING) == 'table':
+        new_state, chi_vars = _chi_table_layer(model, state, operation_name, and_operation_no_cond, live)
+    else:
+        new_state, chi_vars = _chi_gadget_layer(model, state, operation_name, and_operation_no_cond, live)
 
-                # Create AND operation bit
-                and_bit_name = f"{operation_name}_and_z{z}_y{y}_x{x}"
-                and_bit = Bit(model, and_bit_name, ('*', '*', '*', 0))
-
-                # Create AND operation
-                and_vars = and_operation(model, bit1, bit2, and_bit, operation_name=and_bit_name)
+    # Step 3: Add condition constant propagation constraints
+    _add_xoodyak_chi_condition_constraints(model, state, new_state, chi_vars, operation_name)
 
-                # Store intermediate results and variables
-                and_bits[z][y][x] = and_bit
-                chi_vars[f"and_z{z}_y{y}_x{x}"] = and_vars
+    return new_state, chi_vars
 
-    # Step 2: Calculate new state state'[z][y][x] = state[z][y][x] ⊕ (state[z][(y+1)%3][x] AND state[z][(y+2)%3][x])
-    for z in range(32):
-        for y in range(3):
-            for x in range(4):
-                # Get input bits
-                original_bit = state[z][y][x]
-                and_bit = and_bits[z][y][x]
 
-                # Create new state bit
-                new_bit_name = f"{operation_name}_new_z{z}_y{y}_x{x}"
-                new_bit = Bit(model, new_bit_name,('*','*','*',0))
+def create_first_chi_operation(model, state, operation_name="xoodyak_chi", live=None, encoding=None):
+    """
+    MILP modeling for the first round Xoodyak chi function.
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input_no_delta_b(model, [original_bit, and_bit], new_bit, operation_name=new_bit_name)
+    Parameters:
+    - model: Gurobi model object
+    - state: 32x3x4 3D state array [z][y][x]
+    - operation_name: Operation name for variable naming
+    - live: optional set of (z, y, x) new state bits to build (see cone_MILP); the other
+      bits and their AND terms become constant 'uc' bits
+    - encoding: 'gadget' or 'table', CHI_ENCODING by default
 
-                # Store new state and variables
-                new_state[z][y][x] = new_bit
-                chi_vars[f"new_z{z}_y{y}_x{x}"] = xor_vars
+    Returns:
+    - new_state: New state after chi operation
+    - chi_vars: Variables related to chi operation
+    """
+    if (encoding or CHI_ENCODING) == 'table':
+        new_state, chi_vars = _chi_table_layer(model, state, operation_name, and_operation, live)
+    else:
+        new_state, chi_vars = _chi_gadget_layer(model, state, operation_name, and_operation, live)
 
     # Step 3: Add condition constant propagation constraints
     _add_xoodyak_chi_condition_constraints(model, state, new_state, chi_vars, operation_name)
@@ -458,6 +480,9 @@ def rho_west(state):
         [0, -11],# y=2: (x_shift, z_shift)
     ]
 
+    if isinstance(state, BitState):
+        return permutation_view(state, 'rho_west', lambda z, y, x: ((z + shifts[y][1]) % 32, y, (x + shifts[y][0]) % 4))
+
     # Perform shift operation
     for x in range(4):
         for y in range(3):
@@ -487,6 +512,9 @@ def rho_east(state):
         [-2, -8], # y=2: (x_shift, z_shift)
     ]
 
+    if isinstance(state, BitState):
+        return permutation_view(state, 'rho_east', lambda z, y, x: ((z + shifts[y][1]) % 32, y, (x + shifts[y][0]) % 4))
+
     # Perform shift operation
     for x in range(4):
         for y in range(3):
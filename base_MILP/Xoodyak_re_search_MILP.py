@@ -1,6 +1,10 @@
 from new_code.base.simple_base import *
+from base_MILP import table_MILP
 from gurobipy import GRB
 
+# Encoding of the chi layers, see Xoodyak_MILP
+CHI_ENCODING = 'gadget'
+
 
 def create_theta_operation(model, state, operation_name="xoodyak_theta"):
     """
@@ -298,7 +302,7 @@ def _add_theta_condition_constraints(model, theta_vars, old_state, C, D, new_sta
                                 theta_vars[f"new_z{z}_y{y}_x{x}"]['new_cond'])
 
 
-def create_chi_operation(model, state, operation_name="xoodyak_chi"):
+def create_chi_operation(model, state, operation_name="xoodyak_chi", encoding=None):
     """
     MILP modeling for Xoodyak chi function
 
@@ -306,6 +310,7 @@ def create_chi_operation(model, state, operation_name="xoodyak_chi"):
     - model: Gurobi model object
     - state: 32x3x4 3D state array [z][y][x]
     - operation_name: Operation name for variable naming
+    - encoding: 'gadget' or 'table' (one table_MILP table per bit), CHI_ENCODING by default
 
     Returns:
     - new_state: New state after chi operation
@@ -319,6 +324,12 @@ def create_chi_operation(model, state, operation_name="xoodyak_chi"):
     and_bits = [[[None for _ in range(4)] for _ in range(3)] for _ in range(32)]
     chi_vars = {}
     linear_cancel = {}
+    table = None
+    if (encoding or CHI_ENCODING) == 'table':
+        table = table_MILP.chi_table(and_operation_no_cond, xor_with_ul_input_no_delta_b)
+
+    def tabled(*bits):
+        return table is not None and not table_MILP.is_constant(bits)
 
     # Step 1: Calculate all AND terms state[z][(y+1)%3][x] AND state[z][(y+2)%3][x]
     for z in range(32):
@@ -329,6 +340,9 @@ def create_chi_operation(model, state, operation_name="xoodyak_chi"):
                 y2 = (y + 2) % 3
                 bit1 = state[z][y1][x]
                 bit2 = state[z][y2][x]
+                if tabled(state[z][y][x], bit1, bit2):
+                    # AND and XOR of this bit are one table, built in step 2
+                    continue
 
                 # Create AND operation bit
                 and_bit_name = f"{operation_name}_and_z{z}_y{y}_x{x}"
@@ -355,10 +369,15 @@ def create_chi_operation(model, state, operation_name="xoodyak_chi"):
 
                 # Create new state bit
                 new_bit_name = f"{operation_name}_new_z{z}_y{y}_x{x}"
-                new_bit = Bit(model, new_bit_name, ('*', '*', '*', 0))
+                if and_bit is None:
+                    inputs = [state[z][(y + k) % 3][x] for k in range(3)]
+                    new_bit, chi_vars[f"and_z{z}_y{y}_x{x}"], xor_vars = table_MILP.add_chi_bit(
+                        model, table, inputs, new_bit_name, f"{operation_name}_and_z{z}_y{y}_x{x}")
+                else:
+                    new_bit = Bit(model, new_bit_name, ('*', '*', '*', 0))
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input_no_delta_b(model, [original_bit, and_bit], new_bit, operation_name=new_bit_name)
+                    # Create XOR operation
+                    xor_vars = xor_with_ul_input_no_delta_b(model, [original_bit, and_bit], new_bit, operation_name=new_bit_name)
 
                 # Add linear cancellation variable
                 if_linear_cancel_r = model.addVar(vtype=GRB.BINARY, name=f"if_linear_cancel_r_{operation_name}_new_z{z}_y{y}_x{x}")
@@ -387,7 +406,7 @@ def create_chi_operation(model, state, operation_name="xoodyak_chi"):
 
     return new_state, chi_vars, without_place, linear_cancel
 
-def create_first_chi_operation(model, state, operation_name="xoodyak_chi"):
+def create_first_chi_operation(model, state, operation_name="xoodyak_chi", encoding=None):
     """
     MILP modeling for Xoodyak chi function (first round, with condition constraints)
 
@@ -395,6 +414,7 @@ def create_first_chi_operation(model, state, operation_name="xoodyak_chi"):
     - model: Gurobi model object
     - state: 32x3x4 3D state array [z][y][x]
     - operation_name: Operation name for variable naming
+    - encoding: 'gadget' or 'table' (one table_MILP table per bit), CHI_ENCODING by default
 
     Returns:
     - new_state: New state after chi operation
@@ -408,6 +428,12 @@ def create_first_chi_operation(model, state, operation_name="xoodyak_chi"):
     and_bits = [[[None for _ in range(4)] for _ in range(3)] for _ in range(32)]
     chi_vars = {}
     linear_cancel = {}
+    table = None
+    if (encoding or CHI_ENCODING) == 'table':
+        table = table_MILP.chi_table(and_operation, xor_with_ul_input_no_delta_b)
+
+    def tabled(*bits):
+        return table is not None and not table_MILP.is_constant(bits)
 
     # Step 1: Calculate all AND terms state[z][(y+1)%3][x] AND state[z][(y+2)%3][x]
     for z in range(32):
@@ -418,6 +444,9 @@ def create_first_chi_operation(model, state, operation_name="xoodyak_chi"):
                 y2 = (y + 2) % 3
                 bit1 = state[z][y1][x]
                 bit2 = state[z][y2][x]
+                if tabled(state[z][y][x], bit1, bit2):
+                    # AND and XOR of this bit are one table, built in step 2
+                    continue
 
                 # Create AND operation bit
                 and_bit_name = f"{operation_name}_and_z{z}_y{y}_x{x}"
@@ -442,10 +471,15 @@ def create_first_chi_operation(model, state, operation_name="xoodyak_chi"):
 
                 # Create new state bit
                 new_bit_name = f"{operation_name}_new_z{z}_y{y}_x{x}"
-                new_bit = Bit(model, new_bit_name, ('*', '*', '*', 0))
+                if and_bit is None:
+                    inputs = [state[z][(y + k) % 3][x] for k in range(3)]
+                    new_bit, chi_vars[f"and_z{z}_y{y}_x{x}"], xor_vars = table_MILP.add_chi_bit(
+                        model, table, inputs, new_bit_name, f"{operation_name}_and_z{z}_y{y}_x{x}")
+                else:
+                    new_bit = Bit(model, new_bit_name, ('*', '*', '*', 0))
 
-                # Create XOR operation
-                xor_vars = xor_with_ul_input_no_delta_b(model, [original_bit, and_bit], new_bit, operation_name=new_bit_name)
+                    # Create XOR operation
+                    xor_vars = xor_with_ul_input_no_delta_b(model, [original_bit, and_bit], new_bit, operation_name=new_bit_name)
 
                 # Add linear cancellation variable
                 if_linear_cancel_r = model.addVar(vtype=GRB.BINARY, name=f"if_linear_cancel_r_{operation_name}_new_z{z}_y{y}_x{x}")
@@ -532,6 +566,9 @@ def rho_west(state):
         [0, -11], # y=2: (x_shift, z_shift)
     ]
 
+    if isinstance(state, BitState):
+        return permutation_view(state, 'rho_west', lambda z, y, x: ((z + shifts[y][1]) % 32, y, (x + shifts[y][0]) % 4))
+
     # Perform shift operation
     for x in range(4):
         for y in range(3):
@@ -561,6 +598,9 @@ def rho_east(state):
         [-2, -8], # y=2: (x_shift, z_shift)
     ]
 
+    if isinstance(state, BitState):
+        return permutation_view(state, 'rho_east', lambda z, y, x: ((z + shifts[y][1]) % 32, y, (x + shifts[y][0]) % 4))
+
     # Perform shift operation
     for x in range(4):
         for y in range(3):
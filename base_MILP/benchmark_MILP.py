@@ -0,0 +1,155 @@
+import time
+
+import gurobipy as gp
+from gurobipy import GRB
+
+from base_MILP import operation_MILP
+from base_MILP.operation_MILP import Bit
+
+# Encodings compared by default (operation_MILP.XOR_ENCODING values)
+XOR_ENCODINGS = ('gadget', 'continuous', 'aggregated', 'indicator', 'table')
+
+# Bit encodings compared by default (operation_MILP.BIT_ENCODING values)
+BIT_ENCODINGS = ('flags', 'onehot', 'sos1')
+
+# Time limit in seconds of every benchmark solve
+BENCHMARK_TIME_LIMIT = 60
+
+
+def keccak_network(lanes=2, rounds=2):
+    """
+    Builder of a small Keccak-f[25 * lanes] network for benchmark_encodings: linear red/blue
+    initial bits, then theta, rho, pi and chi per round; the objective maximises the coloured
+    bits of the last state minus the red and blue cancellations.
+
+    Parameters:
+    - lanes: lane width w
+    - rounds: number of rounds
+
+    Returns:
+    - function(model) building the network
+    """
+    from base_MILP import Keccak_MILP
+
+    def build(model):
+        state = [[[Bit(model, f"A_z{z}_y{y}_x{x}", (0, '*', '*', 0)) for x in range(5)] for y in range(5)]
+                 for z in range(lanes)]
+        cancellations = []
+        for round_num in range(rounds):
+            state, _, _, theta_vars = Keccak_MILP.create_theta_operation(model, state, f"theta{round_num}")
+            state, chi_vars = Keccak_MILP.create_chi_operation(model, Keccak_MILP.pi(Keccak_MILP.rho(state)), f"chi{round_num}")
+            for xor_vars in list(theta_vars.values()) + list(chi_vars.values()):
+                cancellations += [xor_vars.get('delta_r', 0), xor_vars.get('delta_b', 0)]
+        coloured = gp.quicksum(state[z][y][x].r + state[z][y][x].b
+                               for z in range(lanes) for y in range(5) for x in range(5))
+        model.setObjective(coloured - gp.quicksum(cancellations), GRB.MAXIMIZE)
+    return build
+
+
+def ascon_network(rounds=2):
+    """
+    Builder of an Ascon network for benchmark_encodings: linear red/blue initial bits, then P_S
+    and P_L per round; the objective is the one of keccak_network.
+
+    Parameters:
+    - rounds: number of rounds
+
+    Returns:
+    - function(model) building the network
+    """
+    from base_MILP import Ascon_MILP
+
+    def build(model):
+        columns = Ascon_MILP.slice_number
+        state = [[Bit(model, f"A_z{z}_x{x}", (0, '*', '*', 0)) for x in range(5)] for z in range(columns)]
+        cancellations = []
+        for round_num in range(rounds):
+            _, _, state, P_S_vars = Ascon_MILP.create_P_S_operation(model, state, f"P_S{round_num}")
+            state, P_L_vars = Ascon_MILP.create_P_L_operation(model, state, f"P_L{round_num}")
+            for xor_vars in list(P_S_vars.values()) + list(P_L_vars.values()):
+                cancellations += [xor_vars.get('delta_r', 0), xor_vars.get('delta_b', 0)]
+        coloured = gp.quicksum(state[z][x].r + state[z][x].b for z in range(columns) for x in range(5))
+        model.setObjective(coloured - gp.quicksum(cancellations), GRB.MAXIMIZE)
+    return build
+
+
+def benchmark_encodings(build, encodings=XOR_ENCODINGS, time_limit=BENCHMARK_TIME_LIMIT,
+                        module=operation_MILP, flag='XOR_ENCODING', env=None):
+    """
+    Build and solve the same model once per encoding and compare build time, size and solve time.
+    The encoding is set through a module-level flag, operation_MILP.XOR_ENCODING by default
+    (operation_MILP.BIT_ENCODING, Keccak_MILP.CHI_ENCODING, Ascon_MILP.P_S_ENCODING, ... work
+    the same way); it is restored afterwards.
+
+    Parameters:
+    - build: function(model) building the model and setting its objective, e.g. keccak_network()
+    - encodings: values of the flag to compare
+    - time_limit: TimeLimit of every solve
+    - module: module holding the flag
+    - flag: name of the flag
+    - env: optional Gurobi environment
+
+    Returns:
+    - list with one dict per encoding: encoding, build_time, vars, binaries, constrs, genconstrs,
+      sos, status, objective, bound, solve_time
+    """
+    previous = getattr(module, flag)
+    report = []
+    try:
+        for encoding in encodings:
+            setattr(module, flag, encoding)
+            model = gp.Model(f"benchmark_{encoding}", env)
+            start = time.time()
+            build(model)
+            model.update()
+            row = {'encoding': encoding, 'build_time': time.time() - start, 'vars': model.NumVars,
+                   'binaries': model.NumBinVars, 'constrs': model.NumConstrs, 'genconstrs': model.NumGenConstrs,
+                   'sos': model.NumSOS, 'status': None, 'objective': None, 'bound': None, 'solve_time': None}
+            model.setParam('TimeLimit', time_limit)
+            try:
+                model.optimize()
+            except gp.GurobiError as e:
+                # e.g. a size-limited license: the build figures are still reported
+                print(f"{encoding}: {e}")
+            else:
+                row['status'] = model.Status
+                row['solve_time'] = model.Runtime
+                if model.SolCount > 0:
+                    row['objective'] = model.ObjVal
+                    row['bound'] = model.ObjBound
+            report.append(row)
+            model.dispose()
+    finally:
+        setattr(module, flag, previous)
+
+    print(benchmark_table(report))
+    return report
+
+
+def benchmark_table(report):
+    """
+    Text table of a benchmark_encodings report.
+
+    Parameters:
+    - report: list returned by benchmark_encodings
+
+    Returns:
+    - table string
+    """
+    def cell(value):
+        return f"{value:>12.4f}" if isinstance(value, (int, float)) else f"{'-':>12}"
+
+    lines = [f"{'encoding':>12}{'build':>12}{'vars':>10}{'binaries':>10}{'constrs':>10}{'general':>10}{'sos':>8}"
+             f"{'status':>8}{'objective':>12}{'bound':>12}{'solve':>12}"]
+    for row in report:
+        lines.append(f"{row['encoding']:>12}" + cell(row['build_time']) +
+                     f"{row['vars']:>10}{row['binaries']:>10}{row['constrs']:>10}{row['genconstrs']:>10}{row['sos']:>8}" +
+                     f"{row['status'] if row['status'] is not None else '-':>8}" +
+                     cell(row['objective']) + cell(row['bound']) + cell(row['solve_time']))
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    benchmark_encodings(keccak_network())
+    benchmark_encodings(keccak_network(), BIT_ENCODINGS, flag='BIT_ENCODING')
+    benchmark_encodings(ascon_network(), BIT_ENCODINGS, flag='BIT_ENCODING')
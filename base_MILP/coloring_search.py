@@ -0,0 +1,437 @@
+import math
+import time
+
+import gurobipy as gp
+from gurobipy import GRB
+
+from base_MILP import propagation
+from base_MILP.operation_MILP import Bit
+from base_MILP.warm_start import set_start, state_values
+
+# Iterations of the local search, one batch of neighbours each
+SEARCH_ITERATIONS = 300
+
+# Neighbours evaluated per iteration, shared by the four chains (one propagation.evaluate batch)
+SEARCH_NEIGHBOURS = 64
+
+# Annealing temperature of the first iteration, in objective units; it is multiplied by
+# SEARCH_COOLING after every iteration
+SEARCH_TEMPERATURE = 1.0
+SEARCH_COOLING = 0.98
+
+# Iterations during which a colour group or cancellation site that was just changed may
+# not change again, unless the move beats the best candidate found so far
+TABU_TENURE = 8
+
+# Share of the moves that flip a cancellation (or CT) choice instead of a colour
+DECISION_MOVES = 0.25
+
+# Number of best distinct colourings handed to Gurobi as MIP starts
+SEARCH_STARTS = 3
+
+# Weight of the share of usable (linear or coloured) bits of the last state, which breaks the
+# ties of the min() objectives of the search scripts (it never outweighs a 0.01 score step)
+SEARCH_TIE_BREAK = 1e-3
+
+# Seed of the local search
+SEARCH_SEED = 0
+
+# MIPFocus set by prepass once the starts are in place (None keeps the script's setting):
+# with a good incumbent at time zero the solve can concentrate on the bound
+PREPASS_MIP_FOCUS = 2
+
+# Decision results searched over (see propagation.evaluate)
+DECISION_KEYS = ('delta_r', 'delta_b', 'CT')
+
+
+def _leaves(state, index=()):
+    """(index, Bit) of every bit of a nested state."""
+    if hasattr(state, 'ul') and hasattr(state, 'cond'):
+        yield index, state
+        return
+    for i in range(len(state)):
+        yield from _leaves(state[i], index + (i,))
+
+
+def _fixed(flag):
+    """Value of a constant flag or of a variable fixed by its bounds, None for a free variable (0 for an expression)."""
+    if isinstance(flag, gp.Var):
+        return int(flag.LB) if flag.LB == flag.UB else None
+    if isinstance(flag, gp.LinExpr):
+        return 0
+    return int(flag)
+
+
+def colour_domain(state):
+    """
+    Colours a local search may give to the bits of a state of a built model.
+    Constant flags and variables fixed by their bounds (e.g. by scheme_sweep.apply_scheme) make up
+    the base codes; free r/b variables are searched. Bits sharing their r/b variables
+    (scheme_sweep.add_colour) form one colour group and change together. A bit is never made
+    both red and blue; free ul and cond flags stay 0.
+
+    Parameters:
+    - state: nested lists of Bits (e.g. handles['initial_state']) of an updated model
+
+    Returns:
+    - dict with 'base' (uint8 codes of the fixed flags), 'choices' (list per group of the
+      allowed (r, b) values) and 'positions' (list per group of the flat bit indices)
+    """
+    import numpy as np
+    leaves = list(_leaves(state))
+    shape = tuple(max(index[k] for index, _ in leaves) + 1 for k in range(len(leaves[0][0])))
+    base = np.zeros(shape, dtype=np.uint8)
+    groups = dict()
+    for index, bit in leaves:
+        values = {flag: _fixed(getattr(bit, flag)) for flag in ('ul', 'r', 'b', 'cond')}
+        base[index] = (values['ul'] or 0) * propagation.UL | (values['r'] or 0) * propagation.R | \
+            (values['b'] or 0) * propagation.B | (values['cond'] or 0) * propagation.COND
+        if values['r'] is not None and values['b'] is not None:
+            continue
+        # Group key: the free variables (by index) and the fixed values of the two colour flags
+        key = tuple(('var', flag.index) if values[name] is None else ('fixed', values[name])
+                    for name, flag in (('r', bit.r), ('b', bit.b)))
+        groups.setdefault(key, []).append(np.ravel_multi_index(index, shape))
+
+    choices, positions = [], []
+    for key, flat in groups.items():
+        options = [(r, b) for r in ((0, 1) if key[0][0] == 'var' else (key[0][1],))
+                   for b in ((0, 1) if key[1][0] == 'var' else (key[1][1],)) if not (r and b)]
+        choices.append(options)
+        positions.append(np.array(flat))
+    return {'base': base, 'choices': choices, 'positions': positions}
+
+
+def _colour_codes(domain, colours):
+    """Initial codes of a batch of group colours [n][group][2] (r, b)."""
+    import numpy as np
+    n = len(colours)
+    codes = np.repeat(domain['base'][None], n, 0).reshape(n, -1)
+    for g, flat in enumerate(domain['positions']):
+        codes[:, flat] |= (colours[:, g, 0] * propagation.R | colours[:, g, 1] * propagation.B)[:, None].astype(np.uint8)
+    return codes.reshape((n,) + domain['base'].shape)
+
+
+def _decisions(sites, values):
+    """evaluate decisions from a batch of decision arrays {(round, layer, step, key): [n]...}."""
+    decisions = dict()
+    for (round_num, layer, step, key), value in zip(sites, values):
+        decisions.setdefault((round_num, layer, step), {})[key] = value
+    return decisions
+
+
+def decision_sites(domain, plan, transform=None):
+    """
+    Cancellation and CT choices worth searching over: evaluate the colourings with every free
+    group red, blue, and red and blue in turn, with every choice taken, and keep the results
+    that were taken somewhere.
+
+    Returns:
+    - list of ((round, layer, step, key), bool array of the positions where the choice was taken)
+    """
+    import numpy as np
+    probes = []
+    for colours in (((1, 0),), ((0, 1),), ((1, 0), (0, 1))):
+        probes.append([colours[g % len(colours)] if colours[g % len(colours)] in options else options[-1]
+                       for g, options in enumerate(domain['choices'])])
+    codes = _colour_codes(domain, np.array(probes, dtype=np.uint8).reshape(3, -1, 2))
+    if transform is not None:
+        codes = transform(codes)
+    probe = propagation.evaluate(codes, plan)
+    everything = {key: {name: 1 for name in DECISION_KEYS if name in results} for key, results in probe['results'].items()}
+    trace = propagation.evaluate(codes, plan, everything)
+    sites = []
+    for step_key, results in trace['results'].items():
+        for name in DECISION_KEYS:
+            if name in results and results[name].any():
+                sites.append((step_key + (name,), results[name].any(0)))
+    return sites
+
+
+def search(domain, plan, score, transform=None, iterations=SEARCH_ITERATIONS, neighbours=SEARCH_NEIGHBOURS,
+           temperature=SEARCH_TEMPERATURE, cooling=SEARCH_COOLING, tenure=TABU_TENURE,
+           decision_moves=DECISION_MOVES, starts=SEARCH_STARTS, tie_break=SEARCH_TIE_BREAK, seed=SEARCH_SEED):
+    """
+    Simulated annealing with a tabu list over the colours of a domain and the cancellation choices.
+    Four chains start from a random (if feasible) or the least coloured colouring, without
+    cancellation or with every cancellation (never with CT). Every iteration evaluates one batch
+    holding neighbours of the current candidate of every chain, each changing the colour of one
+    group or flipping a run of 1, 2, 4, ... neighbouring positions of one step, and every chain
+    moves to its best neighbour that is not tabu (or beats the best candidate): always if it does
+    not lose, with probability exp(loss / T) otherwise. The chains compare scores plus tie_break times the share of usable
+    bits of the last state; the choices of a candidate are the ones the gadgets actually took.
+
+    Parameters:
+    - domain: dict from colour_domain
+    - plan: propagation plan of the model (e.g. propagation.keccak_plan(...))
+    - score: function(trace) -> float array [n], the objective of the model for evaluated
+      candidates (trace['colouring'] holds the searched codes, trace['initial'] the transformed
+      ones); candidates the plan rejects score -inf
+    - transform: optional function(codes) -> codes from the colouring to the state the plan
+      starts from (e.g. slice_map_transform for the first Ascon S-box)
+    - iterations, neighbours, temperature, cooling, tenure, decision_moves, tie_break: see the module flags
+    - starts: number of best distinct colourings returned
+    - seed: random seed
+
+    Returns:
+    - list of the best candidates, best first: dicts with 'score', 'colours' ([group][2]),
+      'codes' (initial codes), 'decisions' (dict for propagation.evaluate) and 'trace' (their
+      evaluation, candidates on axis 0 in the same order)
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    choices = domain['choices']
+    groups = len(choices)
+    sites = decision_sites(domain, plan, transform)
+    site_positions = [np.flatnonzero(mask) for _, mask in sites]
+    site_keys = [key for key, _ in sites]
+    site_count = sum(len(p) for p in site_positions)
+
+    def evaluate(colours, values):
+        codes = _colour_codes(domain, colours)
+        trace = propagation.evaluate(codes if transform is None else transform(codes), plan,
+                                     _decisions(site_keys, values))
+        trace['colouring'] = codes
+        scores = np.asarray(score(trace), dtype=float)
+        scores[~trace['feasible']] = -np.inf
+        return codes, trace, scores
+
+    def guided(trace, scores):
+        final = trace['final'].reshape(len(scores), -1)
+        usable = ((final & propagation.UL) == 0) | ((final & (propagation.R | propagation.B)) != 0)
+        return scores + tie_break * usable.mean(1)
+
+    def taken(trace):
+        return [trace['results'][key[:3]][key[3]] for key in site_keys]
+
+    # One chain from each start: a random colouring of every group that can be coloured and the
+    # least coloured one, without any choice taken or with every cancellation taken; a random
+    # start that a layer rejects is replaced by the least coloured one
+    coloured = [[c for c in options if sum(c)] or options for options in choices]
+    current = np.array([[options[rng.integers(len(options))] for options in coloured],
+                        [min(options, key=sum) for options in choices]] * 2, dtype=np.uint8).reshape(4, groups, 2)
+    values = [np.stack([np.zeros_like(mask)] * 2 + [mask & (key[3] != 'CT')] * 2) for key, mask in sites]
+    chains = len(current)
+    per_chain = max(1, neighbours // chains)
+    _, trace, current_score = evaluate(current, values)
+    for c in (0, 2):
+        if not np.isfinite(current_score[c]):
+            current[c] = current[c + 1]
+    _, trace, current_score = evaluate(current, values)
+    current_score = guided(trace, current_score)
+    values = taken(trace)
+    elite = dict()
+    tabu = [dict() for _ in range(chains)]
+
+    def keep(colours, values, candidate_score):
+        key = colours.tobytes()
+        if np.isfinite(candidate_score) and (key not in elite or elite[key][0] < candidate_score):
+            elite[key] = (candidate_score, colours.copy(), [v.copy() for v in values])
+            if len(elite) > starts:
+                del elite[min(elite, key=lambda e: elite[e][0])]
+
+    for c in range(chains):
+        keep(current[c], [v[c] for v in values], current_score[c])
+    best_score = current_score.max()
+    start = time.time()
+
+    for iteration in range(iterations):
+        colours = np.repeat(current, per_chain, 0)
+        batch = [np.repeat(v, per_chain, 0) for v in values]
+        moves = []
+        for k in range(chains * per_chain):
+            if site_count and (not groups or rng.random() < decision_moves):
+                # Flip a run of 1, 2, 4, ... neighbouring positions of a site to the opposite of its first one
+                s = rng.integers(len(sites))
+                positions = site_positions[s]
+                length = min(len(positions), 2 ** rng.integers(int(np.log2(len(positions))) + 1))
+                first = rng.integers(len(positions) - length + 1)
+                flat = batch[s][k].reshape(-1)
+                flat[positions[first:first + length]] = not flat[positions[first]]
+                moves.append(('site', s, first))
+            elif groups:
+                g = rng.integers(groups)
+                options = [o for o in choices[g] if o != tuple(colours[k, g])]
+                if options:
+                    colours[k, g] = options[rng.integers(len(options))]
+                moves.append(('group', g))
+            else:
+                moves.append(None)
+        _, trace, scores = evaluate(colours, batch)
+        scores = guided(trace, scores)
+        results = taken(trace)
+
+        for c in range(chains):
+            rows = range(c * per_chain, (c + 1) * per_chain)
+            allowed = [k for k in rows if tabu[c].get(moves[k], -1) < iteration or scores[k] > best_score]
+            if not allowed:
+                continue
+            k = max(allowed, key=lambda k: scores[k])
+            loss = scores[k] - current_score[c] if np.isfinite(current_score[c]) else np.inf
+            if loss >= 0 or (np.isfinite(scores[k]) and rng.random() < math.exp(loss / max(temperature, 1e-9))):
+                current[c], current_score[c] = colours[k], scores[k]
+                for v, result in zip(values, results):
+                    v[c] = result[k]
+                tabu[c][moves[k]] = iteration + tenure
+                keep(current[c], [v[c] for v in values], current_score[c])
+                best_score = max(best_score, current_score[c])
+        temperature *= cooling
+
+    if not elite:
+        print(f"Colouring search: no feasible candidate after {iterations} iterations")
+        return []
+    ranked = sorted(elite.values(), key=lambda e: -e[0])
+    colours = np.array([e[1] for e in ranked])
+    values = [np.array([e[2][s] for e in ranked]) for s in range(len(sites))]
+    codes, trace, scores = evaluate(colours, values)
+    print(f"Colouring search: best score {scores[0]} after {iterations} iterations of {neighbours} "
+          f"neighbours ({time.time() - start:.1f} s)")
+    decisions = _decisions(site_keys, values)
+    return [{'score': scores[k], 'colours': colours[k], 'codes': codes[k],
+             'decisions': {step: {name: v[k] for name, v in d.items()} for step, d in decisions.items()},
+             'trace': trace} for k in range(len(ranked))]
+
+
+def set_starts(model, candidates, state, states=()):
+    """
+    Hand candidates of search to Gurobi as MIP starts (one start per candidate, NumStart).
+
+    Parameters:
+    - model: Gurobi model object
+    - candidates: list returned by search
+    - state: model state of the searched colouring (e.g. handles['initial_state'])
+    - states: optional (model state, key) pairs started from the evaluated states too, key being
+      'initial' (the state the plan starts from) or (round_num, layer name), e.g.
+      (handles['intermediate_states'][0]['rho_east'], (0, 'chi')); fuller starts are easier for
+      Gurobi to complete
+
+    Returns:
+    - number of variables set
+    """
+    model.NumStart = len(candidates)
+    count = 0
+    for number, candidate in enumerate(candidates):
+        model.setParam('StartNumber', number)
+        count += set_start(state, propagation.decode(candidate['codes']))
+        trace = candidate['trace']
+        for model_state, key in states:
+            codes = trace['initial'] if key == 'initial' else trace['states'][key[0]][key[1]]
+            count += set_start(model_state, propagation.decode(codes[number]))
+    model.setParam('StartNumber', 0)
+    return count
+
+
+def prepass(model, state, plan, score, states=(), transform=None, **options):
+    """
+    Local search pre-pass of a search script: search colourings of the free bits of a state
+    with the propagation evaluator and start the model from the best ones.
+
+    Parameters:
+    - model: Gurobi model object, with the per-job bounds (scheme, keys) applied
+    - state: state of the model whose colouring is searched, usually the initial state
+    - plan: propagation plan of the model
+    - score: function(trace) -> float array, see search
+    - states: other states to start, see set_starts
+    - transform: see search
+    - options: search options (iterations, neighbours, ...)
+
+    Returns:
+    - list of candidates, see search
+    """
+    model.update()
+    domain = colour_domain(state)
+    candidates = search(domain, plan, score, transform, **options)
+    if not candidates:
+        # Drop the starts of an earlier job on a reused model
+        model.NumStart = 0
+        return candidates
+    set_starts(model, candidates, state, states)
+    if PREPASS_MIP_FOCUS is not None:
+        model.setParam('MIPFocus', PREPASS_MIP_FOCUS)
+    return candidates
+
+
+def split_degree(red, blue, full, partial, gain=0.58, cost=0.42, offset=0):
+    """
+    temp_degree of the search scripts with optional partial equations:
+    min(red - cut + offset, blue - cut + offset, equations), where every partial equation taken
+    adds gain to the equations and cost to the cut; the best number of them is taken.
+
+    Parameters:
+    - red, blue: degrees of freedom per candidate (propagation.degrees_of_freedom)
+    - full: equations counted with weight 1 per candidate
+    - partial: partial equations available per candidate
+    - gain, cost: weight and cut of a partial equation
+    - offset: constant added to both degrees of freedom
+
+    Returns:
+    - float array [n]
+    """
+    import numpy as np
+    dof = np.minimum(red, blue) + offset
+    best = np.minimum(dof, full).astype(float)
+    # min(dof - cost k, full + gain k) is largest where the two meet
+    meet = (dof - full) / (gain + cost)
+    for k in (np.floor(meet), np.ceil(meet), partial):
+        k = np.clip(k, 0, partial)
+        best = np.maximum(best, np.minimum(dof - cost * k, full + gain * k))
+    return best
+
+
+def slice_map(builder, slice_number, rate_x=0, colours=('c', 'lr', 'lb')):
+    """
+    Colour map of a first-round Ascon S-box model (Ascon_MILP.create_first_P_S_operation_first_one*),
+    whose clauses relate each rate bit to its slice without a propagation rule: for every colour,
+    the builder is solved on a state whose rate bits all have it (cond 0 everywhere) for the most
+    coloured output, and the output of every slice is read.
+
+    Parameters:
+    - builder: function(model, state) returning (new_state, P_S_vars)
+    - slice_number: number of slices
+    - rate_x: column of the rate bits
+    - colours: colours of the rate bit
+
+    Returns:
+    - dict from the type code of a rate bit to uint8 codes [z][x] of the output
+    """
+    mapping = dict()
+    for colour in colours:
+        model = gp.Model()
+        model.Params.OutputFlag = 0
+        state = [[Bit(model, f"s_z{z}_x{x}", colour if x == rate_x else 'c') for x in range(5)]
+                 for z in range(slice_number)]
+        new_state, _ = builder(model, state)
+        flags = [(bit.r, bit.b, bit.cond) for _, bit in _leaves(new_state)]
+        for _, _, cond in flags:
+            if isinstance(cond, gp.Var):
+                cond.UB = 0
+        model.setObjective(gp.quicksum(r + b for r, b, _ in flags), GRB.MAXIMIZE)
+        model.optimize()
+        if model.SolCount > 0:
+            mapping[propagation.TYPE_CODES[colour]] = propagation.encode(state_values(new_state))
+        model.dispose()
+    return mapping
+
+
+def slice_map_transform(mapping, rate_x=0):
+    """
+    transform of search replacing the first Ascon S-box by a slice_map: every slice takes the
+    output of its rate bit colour (a colour missing from the map gives an all-zero slice).
+
+    Returns:
+    - function(codes [n][z][x]) -> codes [n][z][x]
+    """
+    import numpy as np
+    colours = sorted(mapping)
+    table = np.stack([mapping[c] for c in colours])
+    lookup = np.zeros(256, dtype=np.int64)
+    known = np.zeros(256, dtype=bool)
+    for i, c in enumerate(colours):
+        lookup[c], known[c] = i, True
+
+    def transform(codes):
+        rate = codes[:, :, rate_x] & (propagation.UL | propagation.R | propagation.B)
+        z = np.arange(codes.shape[1])
+        output = table[lookup[rate], z[None, :]]
+        return np.where(known[rate][:, :, None], output, np.uint8(0))
+    return transform
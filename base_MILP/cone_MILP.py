@@ -0,0 +1,211 @@
+import itertools
+
+from base_MILP import Keccak_MILP, Xoodyak_MILP, Ascon_MILP
+
+# Build only the bits in both cones; when disabled every live set is None and the builders build every bit
+CONE_PRUNING = True
+
+
+def _positions(shape):
+    """All index tuples of a state of the given shape, in row-major order."""
+    return list(itertools.product(*(range(n) for n in shape)))
+
+
+def _lookup(state, position):
+    """state[i][j]... for position (i, j, ...)."""
+    for i in position:
+        state = state[i]
+    return state
+
+
+def _index_state(shape):
+    """Nested lists of the given shape holding their own index tuples."""
+    def build(prefix, rest):
+        if not rest:
+            return prefix
+        return [build(prefix + (i,), rest[1:]) for i in range(rest[0])]
+    return build((), tuple(shape))
+
+
+def active_bits(state, shape):
+    """
+    Positions of the bits that are not the constant 'uc', i.e. that have a red, blue,
+    nonlinear or condition flag set or left to the solver.
+
+    Parameters:
+    - state: initial state (nested lists of Bits, or BitState)
+    - shape: state dimensions, e.g. (64, 5, 5)
+
+    Returns:
+    - set of index tuples
+    """
+    active = set()
+    for position in _positions(shape):
+        bit = _lookup(state, position)
+        if any(type(f) != int or f != 0 for f in (bit.ul, bit.r, bit.b, bit.cond)):
+            active.add(position)
+    return active
+
+
+def permutation_inputs(permutation, shape):
+    """
+    Input map of a bit permutation layer (rho, pi, rho_west, ...).
+    The layer is applied to a state holding its own index tuples, so the map always
+    follows the model's permutation functions.
+
+    Returns:
+    - function mapping an output position to the tuple of its input position
+    """
+    moved = permutation(_index_state(shape))
+    return lambda position: (_lookup(moved, position),)
+
+
+def live_bits(steps, seeds, sinks=None):
+    """
+    Intersect the forward cone of the active input bits with the backward cone of
+    the output bits read by the attack, layer by layer.
+
+    Parameters:
+    - steps: list of (positions, inputs) in evaluation order; inputs(position) gives the
+      positions of the previous layer (or of the initial state) the bit depends on
+    - seeds: active positions of the initial state
+    - sinks: positions of the last layer read by the attack, None for all of them
+
+    Returns:
+    - list with the set of live positions of every layer (None for every layer if CONE_PRUNING is off)
+    """
+    if not CONE_PRUNING:
+        return [None] * len(steps)
+
+    # Forward cone: bits with at least one active input
+    forward = []
+    current = set(seeds)
+    for positions, inputs in steps:
+        current = {p for p in positions if any(q in current for q in inputs(p))}
+        forward.append(current)
+
+    # Backward cone: bits that some sink depends on
+    backward = [None] * len(steps)
+    current = set(steps[-1][0]) if sinks is None else set(sinks)
+    for k in range(len(steps) - 1, -1, -1):
+        backward[k] = current
+        inputs = steps[k][1]
+        current = {q for p in current for q in inputs(p)}
+
+    return [f & b for f, b in zip(forward, backward)]
+
+
+def _by_round(live, names):
+    """Split the per-layer live sets into one dict per round."""
+    return [dict(zip(names, live[k:k + len(names)])) for k in range(0, len(live), len(names))]
+
+
+def keccak_live_bits(initial_state, num_rounds, sinks=None):
+    """
+    Live bits of a Keccak-f model, round order theta, rho, pi, chi.
+
+    Parameters:
+    - initial_state: wx5x5 initial state [z][y][x] (lane width w = len(initial_state))
+    - num_rounds: number of modeled rounds
+    - sinks: set of (z, y, x) final state bits read by the attack, None for all of them
+
+    Returns:
+    - list with one dict per round: {'theta': set of (z, y, x), 'chi': set of (z, y, x)}
+      to pass as live to the theta and chi builders
+    """
+    lanes = len(initial_state)
+    shape = (lanes, 5, 5)
+    positions = _positions(shape)
+
+    def theta_inputs(position):
+        z, y, x = position
+        return ([(z, i, x) for i in range(5)] + [(z, i, (x - 1) % 5) for i in range(5)] +
+                [((z - 1) % lanes, i, (x + 1) % 5) for i in range(5)])
+
+    def chi_inputs(position):
+        z, y, x = position
+        return [(z, y, x), (z, y, (x + 1) % 5), (z, y, (x + 2) % 5)]
+
+    round_steps = [
+        (positions, theta_inputs),
+        (positions, permutation_inputs(Keccak_MILP.rho, shape)),
+        (positions, permutation_inputs(Keccak_MILP.pi, shape)),
+        (positions, chi_inputs),
+    ]
+    live = live_bits(round_steps * num_rounds, active_bits(initial_state, shape), sinks)
+    return _by_round(live, ['theta', 'rho', 'pi', 'chi'])
+
+
+def xoodyak_live_bits(initial_state, num_rounds, sinks=None):
+    """
+    Live bits of a Xoodoo model, round order theta, rho_west, chi, rho_east.
+
+    Parameters:
+    - initial_state: 32x3x4 initial state [z][y][x]
+    - num_rounds: number of modeled rounds
+    - sinks: set of (z, y, x) final state bits read by the attack, None for all of them
+
+    Returns:
+    - list with one dict per round: {'theta': set of (z, y, x), 'chi': set of (z, y, x)}
+      to pass as live to the theta and chi builders
+    """
+    shape = (32, 3, 4)
+    positions = _positions(shape)
+
+    def theta_inputs(position):
+        z, y, x = position
+        return ([(z, i, x) for i in range(3)] + [((z - 5) % 32, i, (x - 1) % 4) for i in range(3)] +
+                [((z - 14) % 32, i, (x - 1) % 4) for i in range(3)])
+
+    def chi_inputs(position):
+        z, y, x = position
+        return [(z, y, x), (z, (y + 1) % 3, x), (z, (y + 2) % 3, x)]
+
+    round_steps = [
+        (positions, theta_inputs),
+        (positions, permutation_inputs(Xoodyak_MILP.rho_west, shape)),
+        (positions, chi_inputs),
+        (positions, permutation_inputs(Xoodyak_MILP.rho_east, shape)),
+    ]
+    live = live_bits(round_steps * num_rounds, active_bits(initial_state, shape), sinks)
+    return _by_round(live, ['theta', 'rho_west', 'chi', 'rho_east'])
+
+
+def ascon_live_bits(initial_state, num_rounds, sinks=None):
+    """
+    Live bits of an Ascon model, round order P_S, P_L.
+
+    Parameters:
+    - initial_state: slice_number x 5 initial state [z][x]
+    - num_rounds: number of modeled rounds
+    - sinks: set of (z, x) final state bits read by the attack, None for all of them
+
+    Returns:
+    - list with one dict per round: {'P_S': set of (z, x), 'P_L': set of (z, x)}
+      to pass as live to the P_S and P_L builders
+    """
+    n = Ascon_MILP.slice_number
+    shape = (n, 5)
+    positions = _positions(shape)
+
+    # Inputs of the XOR layers before and after the chi-like core of P_S
+    temp_1_inputs = {0: (0, 4), 2: (1, 2), 4: (3, 4)}
+    new_inputs = {0: (0, 4), 1: (1, 0), 3: (2, 3)}
+
+    def P_S_inputs(position):
+        z, x = position
+        temp_2 = new_inputs.get(x, (x,))
+        temp_1 = {(t + k) % 5 for t in temp_2 for k in range(3)}
+        return [(z, i) for t in temp_1 for i in temp_1_inputs.get(t, (t,))]
+
+    def P_L_inputs(position):
+        z, x = position
+        offsets = Ascon_MILP.P_L_offsets[x]
+        return [(z, x), ((z + offsets[0]) % n, x), ((z + offsets[1]) % n, x)]
+
+    round_steps = [
+        (positions, P_S_inputs),
+        (positions, P_L_inputs),
+    ]
+    live = live_bits(round_steps * num_rounds, active_bits(initial_state, shape), sinks)
+    return _by_round(live, ['P_S', 'P_L'])
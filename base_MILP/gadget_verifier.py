@@ -0,0 +1,217 @@
+import itertools
+import time
+
+import gurobipy as gp
+from gurobipy import GRB
+
+from base_MILP import operation_MILP
+from base_MILP.operation_MILP import (BIT_TYPE_FLAGS, LEGAL_BIT_TYPES, Bit, and_operation, and_operation_no_cond,
+                                      xor_with_ul_input, xor_with_ul_input_no_delta_b, xor_without_ul_input)
+
+# Gadgets and input counts checked by default
+GADGET_ARITIES = (
+    (xor_with_ul_input, (1, 2, 3)),
+    (xor_without_ul_input, (1, 2, 3)),
+    (xor_with_ul_input_no_delta_b, (1, 2, 3)),
+    (and_operation, (2,)),
+    (and_operation_no_cond, (2,)),
+)
+
+# Formulations compared by default: operation_MILP flag settings, the first one is the reference
+FORMULATIONS = {
+    'gadget': {},
+    'continuous': {'XOR_ENCODING': 'continuous'},
+    'aggregated': {'XOR_ENCODING': 'aggregated'},
+    'indicator': {'XOR_ENCODING': 'indicator'},
+    'table': {'XOR_ENCODING': 'table'},
+    'onehot': {'BIT_ENCODING': 'onehot'},
+    'sos1': {'BIT_ENCODING': 'sos1'},
+}
+
+# Output bit patterns checked by default (as in Bit, '' for four free flags)
+OUTPUT_PATTERNS = ('', ('*', '*', '*', 0))
+
+_FLAGS = ('ul', 'r', 'b', 'cond')
+
+
+def _set_flags(flags):
+    """Set operation_MILP flags and return their previous values."""
+    previous = {name: getattr(operation_MILP, name) for name in flags}
+    for name, value in flags.items():
+        setattr(operation_MILP, name, value)
+    return previous
+
+
+def _solutions(model, columns):
+    """All feasible values of the columns (variables or integer constants), by the solution pool."""
+    model.optimize()
+    points = set()
+    for k in range(model.SolCount):
+        model.Params.SolutionNumber = k
+        points.add(tuple(c if type(c) == int else int(round(c.Xn)) for c in columns))
+    return points
+
+
+def _pool_model(model):
+    """Set the parameters enumerating every solution of a tiny model."""
+    model.Params.OutputFlag = 0
+    model.Params.Threads = 1
+    model.Params.PoolSearchMode = 2
+    model.Params.PoolSolutions = GRB.MAXINT
+
+
+def _build(model, gadget, inputs, output_pattern):
+    """One gadget on the input bits; returns the result keys and the projected columns."""
+    output = Bit(model, "o", output_pattern)
+    results = operation_MILP._call_gadget(gadget, model, inputs, output, "g")
+    keys = tuple(sorted(results))
+    columns = [getattr(output, flag) for flag in _FLAGS] + [results[key] for key in keys]
+    model.update()
+    # Continuous columns (e.g. flags of BIT_ENCODING 'sos1') are made binary so that the pool tells them apart
+    for column in columns:
+        if type(column) != int and column.VType != GRB.BINARY:
+            column.VType = GRB.BINARY
+    return keys, columns
+
+
+def gadget_relation(gadget, n, output_pattern='', flags=None, constant_inputs=False):
+    """
+    Feasible relation of a gadget for every combination of legal input types.
+    By default the gadget is built once with variable input flags, and every combination fixes
+    them through their bounds; with constant_inputs every combination is a new model with
+    constant input bits (the path taken by constant folding and by constant-aware gadgets).
+
+    Parameters:
+    - gadget: xor_with_ul_input, xor_without_ul_input, xor_with_ul_input_no_delta_b, and_operation,
+      and_operation_no_cond or a replacement with the same signature
+    - n: number of inputs (2 for the AND gadgets)
+    - output_pattern: flag pattern of the output bit, as in Bit
+    - flags: optional dict of operation_MILP flags set while building, e.g. {'XOR_ENCODING': 'table'}
+    - constant_inputs: build one model per combination with constant input bits
+
+    Returns:
+    - relation: dict from the tuple of input types to the set of feasible (output flags, results)
+      tuples, results being ((key, value), ...) sorted by key
+    - build_time: seconds spent building
+    - solve_time: seconds spent enumerating
+    """
+    previous = _set_flags(dict(flags or {}, FOLD_CONSTANTS=False) if not constant_inputs else (flags or {}))
+    operation_MILP._fold_cache.clear()
+    operation_MILP._fold_models.clear()
+    relation = {}
+    build_time = solve_time = 0.0
+    try:
+        if not constant_inputs:
+            model = gp.Model()
+            _pool_model(model)
+            start = time.time()
+            inputs = [Bit(model, f"i{k}") for k in range(n)]
+            keys, columns = _build(model, gadget, inputs, output_pattern)
+            build_time = time.time() - start
+
+        for combination in itertools.product(LEGAL_BIT_TYPES, repeat=n):
+            if constant_inputs:
+                model = gp.Model()
+                _pool_model(model)
+                start = time.time()
+                inputs = [Bit(model, f"i{k}", bit_type) for k, bit_type in enumerate(combination)]
+                keys, columns = _build(model, gadget, inputs, output_pattern)
+                build_time += time.time() - start
+            else:
+                for bit, bit_type in zip(inputs, combination):
+                    for flag, value in zip(_FLAGS, BIT_TYPE_FLAGS[bit_type]):
+                        var = getattr(bit, flag)
+                        var.LB = value
+                        var.UB = value
+
+            start = time.time()
+            points = _solutions(model, columns)
+            solve_time += time.time() - start
+            relation[combination] = {(point[:4], tuple(zip(keys, point[4:]))) for point in points}
+            if constant_inputs:
+                model.dispose()
+        if not constant_inputs:
+            model.dispose()
+    finally:
+        _set_flags(previous)
+    return relation, build_time, solve_time
+
+
+def diff_relations(reference, candidate):
+    """
+    Differences between two relations from gadget_relation.
+
+    Returns:
+    - list of (input types, missing, extra) for every input combination whose feasible set
+      differs: missing holds the reference tuples the candidate lacks, extra the others
+    """
+    diffs = []
+    for combination in sorted(set(reference) | set(candidate)):
+        expected = reference.get(combination, set())
+        found = candidate.get(combination, set())
+        if expected != found:
+            diffs.append((combination, expected - found, found - expected))
+    return diffs
+
+
+def verify(gadgets=GADGET_ARITIES, formulations=FORMULATIONS, output_patterns=OUTPUT_PATTERNS,
+           constant_inputs=False):
+    """
+    Compare the relation of every gadget, input count and output pattern between formulations
+    and time them; the first formulation is the reference.
+
+    Parameters:
+    - gadgets: pairs (gadget, input counts)
+    - formulations: dict from label to operation_MILP flag settings
+    - output_patterns: output bit patterns
+    - constant_inputs: see gadget_relation
+
+    Returns:
+    - list with one dict per gadget, input count, output pattern and formulation: gadget, inputs,
+      output, formulation, points, build_time, solve_time, mismatches (input combinations whose
+      feasible set differs from the reference) and diffs (see diff_relations)
+    """
+    report = []
+    labels = list(formulations)
+    for gadget, arities in gadgets:
+        for n in arities:
+            for pattern in output_patterns:
+                reference = None
+                for label in labels:
+                    relation, build_time, solve_time = gadget_relation(gadget, n, pattern, formulations[label],
+                                                                       constant_inputs)
+                    if reference is None:
+                        reference = relation
+                    diffs = diff_relations(reference, relation)
+                    report.append({'gadget': gadget.__name__, 'inputs': n, 'output': pattern, 'formulation': label,
+                                   'points': sum(len(points) for points in relation.values()),
+                                   'build_time': build_time, 'solve_time': solve_time,
+                                   'mismatches': len(diffs), 'diffs': diffs})
+                    print(f"{gadget.__name__} x{n} {pattern or 'free'} {label}: "
+                          f"{report[-1]['points']} points, {len(diffs)} mismatches")
+
+    print(verify_table(report))
+    return report
+
+
+def verify_table(report):
+    """
+    Text table of a verify report.
+
+    Parameters:
+    - report: list returned by verify
+
+    Returns:
+    - table string
+    """
+    lines = [f"{'gadget':>30}{'inputs':>8}{'output':>22}{'formulation':>13}{'points':>9}{'build':>10}"
+             f"{'solve':>10}{'mismatch':>10}"]
+    for row in report:
+        lines.append(f"{row['gadget']:>30}{row['inputs']:>8}{str(row['output'] or 'free'):>22}{row['formulation']:>13}"
+                     f"{row['points']:>9}{row['build_time']:>10.4f}{row['solve_time']:>10.4f}{row['mismatches']:>10}")
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    if any(row['mismatches'] for row in verify()):
+        raise SystemExit(1)
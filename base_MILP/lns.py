@@ -0,0 +1,187 @@
+import runpy
+import time
+
+from base_MILP.operation_MILP import BIT_TYPE_FLAGS
+from base_MILP.round_search import prefix_states
+from base_MILP.warm_start import FLAGS, set_start
+
+# Number of adjacent z-slices (Ascon: columns) freed per sub-MIP
+LNS_WINDOW = 4
+
+# Time limit in seconds of every sub-MIP
+LNS_TIME_LIMIT = 30
+
+
+def _stack_last(items):
+    """Move the outer axis of a list of equally nested lists to the innermost position."""
+    if not isinstance(items[0], list):
+        return list(items)
+    return [_stack_last([item[i] for item in items]) for i in range(len(items[0]))]
+
+
+def _reverse_axes(nested):
+    """Nested lists [a][b]...[z] as [z]...[b][a]."""
+    if not isinstance(nested[0], list):
+        return list(nested)
+    return _stack_last([_reverse_axes(item) for item in nested])
+
+
+def trail_values(output):
+    """
+    Flag values of a state stored by the output writers (write_row, write_row_chi, write_Ascon_P, ...).
+
+    Parameters:
+    - output: tuple (A, B, row, name) with the bit types A and the markers B indexed [x]...[z]
+
+    Returns:
+    - nested lists [z]...[x] of (ul, r, b, cond) tuples, see warm_start.set_start
+    """
+    def flags(bit_type, marker):
+        ul, r, b, _ = BIT_TYPE_FLAGS.get(bit_type, (0, 0, 0, 0))
+        return ul, r, b, int(isinstance(marker, str) and 'cond' in marker)
+
+    def walk(types, markers):
+        if not isinstance(types, list):
+            return flags(types, markers)
+        return [walk(t, m) for t, m in zip(types, markers)]
+
+    return walk(_reverse_axes(output[0]), _reverse_axes(output[1]))
+
+
+def load_trail(path, state_keys):
+    """
+    Read a trail written by a search script.
+
+    Parameters:
+    - path: result file with initial_state_output and intermediate_states_output
+    - state_keys: keys of the per-round states to read, named as in the builder handles
+
+    Returns:
+    - dict with 'initial_state' and 'intermediate_states' holding flag values, shaped like the
+      builder handles (see round_search.prefix_states)
+    """
+    trail = runpy.run_path(path)
+    return {
+        'initial_state': trail_values(trail['initial_state_output']),
+        'intermediate_states': [{k: trail_values(round_state[k]) for k in state_keys if round_state.get(k) is not None}
+                                for round_state in trail['intermediate_states_output']],
+    }
+
+
+def start_from_trail(handles, path, state_keys):
+    """
+    Set a stored trail as MIP start of a built model.
+
+    Parameters:
+    - handles: builder handles with 'initial_state' and 'intermediate_states'
+    - path: result file, see load_trail
+    - state_keys: keys of the per-round states shared by the handles and the result file
+
+    Returns:
+    - number of variables set
+    """
+    trail = load_trail(path, state_keys)
+    return sum(set_start(state, values) for state, values in
+               zip(prefix_states(handles, state_keys), prefix_states(trail, state_keys)))
+
+
+def _slices_of(states):
+    """Map the index of every flag variable of the states to the z-slices it appears in."""
+    slices = dict()
+
+    def walk(bits, z):
+        if hasattr(bits, 'ul') and hasattr(bits, 'cond'):
+            for flag in FLAGS:
+                var = getattr(bits, flag)
+                if hasattr(var, 'index'):
+                    slices.setdefault(var.index, set()).add(z)
+            return
+        for i in range(len(bits)):
+            walk(bits[i], z)
+
+    for state in states:
+        for z in range(len(state)):
+            walk(state[z], z)
+    return slices
+
+
+def slice_lns(model, states, window=LNS_WINDOW, time_limit=LNS_TIME_LIMIT, step=None, passes=None):
+    """
+    Large-neighbourhood search over z-slices around the incumbent of a model.
+    Each sub-MIP frees the flags of window adjacent slices, fixes the flags of all other
+    slices to the incumbent through their bounds and is solved with a short time limit;
+    an improvement becomes the new incumbent. The search stops after a full pass over
+    the windows without improvement (or after passes passes).
+    The other variables (deltas, counters) stay free and follow the fixed flags.
+
+    Parameters:
+    - model: Gurobi model object with a solution or a MIP start (e.g. from start_from_trail)
+    - states: states of the model indexed [z]..., e.g. round_search.prefix_states(handles, ...);
+      for Ascon the states are [z][x] and a slice is a column
+    - window: number of adjacent slices freed per sub-MIP
+    - time_limit: TimeLimit of every sub-MIP (also of the first solve completing the start)
+    - step: shift between two windows, window by default
+    - passes: optional maximum number of passes over the windows
+
+    Returns:
+    - list with one dict per solve: window (first freed slice, None for the first solve),
+      objective, improved, runtime; on return the flags of the states are fixed to the best
+      trail and the model holds its solution
+    """
+    lanes = len(states[0])
+    step = step or window
+    slices = _slices_of(states)
+    time_limit_before = model.Params.TimeLimit
+    model.setParam('TimeLimit', time_limit)
+
+    start = time.time()
+    if model.SolCount == 0:
+        model.optimize()
+    if model.SolCount == 0:
+        raise ValueError(f"No incumbent to start the neighbourhood search from (status {model.Status})")
+    variables = model.getVars()
+    best_x = model.getAttr('X', variables)
+    best = model.ObjVal
+    history = [{'window': None, 'objective': best, 'improved': True, 'runtime': time.time() - start}]
+    print(f"LNS start: objective {best}")
+
+    lb = model.getAttr('LB', variables)
+    ub = model.getAttr('UB', variables)
+    sense = model.ModelSense
+    windows = list(range(0, lanes, step))
+    idle = 0
+    iteration = 0
+    while idle < len(windows) and (passes is None or iteration < passes * len(windows)):
+        first = windows[iteration % len(windows)]
+        free = {(first + k) % lanes for k in range(window)}
+        fixed = [variables[i] for i, z in slices.items() if not z & free]
+        values = [best_x[var.index] for var in fixed]
+        model.setAttr('LB', fixed, values)
+        model.setAttr('UB', fixed, values)
+        model.setAttr('Start', variables, best_x)
+
+        start = time.time()
+        model.optimize()
+        improved = model.SolCount > 0 and sense * (model.ObjVal - best) < -1e-6
+        if improved:
+            best_x = model.getAttr('X', variables)
+            best = model.ObjVal
+            idle = 0
+        else:
+            idle += 1
+        history.append({'window': first, 'objective': best, 'improved': improved, 'runtime': time.time() - start})
+        print(f"LNS window {first}-{(first + window - 1) % lanes}: objective {best}{' (improved)' if improved else ''}")
+
+        model.setAttr('LB', fixed, [lb[var.index] for var in fixed])
+        model.setAttr('UB', fixed, [ub[var.index] for var in fixed])
+        iteration += 1
+
+    # Load the best trail back into the model
+    fixed = [variables[i] for i in slices]
+    values = [best_x[var.index] for var in fixed]
+    model.setAttr('LB', fixed, values)
+    model.setAttr('UB', fixed, values)
+    model.setAttr('Start', variables, best_x)
+    model.setParam('TimeLimit', time_limit_before)
+    model.optimize()
+    return history
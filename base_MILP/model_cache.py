@@ -0,0 +1,313 @@
+import ast
+import glob
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+import gurobipy as gp
+
+from base_MILP import operation_MILP
+from base_MILP.operation_MILP import Bit, BitState
+
+# Directory of the cached models (MPS file plus JSON handle file per configuration)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'model_cache')
+
+# Set to False to always rebuild
+USE_MODEL_CACHE = True
+
+# Module flags found in the base_MILP sources, by source file (see model_flags)
+_flag_defaults = {}
+
+
+def _source_flags(path):
+    """Upper-case module-level settings of a source file (e.g. FOLD_CONSTANTS) with their literal default."""
+    if path not in _flag_defaults:
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read())
+        flags = {}
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name) \
+                    and node.targets[0].id.isupper():
+                try:
+                    flags[node.targets[0].id] = ast.literal_eval(node.value)
+                except ValueError:
+                    continue
+        _flag_defaults[path] = flags
+    return _flag_defaults[path]
+
+
+def model_flags():
+    """
+    Registry of the model-changing flags: every upper-case module-level setting of a base_MILP
+    module (FOLD_CONSTANTS, CONE_PRUNING, encoding switches, ...) is read from the module
+    sources, so a new switch is covered without being listed anywhere. The defaults are part
+    of the source digest; only the flags a run has changed are returned.
+
+    Returns:
+    - dict mapping 'module.FLAG' to the current value of every flag that differs from its default
+    """
+    flags = {}
+    for name, module in sorted(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if not name.startswith('base_MILP.') or path is None or not path.endswith('.py'):
+            continue
+        for flag, default in _source_flags(path).items():
+            value = getattr(module, flag, default)
+            if value != default:
+                flags[f"{name}.{flag}"] = value
+    return flags
+
+
+def _code_names(function):
+    """Global names read by the code of a function and its nested functions."""
+    names, codes = set(), [function.__code__]
+    while codes:
+        code = codes.pop()
+        names.update(code.co_names)
+        codes.extend(c for c in code.co_consts if inspect.iscode(c))
+    return names
+
+
+def _build_functions(build):
+    """
+    The build function and the functions it reaches: the ones it wraps (closure cells,
+    functools.partial, e.g. the script's builder behind a lambda) and the functions of
+    the same module it calls.
+    """
+    functions, pending = [], [build]
+    while pending:
+        function = pending.pop()
+        if any(function is f for f in functions):
+            continue
+        if hasattr(function, 'func'):
+            pending.append(function.func)
+            continue
+        if not inspect.isfunction(function):
+            continue
+        functions.append(function)
+        for cell in function.__closure__ or ():
+            try:
+                value = cell.cell_contents
+            except ValueError:
+                continue
+            if callable(value):
+                pending.append(value)
+        for name in _code_names(function):
+            value = function.__globals__.get(name)
+            if inspect.isfunction(value) and value.__module__ == function.__module__:
+                pending.append(value)
+    return functions
+
+
+def _settings(function):
+    """Plain (bool, int, float, str and lists or tuples of them) globals the code of a function reads, e.g. a script's chi_encoding."""
+    settings = {}
+    for name in sorted(_code_names(function)):
+        value = function.__globals__.get(name)
+        if isinstance(value, (bool, int, float, str)) or (
+                isinstance(value, (list, tuple)) and all(isinstance(v, (bool, int, float, str)) for v in value)):
+            settings[name] = value
+    return settings
+
+
+def _module_source(module_name):
+    """sha256 of the source file of a module, None if it has none."""
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def fingerprint(config, build=None):
+    """
+    Key of a builder configuration.
+    Covers the configuration itself, the flags that change the emitted model (model_flags),
+    the source of the base_MILP modules and tables and the source of the module (the attack
+    script) defining build, so that editing a builder or a script-level constraint, objective
+    or setting invalidates old entries.
+
+    Parameters:
+    - config: JSON-serializable description of the build (cipher, rounds, round variants, lane width, ...)
+    - build: optional build function of the entry (see cached_model)
+
+    Returns:
+    - hex digest string
+    """
+    sources = {}
+    base = os.path.dirname(os.path.abspath(__file__))
+    paths = glob.glob(os.path.join(base, '*.py')) + glob.glob(os.path.join(base, 'tables', '*.json'))
+    for path in sorted(paths):
+        with open(path, 'rb') as f:
+            sources[os.path.relpath(path, base)] = hashlib.sha256(f.read()).hexdigest()
+    builders = {}
+    if build is not None:
+        for function in _build_functions(build):
+            try:
+                source = inspect.getsource(function).encode()
+            except OSError:
+                # No source file (interactive session): the bytecode still tells edits apart
+                source = function.__code__.co_code
+            builders[f"{function.__module__}.{function.__qualname__}"] = {
+                'source': hashlib.sha256(source).hexdigest(),
+                'module': _module_source(function.__module__),
+                'settings': _settings(function),
+            }
+    key = {
+        'config': config,
+        'flags': model_flags(),
+        'sources': sources,
+        'build': builders,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=repr).encode()).hexdigest()[:24]
+
+
+def _encode(value):
+    """Turn builder handles into JSON, variables are stored by their index in the model."""
+    if isinstance(value, gp.Var):
+        return {'v': value.index}
+    if isinstance(value, gp.LinExpr):
+        return {'lin': [[value.getCoeff(k), value.getVar(k).index] for k in range(value.size())],
+                'c': value.getConstant()}
+    if isinstance(value, gp.QuadExpr):
+        return {'quad': [[value.getCoeff(k), value.getVar1(k).index, value.getVar2(k).index]
+                         for k in range(value.size())],
+                'lin': _encode(value.getLinExpr())}
+    if isinstance(value, gp.Constr):
+        return {'constr': value.index}
+    if isinstance(value, BitState):
+        return [_encode(value[i]) for i in range(len(value))]
+    if hasattr(value, 'ul') and hasattr(value, 'cond'):
+        # Bit or BitRef
+        return {'bit': [_encode(value.ul), _encode(value.r), _encode(value.b), _encode(value.cond)]}
+    if isinstance(value, (list, operation_MILP._StateRow)):
+        return [_encode(value[i]) for i in range(len(value))]
+    if isinstance(value, tuple):
+        return {'tuple': [_encode(v) for v in value]}
+    if isinstance(value, dict):
+        return {'dict': [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"Cannot cache a handle of type {type(value).__name__}")
+
+
+def _decode(value, model, variables, constrs):
+    """Inverse of _encode on a model read back from the MPS file."""
+    if isinstance(value, list):
+        return [_decode(v, model, variables, constrs) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if 'v' in value:
+        return variables[value['v']]
+    if 'quad' in value:
+        quad = gp.QuadExpr(_decode(value['lin'], model, variables, constrs))
+        quad.addTerms([c for c, _, _ in value['quad']], [variables[i] for _, i, _ in value['quad']],
+                      [variables[j] for _, _, j in value['quad']])
+        return quad
+    if 'lin' in value:
+        return gp.LinExpr([c for c, _ in value['lin']], [variables[k] for _, k in value['lin']]) + value['c']
+    if 'constr' in value:
+        return constrs[value['constr']]
+    if 'bit' in value:
+        return Bit.from_flags(model, *[_decode(f, model, variables, constrs) for f in value['bit']])
+    if 'tuple' in value:
+        return tuple(_decode(v, model, variables, constrs) for v in value['tuple'])
+    if 'dict' in value:
+        return {_hashable(_decode(k, model, variables, constrs)): _decode(v, model, variables, constrs)
+                for k, v in value['dict']}
+    raise ValueError(f"Unknown cache entry {sorted(value)}")
+
+
+def _hashable(key):
+    """Dict keys come back from JSON as lists where they were tuples of lists."""
+    if isinstance(key, list):
+        return tuple(_hashable(k) for k in key)
+    return key
+
+
+def save_model(model, handles, path):
+    """
+    Write a built model and its handles.
+
+    Parameters:
+    - model: Gurobi model object
+    - handles: builder return value (nested lists/tuples/dicts of Bits, Vars, Lin/QuadExprs, Constrs and plain values)
+    - path: file path without extension; writes path.mps and path.json
+    """
+    model.update()
+    entry = {'handles': _encode(handles)}
+
+    # MPS needs unique names, otherwise Gurobi writes generic ones; keep the originals in that case
+    var_names = model.getAttr('VarName', model.getVars())
+    if len(set(var_names)) != len(var_names):
+        entry['var_names'] = var_names
+    constr_names = model.getAttr('ConstrName', model.getConstrs())
+    if len(set(constr_names)) != len(constr_names):
+        entry['constr_names'] = constr_names
+
+    # Write under temporary names first, concurrent runs may read the same entry
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp = f"{path}.{os.getpid()}"
+    with open(temp + '.json', 'w') as f:
+        json.dump(entry, f)
+    model.write(temp + '.mps')
+    os.replace(temp + '.json', path + '.json')
+    os.replace(temp + '.mps', path + '.mps')
+
+
+def load_model(path, env=None):
+    """
+    Read a model written by save_model.
+
+    Parameters:
+    - path: file path without extension
+    - env: optional Gurobi environment
+
+    Returns:
+    - model: Gurobi model object
+    - handles: builder handles bound to the variables of the loaded model
+    """
+    model = gp.read(path + '.mps', env)
+    with open(path + '.json') as f:
+        entry = json.load(f)
+    variables = model.getVars()
+    constrs = model.getConstrs()
+    if 'var_names' in entry:
+        model.setAttr('VarName', variables, entry['var_names'])
+    if 'constr_names' in entry:
+        model.setAttr('ConstrName', constrs, entry['constr_names'])
+    model.update()
+    return model, _decode(entry['handles'], model, variables, constrs)
+
+
+def cached_model(config, build, name="MILP", directory=None, env=None):
+    """
+    Load the model of a configuration from the cache, building and storing it on a miss.
+    Everything that differs between runs (initial colouring, bounds, objective) should be
+    applied to the returned model afterwards, e.g. through variable LB/UB.
+
+    Parameters:
+    - config: JSON-serializable builder configuration, see fingerprint
+    - build: function(model) adding the variables and constraints and returning the handles
+    - name: model name of a fresh build
+    - directory: cache directory, CACHE_DIR by default
+    - env: optional Gurobi environment
+
+    Returns:
+    - model: Gurobi model object
+    - handles: value returned by build, bound to the model's variables
+    """
+    if not USE_MODEL_CACHE:
+        model = gp.Model(name, env)
+        return model, build(model)
+
+    path = os.path.join(directory or CACHE_DIR, fingerprint(config, build))
+    if os.path.exists(path + '.mps') and os.path.exists(path + '.json'):
+        return load_model(path, env)
+
+    model = gp.Model(name, env)
+    handles = build(model)
+    save_model(model, handles, path)
+    return model, handles
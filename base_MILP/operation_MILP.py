@@ -12,6 +12,29 @@ def get_value(X):
         return int(X.x)
 
 
+# Flag values (ul, r, b, cond) of the named bit types
+BIT_TYPE_FLAGS = {
+    'lr': (0, 1, 0, 0),  # linear red bit
+    'ur': (1, 1, 0, 0),  # nonlinear red bit
+    'lb': (0, 0, 1, 0),  # linear blue bit
+    'ub': (1, 0, 1, 0),  # nonlinear blue bit
+    'lg': (0, 1, 1, 0),  # linear red-blue combination
+    'uc': (0, 0, 0, 0),  # unconditional constant
+    'c': (0, 0, 0, 0),   # constant
+    'cc': (0, 0, 0, 1),  # conditional constant
+    'u': (1, 0, 0, 0),   # pure nonlinear bit
+    'ug': (1, 1, 1, 0),  # nonlinear red-blue combination
+}
+
+# The nine legal flag combinations, one type each ('uc' has the flags of 'c')
+LEGAL_BIT_TYPES = ('u', 'lr', 'ur', 'lb', 'ub', 'lg', 'ug', 'c', 'cc')
+
+# Encoding of the variable flags of a Bit: 'flags' (pairwise exclusion rows), 'onehot' (one binary
+# per legal type, exactly one set, flags tied to them by equalities) or 'sos1' (continuous type
+# variables in an SOS1 set summing to one, continuous flags)
+BIT_ENCODING = 'flags'
+
+
 class Bit:
     """
     Bit class representing one bit in the hash function.
@@ -22,6 +45,8 @@ class Bit:
     - cond: condition constant flag
     """
 
+    __slots__ = ('model', 'ul', 'r', 'b', 'cond')
+
     def __init__(self, model: gp.Model, name_prefix="", bit_type=''):
         """
         Initialize bit variables.
@@ -47,7 +72,7 @@ class Bit:
             self.cond = model.addVar(vtype=GRB.BINARY, name=f"{name_prefix}_cond")
 
             # Add bit type constraints
-            self._add_bit_constraints()
+            self._add_bit_constraints(name_prefix)
         else:
             self.init_type(model, bit_type, name_prefix)
 
@@ -55,58 +80,9 @@ class Bit:
         """Initialize flags based on bit type."""
         self.model = model
         if type(bit_type) == str:
-            if bit_type == 'lr':      # linear red bit
-                self.ul = 0
-                self.r = 1
-                self.b = 0
-                self.cond = 0
-            elif bit_type == 'ur':    # nonlinear red bit
-                self.ul = 1
-                self.r = 1
-                self.b = 0
-                self.cond = 0
-            elif bit_type == 'lb':    # linear blue bit
-                self.ul = 0
-                self.r = 0
-                self.b = 1
-                self.cond = 0
-            elif bit_type == 'ub':    # nonlinear blue bit
-                self.ul = 1
-                self.r = 0
-                self.b = 1
-                self.cond = 0
-            elif bit_type == 'lg':    # linear red-blue combination
-                self.ul = 0
-                self.r = 1
-                self.b = 1
-                self.cond = 0
-            elif bit_type == 'uc':    # unconditional constant
-                self.ul = 0
-                self.r = 0
-                self.b = 0
-                self.cond = 0
-            elif bit_type == 'c':     # constant
-                self.ul = 0
-                self.r = 0
-                self.b = 0
-                self.cond = 0
-            elif bit_type == 'cc':    # conditional constant
-                self.ul = 0
-                self.r = 0
-                self.b = 0
-                self.cond = 1
-            elif bit_type == 'u':     # pure nonlinear bit
-                self.ul = 1
-                self.r = 0
-                self.b = 0
-                self.cond = 0
-            elif bit_type == 'ug':    # nonlinear red-blue combination
-                self.ul = 1
-                self.r = 1
-                self.b = 1
-                self.cond = 0
-            else:
+            if bit_type not in BIT_TYPE_FLAGS:
                 raise ValueError(f"Unsupported bit type: {bit_type} (only 'lr','ur','lb','ub','lg','ug','uc','c','cc','u')")
+            self.ul, self.r, self.b, self.cond = BIT_TYPE_FLAGS[bit_type]
         elif type(bit_type) == tuple:
             # Use tuple to flexibly specify each flag value
             if bit_type[0] == '*':
@@ -138,39 +114,306 @@ class Bit:
                 self.cond = 1
 
             # Add bit type constraints
-            self._add_bit_constraints()
-
-    def _add_bit_constraints(self):
+            self._add_bit_constraints(name_prefix)
+
+    @classmethod
+    def from_flags(cls, model, ul, r, b, cond):
+        """Wrap existing flags (variables or constants) into a Bit without adding constraints."""
+        bit = cls.__new__(cls)
+        bit.model = model
+        bit.ul = ul
+        bit.r = r
+        bit.b = b
+        bit.cond = cond
+        return bit
+
+    def _add_bit_constraints(self, name_prefix=""):
         """
         Add basic constraints for bit types.
         Ensure the combination of flags conforms to bit type definitions.
         """
+        if BIT_ENCODING != 'flags':
+            self._add_type_constraints(name_prefix)
+            return
         self.model.addConstr(self.cond + self.ul <= 1)  # cond and ul cannot both be 1
         self.model.addConstr(self.cond + self.r <= 1)  # cond and r cannot both be 1
         self.model.addConstr(self.b + self.cond <= 1)  # b and cond cannot both be 1
 
+    def _add_type_constraints(self, name_prefix):
+        """
+        One-hot type encoding of the flags (BIT_ENCODING 'onehot' or 'sos1').
+        One type variable per legal type agreeing with the constant flags, exactly one of them is 1,
+        and every variable flag is the sum of the type variables of the types that set it.
+        The flags stay variables, so bounds, starts and the gadgets use them as before.
+        """
+        flags = (self.ul, self.r, self.b, self.cond)
+        types = [t for t in LEGAL_BIT_TYPES
+                 if all(type(f) != int or f == v for f, v in zip(flags, BIT_TYPE_FLAGS[t]))]
+        if not types:
+            raise ValueError(f"Bit flags {flags} match no legal bit type")
+        if all(type(f) == int for f in flags):
+            return
+        sos1 = BIT_ENCODING == 'sos1'
+        vtype = GRB.CONTINUOUS if sos1 else GRB.BINARY
+        type_vars = [self.model.addVar(ub=1, vtype=vtype, name=f"{name_prefix}_{t}") for t in types]
+        self.model.addConstr(gp.quicksum(type_vars) == 1)
+        if sos1:
+            self.model.addSOS(GRB.SOS_TYPE1, type_vars)
+        for k, flag in enumerate(flags):
+            if type(flag) == int:
+                continue
+            if sos1:
+                flag.VType = GRB.CONTINUOUS
+            self.model.addConstr(flag == gp.quicksum(v for v, t in zip(type_vars, types) if BIT_TYPE_FLAGS[t][k]))
+
     def _get_type(self) -> str:
         """Return bit type based on flag variable values."""
-        ul = get_value(self.ul)
-        r = get_value(self.r)
-        b = get_value(self.b)
-
-        if ul == 1 and r == 0 and b == 0:
-            return 'u'
-        elif ul == 0 and r == 1 and b == 0:
-            return 'lr'
-        elif ul == 1 and r == 1 and b == 0:
-            return 'ur'
-        elif ul == 0 and r == 0 and b == 1:
-            return 'lb'
-        elif ul == 1 and r == 0 and b == 1:
-            return 'ub'
-        elif ul == 0 and r == 1 and b == 1:
-            return 'lg'
-        elif ul == 1 and r == 1 and b == 1:
-            return 'ug'
+        return _flags_type(self.ul, self.r, self.b)
+
+
+def _flags_type(ul, r, b) -> str:
+    """Return bit type based on the values of the ul/r/b flags."""
+    ul = get_value(ul)
+    r = get_value(r)
+    b = get_value(b)
+
+    if ul == 1 and r == 0 and b == 0:
+        return 'u'
+    elif ul == 0 and r == 1 and b == 0:
+        return 'lr'
+    elif ul == 1 and r == 1 and b == 0:
+        return 'ur'
+    elif ul == 0 and r == 0 and b == 1:
+        return 'lb'
+    elif ul == 1 and r == 0 and b == 1:
+        return 'ub'
+    elif ul == 0 and r == 1 and b == 1:
+        return 'lg'
+    elif ul == 1 and r == 1 and b == 1:
+        return 'ug'
+    else:
+        return 'c'
+
+
+def fix_bit_type(bit, bit_type):
+    """
+    Pin the ul/r/b flags of a bit to a stored type (cond is left free).
+    Variable flags are fixed through LB = UB, so presolve removes them without extra rows;
+    constant flags are checked, and only expression flags get an equality constraint.
+
+    Parameters:
+    - bit: Bit or BitRef
+    - bit_type: type name of BIT_TYPE_FLAGS, e.g. 'lr'
+    """
+    for name, value in zip(('ul', 'r', 'b'), BIT_TYPE_FLAGS[bit_type][:3]):
+        flag = getattr(bit, name)
+        if isinstance(flag, gp.Var):
+            flag.LB = value
+            flag.UB = value
+        elif isinstance(flag, (int, float)):
+            if flag != value:
+                raise ValueError(f"Bit flag {name} is the constant {flag}, cannot fix it to type {bit_type}")
         else:
-            return 'c'
+            bit.model.addConstr(flag == value)
+
+
+class BitState:
+    """
+    Compact state storing the flags of all bits as flat columns.
+    Instead of one Bit object per position, the ul/r/b/cond flags of the whole
+    state are kept in four lists (Gurobi variables or integer constants).
+    Permutation layers (rho, pi, rho_west, rho_east) return views that share
+    the columns and only carry a list of column indices.
+
+    Indexing works like the nested lists used elsewhere: state[z][y][x]
+    returns a BitRef exposing .ul/.r/.b/.cond, and state[z][y][x] = bit
+    copies the flags of bit into the state.
+    """
+
+    __slots__ = ('model', 'shape', 'columns', 'index')
+
+    def __init__(self, model, shape, columns=None, index=None):
+        """
+        Initialize state columns.
+
+        Parameters:
+        - model: Gurobi model object
+        - shape: state shape, e.g. (64, 5, 5) for [z][y][x] or (32, 5) for [z][x]
+        - columns: (ul, r, b, cond) flag lists to share, new 'uc' columns if None
+        - index: column index of each position, identity if None
+        """
+        self.model = model
+        self.shape = tuple(shape)
+        if columns is None:
+            size = 1
+            for n in self.shape:
+                size *= n
+            columns = tuple([0] * size for _ in range(4))
+        self.columns = columns
+        self.index = index
+
+    @classmethod
+    def allocate(cls, model, shape, name_prefix="", bit_type=('*', '*', '*', 0)):
+        """
+        Create a state whose bits all have the given bit type.
+        Uses the same bit types as Bit, without keeping Bit objects alive.
+        """
+        state = cls(model, shape)
+        for pos in range(len(state.columns[0])):
+            state._store(pos, Bit(model, f"{name_prefix}_{pos}", bit_type))
+        return state
+
+    @classmethod
+    def from_bits(cls, model, bits, shape):
+        """Pack a nested [z][y][x] (or [z][x]) list of Bit objects into a state."""
+        state = cls(model, shape)
+        for pos, bit in enumerate(_flatten(bits, len(state.shape))):
+            state._store(pos, bit)
+        return state
+
+    def permute(self, source):
+        """
+        Return a view of this state sharing its columns.
+
+        Parameters:
+        - source: list mapping each flat position of the view to the flat position in this state
+        """
+        if self.index is None:
+            index = list(source)
+        else:
+            index = [self.index[p] for p in source]
+        return BitState(self.model, self.shape, self.columns, index)
+
+    def _column(self, pos):
+        return pos if self.index is None else self.index[pos]
+
+    def _store(self, pos, bit):
+        col = self._column(pos)
+        self.columns[0][col] = bit.ul
+        self.columns[1][col] = bit.r
+        self.columns[2][col] = bit.b
+        self.columns[3][col] = bit.cond
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        return iter(_StateRow(self, 0, 0))
+
+    def __getitem__(self, i):
+        return _StateRow(self, 0, 0)[i]
+
+
+class _StateRow:
+    """Partially indexed BitState, e.g. state[z] or state[z][y]."""
+
+    __slots__ = ('state', 'offset', 'depth')
+
+    def __init__(self, state, offset, depth):
+        self.state = state
+        self.offset = offset
+        self.depth = depth
+
+    def __len__(self):
+        return self.state.shape[self.depth]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def _position(self, i):
+        """Index i along this axis, negative indices counting from the end like a list."""
+        n = self.state.shape[self.depth]
+        if not -n <= i < n:
+            raise IndexError(f"BitState index {i} out of range for axis of length {n}")
+        return self.offset + i % n
+
+    def __getitem__(self, i):
+        if self.depth == len(self.state.shape) - 1:
+            return BitRef(self.state, self._position(i))
+        return _StateRow(self.state, self._position(i) * self.state.shape[self.depth + 1], self.depth + 1)
+
+    def __setitem__(self, i, bit):
+        if self.depth != len(self.state.shape) - 1:
+            raise TypeError("Only single bits can be assigned into a BitState")
+        self.state._store(self._position(i), bit)
+
+
+class BitRef:
+    """Reference to one bit of a BitState, exposing the same flags as Bit."""
+
+    __slots__ = ('state', 'pos')
+
+    def __init__(self, state, pos):
+        self.state = state
+        self.pos = pos
+
+    def _get(self, flag):
+        return self.state.columns[flag][self.state._column(self.pos)]
+
+    def _set(self, flag, value):
+        self.state.columns[flag][self.state._column(self.pos)] = value
+
+    ul = property(lambda self: self._get(0), lambda self, v: self._set(0, v))
+    r = property(lambda self: self._get(1), lambda self, v: self._set(1, v))
+    b = property(lambda self: self._get(2), lambda self, v: self._set(2, v))
+    cond = property(lambda self: self._get(3), lambda self, v: self._set(3, v))
+
+    @property
+    def model(self):
+        return self.state.model
+
+    def _get_type(self) -> str:
+        """Return bit type based on flag variable values."""
+        return _flags_type(self.ul, self.r, self.b)
+
+
+def _flatten(bits, depth):
+    """Iterate over a nested list of bits in row-major order."""
+    if depth == 1:
+        yield from bits
+    else:
+        for row in bits:
+            yield from _flatten(row, depth - 1)
+
+
+_permutation_cache = {}
+
+
+def permutation_view(state, name, source):
+    """
+    Apply a bit permutation to a BitState without creating new bits.
+
+    Parameters:
+    - state: BitState
+    - name: permutation name, used to cache the index map per shape
+    - source: function mapping an output position tuple to the input position tuple
+
+    Returns:
+    - new_state: BitState view sharing the columns of state
+    """
+    key = (name, state.shape)
+    if key not in _permutation_cache:
+        shape = state.shape
+        strides = [1] * len(shape)
+        for d in range(len(shape) - 2, -1, -1):
+            strides[d] = strides[d + 1] * shape[d + 1]
+        positions = [()]
+        for n in shape:
+            positions = [p + (i,) for p in positions for i in range(n)]
+        _permutation_cache[key] = [sum(i * s for i, s in zip(source(*p), strides)) for p in positions]
+    return state.permute(_permutation_cache[key])
+
+
+def empty_state_like(state, shape):
+    """
+    Return an empty output state matching the representation of the input state.
+    A BitState input gives a BitState output, a nested list gives nested lists.
+    """
+    if isinstance(state, BitState):
+        return BitState(state.model, shape)
+    if len(shape) == 2:
+        return [[None for _ in range(shape[1])] for _ in range(shape[0])]
+    return [[[None for _ in range(shape[2])] for _ in range(shape[1])] for _ in range(shape[0])]
 
 
 def add_or(model, z, xs, name=""):
@@ -180,47 +423,90 @@ def add_or(model, z, xs, name=""):
     model.addConstr(z <= gp.quicksum(xs), name=f"{name}_or_ub")
 
 
+def or_flag(model, xs, name=""):
+    """
+    OR of {0,1} variables or constants.
+    Returns the constant if the constant inputs already decide it,
+    otherwise a new binary variable linked to the other inputs by add_or.
+    """
+    if any(type(x) == int and x == 1 for x in xs):
+        return 1
+    xs = [x for x in xs if type(x) != int]
+    if not xs:
+        return 0
+    z = model.addVar(vtype=GRB.BINARY, name=name)
+    add_or(model, z, xs)
+    return z
+
+
+def bounded_flag(model, lower, upper, name=""):
+    """
+    Binary flag t with t >= l for every l in lower and t <= u for every u in upper.
+    Returns the constant if the constant bounds force a single value (the other
+    bounds are kept as constraints on that value), otherwise a new binary variable.
+    """
+    lo = max([0] + [e for e in lower if type(e) == int])
+    hi = min([1] + [e for e in upper if type(e) == int])
+    if lo == hi:
+        for e in lower:
+            if type(e) != int:
+                model.addConstr(lo >= e)
+        for e in upper:
+            if type(e) != int:
+                model.addConstr(lo <= e)
+        return lo
+    t = model.addVar(vtype=GRB.BINARY, name=name)
+    for e in lower:
+        if type(e) != int or e > 0:
+            model.addConstr(t >= e)
+    for e in upper:
+        if type(e) != int or e < 1:
+            model.addConstr(t <= e)
+    return t
+
+
+# Encoding of xor_with_ul_input and xor_with_ul_input_no_delta_b: 'gadget' (the constraints below)
+# or one of the xor_MILP encodings 'continuous', 'aggregated', 'indicator', 'table'
+XOR_ENCODING = 'gadget'
+
+# XOR encodings that add general constraints or tables, emitted one gadget call per bit
+PER_BIT_XOR_ENCODINGS = ('indicator', 'table')
+
+
 def xor_with_ul_input(model, inputs, output, operation_name=''):
     """
     XOR operation with nonlinear inputs.
     Returns delta_r and delta_b variables.
     """
-    # delta_r, delta_b: whether red/blue bits cancel in XOR
-    delta_r = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_delta_r")
-    delta_b = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_delta_b")
+    # Inputs that are all constants are evaluated at build time
+    folded = fold_gadget(xor_with_ul_input, inputs, _bit_pattern(output))
+    if folded is not None:
+        return _apply_fold(output, *folded)
+
+    # Other encodings of the same relation
+    if XOR_ENCODING != 'gadget':
+        from base_MILP import xor_MILP
+        return xor_MILP.encode_xor(xor_with_ul_input, model, inputs, output, operation_name, XOR_ENCODING)
 
     # Check if inputs contain red bits
-    has_r = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_has_r")
-    add_or(model, has_r, [i.r for i in inputs])
+    has_r = or_flag(model, [i.r for i in inputs], f"{operation_name}_has_r")
 
     # Check if inputs contain blue bits
-    has_b = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_has_b")
-    add_or(model, has_b, [i.b for i in inputs])
+    has_b = or_flag(model, [i.b for i in inputs], f"{operation_name}_has_b")
 
     # Check if inputs contain nonlinear bits
-    has_ul = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_has_ul")
-    add_or(model, has_ul, [i.ul for i in inputs])
+    has_ul = or_flag(model, [i.ul for i in inputs], f"{operation_name}_has_ul")
+
+    # delta_r, delta_b: whether red/blue bits cancel in XOR
+    delta_r = bounded_flag(model, [], [has_r], f"{operation_name}_delta_r")
+    delta_b = bounded_flag(model, [], [1 - has_ul, has_b], f"{operation_name}_delta_b")
 
     # Check if inputs contain pure nonlinear bits (type u)
-    sum_temp_u = []
-    for i in inputs:
-        temp = model.addVar(vtype=GRB.BINARY)
-        model.addConstr(temp >= i.ul - i.r - i.b)
-        model.addConstr(temp <= i.ul)
-        model.addConstr(temp <= 1 - i.r)
-        model.addConstr(temp <= 1 - i.b)
-        sum_temp_u.append(temp)
+    sum_temp_u = [bounded_flag(model, [i.ul - i.r - i.b], [i.ul, 1 - i.r, 1 - i.b]) for i in inputs]
 
     # Check if inputs contain nonlinear blue bits (type ub) or nonlinear red-blue bits
-    input_ub = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_input_ub")
-    sum_temp_ub = []
-    for i in inputs:
-        temp = model.addVar(vtype=GRB.BINARY)
-        model.addConstr(temp >= i.ul + i.b - 1)
-        model.addConstr(temp <= i.ul)
-        model.addConstr(temp <= i.b)
-        sum_temp_ub.append(temp)
-    add_or(model, input_ub, sum_temp_ub)
+    sum_temp_ub = [bounded_flag(model, [i.ul + i.b - 1], [i.ul, i.b]) for i in inputs]
+    input_ub = or_flag(model, sum_temp_ub, f"{operation_name}_input_ub")
 
     # Constraints for output nonlinear flag
     model.addConstr(output.ul >= has_ul - delta_r)
@@ -228,13 +514,6 @@ def xor_with_ul_input(model, inputs, output, operation_name=''):
     model.addConstr(output.ul <= 1 - delta_r + input_ub)
     model.addConstr(output.ul >= input_ub)
 
-    # Constraints for delta_r
-    model.addConstr(delta_r <= has_r)
-
-    # Constraints for delta_b
-    model.addConstr(delta_b <= 1 - has_ul)
-    model.addConstr(delta_b <= has_b)
-
     # Constraints for output condition constant flag
     model.addConstr(output.cond <= 1 - has_ul)
 
@@ -263,9 +542,20 @@ def xor_without_ul_input(model, inputs, output, operation_name=''):
     XOR operation without nonlinear inputs.
     Returns delta_r and delta_b variables.
     """
-    # delta_r, delta_b: whether red/blue bits cancel in XOR
-    delta_r = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_delta_r")
-    delta_b = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_delta_b")
+    # Inputs that are all constants are evaluated at build time
+    folded = fold_gadget(xor_without_ul_input, inputs, _bit_pattern(output))
+    if folded is not None:
+        return _apply_fold(output, *folded)
+
+    # delta_r, delta_b: whether red/blue bits cancel in XOR (nothing cancels without red/blue inputs)
+    if all(type(i.r) == int and i.r == 0 for i in inputs):
+        delta_r = 0
+    else:
+        delta_r = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_delta_r")
+    if all(type(i.b) == int and i.b == 0 for i in inputs):
+        delta_b = 0
+    else:
+        delta_b = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_delta_b")
 
     # Sums of red/blue components in inputs
     sum_r = gp.quicksum([i.r for i in inputs])
@@ -306,39 +596,33 @@ def xor_with_ul_input_no_delta_b(model, inputs, output, operation_name=''):
     XOR operation with nonlinear inputs (blue cancellation not allowed).
     Returns delta_r variable.
     """
-    # delta_r: whether red bits cancel in XOR
-    delta_r = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_delta_r")
+    # Inputs that are all constants are evaluated at build time
+    folded = fold_gadget(xor_with_ul_input_no_delta_b, inputs, _bit_pattern(output))
+    if folded is not None:
+        return _apply_fold(output, *folded)
+
+    # Other encodings of the same relation
+    if XOR_ENCODING != 'gadget':
+        from base_MILP import xor_MILP
+        return xor_MILP.encode_xor(xor_with_ul_input_no_delta_b, model, inputs, output, operation_name, XOR_ENCODING)
 
     # Check if inputs contain red bits
-    has_r = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_has_r")
-    add_or(model, has_r, [i.r for i in inputs])
+    has_r = or_flag(model, [i.r for i in inputs], f"{operation_name}_has_r")
 
     # Check if inputs contain blue bits
-    has_b = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_has_b")
-    add_or(model, has_b, [i.b for i in inputs])
+    has_b = or_flag(model, [i.b for i in inputs], f"{operation_name}_has_b")
 
     # Check if inputs contain nonlinear bits
-    has_ul = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_has_ul")
-    add_or(model, has_ul, [i.ul for i in inputs])
+    has_ul = or_flag(model, [i.ul for i in inputs], f"{operation_name}_has_ul")
+
+    # delta_r: whether red bits cancel in XOR
+    delta_r = bounded_flag(model, [], [has_r], f"{operation_name}_delta_r")
 
     # Check if inputs contain pure nonlinear bits (type u)
-    sum_temp_u = []
-    for i in inputs:
-        temp = model.addVar(vtype=GRB.BINARY)
-        model.addConstr(temp >= i.ul - i.r - i.b)
-        model.addConstr(temp <= i.ul)
-        model.addConstr(temp <= 1 - i.r)
-        model.addConstr(temp <= 1 - i.b)
-        sum_temp_u.append(temp)
+    sum_temp_u = [bounded_flag(model, [i.ul - i.r - i.b], [i.ul, 1 - i.r, 1 - i.b]) for i in inputs]
 
     # Check if inputs contain nonlinear blue bits (type ub)
-    sum_temp_ub = []
-    for i in inputs:
-        temp = model.addVar(vtype=GRB.BINARY)
-        model.addConstr(temp >= i.ul + i.b - 1)
-        model.addConstr(temp <= i.ul)
-        model.addConstr(temp <= i.b)
-        sum_temp_ub.append(temp)
+    sum_temp_ub = [bounded_flag(model, [i.ul + i.b - 1], [i.ul, i.b]) for i in inputs]
 
     # Constraints for output nonlinear flag
     for i in inputs:
@@ -348,9 +632,6 @@ def xor_with_ul_input_no_delta_b(model, inputs, output, operation_name=''):
     for ub in sum_temp_ub:
         model.addConstr(output.ul >= ub)
 
-    # Constraints for delta_r
-    model.addConstr(delta_r <= has_r)
-
     # Constraints for output condition constant flag
     for i in inputs:
         model.addConstr(output.cond <= 1 - i.ul)
@@ -380,90 +661,49 @@ def and_operation(model, input1, input2, output, operation_name=''):
     AND operation.
     Returns CT and const_cond variables.
     """
-    # CT: whether special CT term is used
-    CT = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_CT')
-    # const_cond: whether condition constant is generated
-    const_cond = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_const_cond')
+    # Inputs that are all constants are evaluated at build time
+    folded = fold_gadget(and_operation, [input1, input2], _bit_pattern(output))
+    if folded is not None:
+        return _apply_fold(output, *folded)
 
     # Determine if each input has color (Red OR Blue)
-    has_c1 = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_c1')
-    has_c2 = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_c2')
-
-    # Linearization of OR: z >= x, z >= y, z <= x+y
-    model.addConstr(has_c1 >= input1.r)
-    model.addConstr(has_c1 >= input1.b)
-    model.addConstr(has_c1 <= input1.r + input1.b)
-    model.addConstr(has_c2 >= input2.r)
-    model.addConstr(has_c2 >= input2.b)
-    model.addConstr(has_c2 <= input2.r + input2.b)
+    has_c1 = or_flag(model, [input1.r, input1.b], f'{operation_name}_has_c1')
+    has_c2 = or_flag(model, [input2.r, input2.b], f'{operation_name}_has_c2')
 
     # new_ul = (input1 has color) AND (input2 has color)
-    new_ul = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_input_color_geq_2')
-    # Linearization of AND: z >= x+y-1, z <= x, z <= y
-    model.addConstr(new_ul >= has_c1 + has_c2 - 1)
-    model.addConstr(new_ul <= has_c1)
-    model.addConstr(new_ul <= has_c2)
-
-    # Constraints for output nonlinear flag
-    model.addConstr(output.ul >= CT)
-    model.addConstr(output.ul <= 1 - const_cond)
-    model.addConstr(output.ul >= new_ul - const_cond)
-    model.addConstr(2 * output.ul >= input1.ul + input2.ul - const_cond)
-    model.addConstr(output.ul <= input1.ul + input2.ul + new_ul)
+    new_ul = bounded_flag(model, [has_c1 + has_c2 - 1], [has_c1, has_c2], f'{operation_name}_input_color_geq_2')
 
     # Check if inputs contain pure nonlinear bits (type u)
-    input_u = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_input_u")
-    sum_temp = []
-    for i in [input1, input2]:
-        temp = model.addVar(vtype=GRB.BINARY)
-        model.addConstr(temp >= i.ul - i.r - i.b)
-        model.addConstr(temp <= i.ul)
-        model.addConstr(temp <= 1 - i.r)
-        model.addConstr(temp <= 2 - i.b)
-        sum_temp.append(temp)
-    add_or(model, input_u, sum_temp)
+    sum_temp = [bounded_flag(model, [i.ul - i.r - i.b], [i.ul, 1 - i.r, 2 - i.b]) for i in [input1, input2]]
+    input_u = or_flag(model, sum_temp, f"{operation_name}_input_u")
 
     # Check if inputs contain red-blue combination (type g)
-    has_g = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_g')
-    sum_temp_g = []
-    for i in [input1, input2]:
-        temp = model.addVar(vtype=GRB.BINARY)
-        model.addConstr(temp >= i.r + i.b - 1)
-        model.addConstr(temp <= i.r)
-        model.addConstr(temp <= i.b)
-        sum_temp_g.append(temp)
-    add_or(model, has_g, sum_temp_g)
+    sum_temp_g = [bounded_flag(model, [i.r + i.b - 1], [i.r, i.b]) for i in [input1, input2]]
+    has_g = or_flag(model, sum_temp_g, f'{operation_name}_has_g')
 
     # Check if new pure nonlinear bit (type u) is generated
-    create_u = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_create_u')
-    # create_u >= (input1.r AND input2.b)
-    model.addConstr(create_u >= input1.r + input2.b - 1)
-    # create_u >= (input2.r AND input1.b)
-    model.addConstr(create_u >= input2.r + input1.b - 1)
-
-    model.addConstr(create_u <= input1.r + input2.r)
-    model.addConstr(create_u <= input1.b + input2.b)
-    model.addConstr(create_u <= has_c1)
-    model.addConstr(create_u <= has_c2)
+    # create_u >= (input1.r AND input2.b), create_u >= (input2.r AND input1.b)
+    create_u = bounded_flag(model,
+                            [input1.r + input2.b - 1, input2.r + input1.b - 1],
+                            [input1.r + input2.r, input1.b + input2.b, has_c1, has_c2],
+                            f'{operation_name}_create_u')
 
-    # Constraints for CT
-    model.addConstr(CT <= 1 - has_g)
-    model.addConstr(CT <= create_u)
+    # CT: whether special CT term is used
+    CT = bounded_flag(model, [], [1 - has_g, create_u], f'{operation_name}_CT')
+    # const_cond: whether condition constant is generated
+    const_cond = bounded_flag(model, [], [input1.r + input2.r + input1.b + input2.b + input1.ul + input2.ul],
+                              f'{operation_name}_const_cond')
 
-    # Constraints for const_cond
-    model.addConstr(const_cond <= input1.r + input2.r + input1.b + input2.b + input1.ul + input2.ul)
+    # Constraints for output nonlinear flag
+    model.addConstr(output.ul >= CT)
+    model.addConstr(output.ul <= 1 - const_cond)
+    model.addConstr(output.ul >= new_ul - const_cond)
+    model.addConstr(2 * output.ul >= input1.ul + input2.ul - const_cond)
+    model.addConstr(output.ul <= input1.ul + input2.ul + new_ul)
 
     # Check if inputs contain red/blue flags
-    has_r = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_r')
-    has_b = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_b')
-
-    model.addConstr(has_r >= input1.r)
-    model.addConstr(has_r >= input2.r)
-    model.addConstr(has_r <= input1.r + input2.r)
-
-    model.addConstr(has_b >= input1.b)
-    model.addConstr(has_b >= input2.b)
-    model.addConstr(has_b <= input1.b + input2.b)
+    has_r = or_flag(model, [input1.r, input2.r], f'{operation_name}_has_r')
+    has_b = or_flag(model, [input1.b, input2.b], f'{operation_name}_has_b')
 
     # Constraints for output red flag
     model.addConstr(output.r <= has_r)
@@ -492,27 +732,17 @@ def and_operation_no_cond(model, input1, input2, output, operation_name=''):
     AND operation without conditional constant generation.
     Returns CT variable.
     """
-    # CT: whether special CT term is used
-    CT = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_CT')
+    # Inputs that are all constants are evaluated at build time
+    folded = fold_gadget(and_operation_no_cond, [input1, input2], _bit_pattern(output))
+    if folded is not None:
+        return _apply_fold(output, *folded)
 
     # Determine if each input has color (Red OR Blue)
-    has_c1 = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_c1')
-    has_c2 = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_c2')
-
-    # Linearization of OR: z >= x, z >= y, z <= x+y
-    model.addConstr(has_c1 >= input1.r)
-    model.addConstr(has_c1 >= input1.b)
-    model.addConstr(has_c1 <= input1.r + input1.b)
-    model.addConstr(has_c2 >= input2.r)
-    model.addConstr(has_c2 >= input2.b)
-    model.addConstr(has_c2 <= input2.r + input2.b)
+    has_c1 = or_flag(model, [input1.r, input1.b], f'{operation_name}_has_c1')
+    has_c2 = or_flag(model, [input2.r, input2.b], f'{operation_name}_has_c2')
 
     # new_ul = (input1 has color) AND (input2 has color)
-    new_ul = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_input_color_geq_2')
-    # Linearization of AND: z >= x+y-1, z <= x, z <= y
-    model.addConstr(new_ul >= has_c1 + has_c2 - 1)
-    model.addConstr(new_ul <= has_c1)
-    model.addConstr(new_ul <= has_c2)
+    new_ul = bounded_flag(model, [has_c1 + has_c2 - 1], [has_c1, has_c2], f'{operation_name}_input_color_geq_2')
 
     # Constraints for output nonlinear flag
     model.addConstr(output.ul >= new_ul)
@@ -521,55 +751,26 @@ def and_operation_no_cond(model, input1, input2, output, operation_name=''):
     model.addConstr(output.ul <= input1.ul + input2.ul + new_ul)
 
     # Check if inputs contain pure nonlinear bits (type u)
-    input_u = model.addVar(vtype=GRB.BINARY, name=f"{operation_name}_input_u")
-    sum_temp = []
-    for i in [input1, input2]:
-        temp = model.addVar(vtype=GRB.BINARY)
-        model.addConstr(temp >= i.ul - i.r - i.b)
-        model.addConstr(temp <= i.ul)
-        model.addConstr(temp <= 1 - i.r)
-        model.addConstr(temp <= 1 - i.b)
-        sum_temp.append(temp)
-    add_or(model, input_u, sum_temp)
+    sum_temp = [bounded_flag(model, [i.ul - i.r - i.b], [i.ul, 1 - i.r, 1 - i.b]) for i in [input1, input2]]
+    input_u = or_flag(model, sum_temp, f"{operation_name}_input_u")
 
     # Check if inputs contain red-blue combination (type g)
-    has_g = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_g')
-    sum_temp_g = []
-    for i in [input1, input2]:
-        temp = model.addVar(vtype=GRB.BINARY)
-        model.addConstr(temp >= i.r + i.b - 1)
-        model.addConstr(temp <= i.r)
-        model.addConstr(temp <= i.b)
-        sum_temp_g.append(temp)
-    add_or(model, has_g, sum_temp_g)
+    sum_temp_g = [bounded_flag(model, [i.r + i.b - 1], [i.r, i.b]) for i in [input1, input2]]
+    has_g = or_flag(model, sum_temp_g, f'{operation_name}_has_g')
 
     # Check if new pure nonlinear bit (type u) is generated
-    create_u = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_create_u')
-    # create_u >= (input1.r AND input2.b)
-    model.addConstr(create_u >= input1.r + input2.b - 1)
-    # create_u >= (input2.r AND input1.b)
-    model.addConstr(create_u >= input2.r + input1.b - 1)
-
-    model.addConstr(create_u <= input1.r + input2.r)
-    model.addConstr(create_u <= input1.b + input2.b)
-    model.addConstr(create_u <= has_c1)
-    model.addConstr(create_u <= has_c2)
+    # create_u >= (input1.r AND input2.b), create_u >= (input2.r AND input1.b)
+    create_u = bounded_flag(model,
+                            [input1.r + input2.b - 1, input2.r + input1.b - 1],
+                            [input1.r + input2.r, input1.b + input2.b, has_c1, has_c2],
+                            f'{operation_name}_create_u')
 
-    # Constraints for CT
-    model.addConstr(CT <= 1 - has_g)
-    model.addConstr(CT <= create_u)
+    # CT: whether special CT term is used
+    CT = bounded_flag(model, [], [1 - has_g, create_u], f'{operation_name}_CT')
 
     # Check if inputs contain red/blue flags
-    has_r = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_r')
-    has_b = model.addVar(vtype=GRB.BINARY, name=f'{operation_name}_has_b')
-
-    model.addConstr(has_r >= input1.r)
-    model.addConstr(has_r >= input2.r)
-    model.addConstr(has_r <= input1.r + input2.r)
-
-    model.addConstr(has_b >= input1.b)
-    model.addConstr(has_b >= input2.b)
-    model.addConstr(has_b <= input1.b + input2.b)
+    has_r = or_flag(model, [input1.r, input2.r], f'{operation_name}_has_r')
+    has_b = or_flag(model, [input1.b, input2.b], f'{operation_name}_has_b')
 
     # Constraints for output red flag
     model.addConstr(output.r <= has_r)
@@ -588,4 +789,371 @@ def and_operation_no_cond(model, input1, input2, output, operation_name=''):
     return {
         "const_cond": 0,
         "CT": CT,
-    }
\ No newline at end of file
+    }
+
+
+# Evaluate gadgets whose input flags are all integer constants at build time
+FOLD_CONSTANTS = True
+
+_fold_cache = {}
+_fold_models = {}
+_folding = False
+
+
+def _bit_pattern(bit):
+    """Flag pattern of a bit: the constant value of each flag, '*' for a variable."""
+    return tuple(f if type(f) == int else '*' for f in (bit.ul, bit.r, bit.b, bit.cond))
+
+
+def _type_pattern(bit_type):
+    """Flag pattern of a bit type accepted by Bit."""
+    if bit_type == '':
+        return ('*', '*', '*', '*')
+    if type(bit_type) == str:
+        return BIT_TYPE_FLAGS[bit_type]
+    return tuple(bit_type)
+
+
+def _call_gadget(gadget, model, inputs, output, operation_name=''):
+    """Call an XOR gadget on an input list, or an AND gadget on an input pair."""
+    if gadget in (and_operation, and_operation_no_cond):
+        return gadget(model, inputs[0], inputs[1], output, operation_name=operation_name)
+    return gadget(model, inputs, output, operation_name)
+
+
+def _fold_model(gadget, arity, output_pattern):
+    """
+    Scratch model of one gadget with free input flags, built once per gadget, arity and
+    output pattern; every constant input combination is then set through the bounds.
+
+    Returns:
+    - (model, input flag variables, result keys, output flags and result values)
+    """
+    key = (gadget.__name__, arity, tuple(output_pattern))
+    if key not in _fold_models:
+        m = gp.Model()
+        m.Params.OutputFlag = 0
+        m.Params.Threads = 1
+        flags = [m.addVar(vtype=GRB.BINARY, name=f"fold_in{i}_{flag}")
+                 for i in range(arity) for flag in ('ul', 'r', 'b', 'cond')]
+        inputs = [Bit.from_flags(m, *flags[4 * i:4 * i + 4]) for i in range(arity)]
+        output = Bit(m, "fold", tuple(output_pattern))
+        result = _call_gadget(gadget, m, inputs, output, "fold")
+        keys = sorted(result)
+        items = [output.ul, output.r, output.b, output.cond] + [result[k] for k in keys]
+        _fold_models[key] = (m, flags, keys, items)
+    return _fold_models[key]
+
+
+def _value(item):
+    """Solution value of a constant, variable or linear expression."""
+    if type(item) == int:
+        return item
+    if isinstance(item, gp.Var):
+        return int(round(item.X))
+    return int(round(item.getValue()))
+
+
+def _evaluate_gadget(gadget, input_flags, output_pattern):
+    """
+    Fix the inputs of the scratch model of a gadget and check whether its output is forced.
+
+    Returns:
+    - (output_flags, result) if the output flags and every returned variable take
+      a single value over all feasible solutions, None otherwise
+    """
+    m, flags, keys, items = _fold_model(gadget, len(input_flags), output_pattern)
+    for var, value in zip(flags, [f for bit_flags in input_flags for f in bit_flags]):
+        var.LB = value
+        var.UB = value
+    # Any feasible solution gives the candidate value
+    m.setObjective(gp.LinExpr())
+    m.optimize()
+    if m.Status != GRB.OPTIMAL:
+        return None
+    point = [_value(v) for v in items]
+
+    # Look for a second solution differing from it on at least one item
+    m.setObjective(gp.quicksum(1 - v if value else v for v, value in zip(items, point) if type(v) != int),
+                   GRB.MAXIMIZE)
+    m.optimize()
+    if m.ObjVal > 0.5:
+        return None
+    return tuple(point[:4]), dict(zip(keys, point[4:]))
+
+
+def fold_gadget(gadget, inputs, output_pattern):
+    """
+    Evaluate a gadget whose input flags are all integer constants.
+    The gadget is built once per arity and output pattern in a separate small model with
+    free input flags (_fold_model), each combination of input flags is set through the
+    bounds; the outcome is cached.
+
+    Parameters:
+    - gadget: xor_with_ul_input, xor_without_ul_input, xor_with_ul_input_no_delta_b, and_operation or and_operation_no_cond
+    - inputs: list of input bits
+    - output_pattern: flag pattern of the output bit, '*' for a free flag
+
+    Returns:
+    - (output_flags, result) with constant output flags and gadget result dict,
+      or None if an input flag is a variable or the output is not forced
+    """
+    global _folding
+    if not FOLD_CONSTANTS or _folding:
+        return None
+    input_flags = tuple((i.ul, i.r, i.b, i.cond) for i in inputs)
+    for flags in input_flags:
+        for f in flags:
+            if type(f) != int:
+                return None
+    key = (gadget.__name__, input_flags, tuple(output_pattern))
+    if key not in _fold_cache:
+        _folding = True
+        try:
+            _fold_cache[key] = _evaluate_gadget(gadget, input_flags, output_pattern)
+        finally:
+            _folding = False
+    if _fold_cache[key] is None:
+        return None
+    output_flags, result = _fold_cache[key]
+    return output_flags, dict(result)
+
+
+def _apply_fold(output, output_flags, result):
+    """Fix the flags of an existing output bit to the folded values by their bounds."""
+    for flag, value in zip((output.ul, output.r, output.b, output.cond), output_flags):
+        if type(flag) != int:
+            flag.LB = value
+            flag.UB = value
+    return result
+
+
+# Emit whole layers of gadgets through the matrix API (addMVar / MLinExpr constraints).
+# Falls back to one gadget call per bit when disabled or when numpy/scipy are missing.
+BATCH_GADGETS = True
+
+# Placeholder for the per-bit operation name inside a batched gadget call
+_JOB = "\x00job\x00"
+
+
+def _matrix_api():
+    """Return (numpy, scipy.sparse) if the gurobipy matrix API can be used, else None."""
+    try:
+        import numpy as np
+        import scipy.sparse as sp
+    except ImportError:
+        return None
+    if not hasattr(gp.MVar, 'fromlist'):
+        return None
+    return np, sp
+
+
+class _LayerModel:
+    """
+    Model proxy handed to a gadget to emit a whole layer at once.
+    addVar creates one variable per job (an MVar), names containing _JOB
+    are expanded with the operation name of each job.
+    """
+
+    __slots__ = ('model', 'names')
+
+    def __init__(self, model, names):
+        self.model = model
+        self.names = names
+
+    def addVar(self, lb=0.0, ub=GRB.INFINITY, vtype=GRB.CONTINUOUS, name=""):
+        if _JOB in name:
+            name = [name.replace(_JOB, n) for n in self.names]
+        return self.model.addMVar(len(self.names), lb=lb, ub=ub, vtype=vtype, name=name or None)
+
+    def addConstr(self, constr, name=""):
+        return self.model.addConstr(constr, name=name)
+
+    def addSOS(self, sos_type, columns):
+        for members in zip(*[column.tolist() for column in columns]):
+            self.model.addSOS(sos_type, list(members))
+
+
+def _flag_column(np, sp, flags):
+    """
+    Stack one flag of all jobs into an MLinExpr.
+    Variables are selected by a sparse 0/1 block, integer constants go to the constant vector.
+    """
+    n = len(flags)
+    rows = [k for k, f in enumerate(flags) if type(f) != int]
+    if len(rows) == n:
+        return gp.MVar.fromlist(flags) + np.zeros(n)
+    const = np.array([0 if type(f) != int else f for f in flags], dtype=float)
+    if not rows:
+        return gp.MLinExpr.zeros(n) + const
+    select = sp.csr_matrix((np.ones(len(rows)), (rows, range(len(rows)))), shape=(n, len(rows)))
+    return select @ gp.MVar.fromlist([flags[k] for k in rows]) + const
+
+
+def dead_result(gadget):
+    """Result dict of a gadget that is not instantiated: every returned flag is 0."""
+    if gadget in (and_operation, and_operation_no_cond):
+        return {"const_cond": 0, "CT": 0}
+    return {"delta_r": 0, "delta_b": 0, 'has_ul': 0, 'new_cond': 0}
+
+
+def _emit_layer(model, jobs, gadget, bit_type, live=None):
+    """
+    Shared driver of emit_xor_layer / emit_and_layer.
+
+    Parameters:
+    - model: Gurobi model object
+    - jobs: list of (inputs, operation_name)
+    - gadget: gadget applied to every job
+    - bit_type: bit type of the output bits, as in Bit
+    - live: optional list of booleans, one per job; jobs marked False are not instantiated
+
+    Returns:
+    - outputs: list of output Bits in job order
+    - results: list of gadget result dicts in job order
+    """
+    outputs = [None] * len(jobs)
+    results = [None] * len(jobs)
+
+    # Jobs outside the live cone get a 'uc' output bit and no gadget,
+    # jobs with constant inputs and a forced output get constant output bits
+    pattern = _type_pattern(bit_type)
+    pending = []
+    for k, (inputs, name) in enumerate(jobs):
+        if live is not None and not live[k]:
+            outputs[k] = Bit(model, name, 'uc')
+            results[k] = dead_result(gadget)
+            continue
+        folded = fold_gadget(gadget, inputs, pattern)
+        if folded is None:
+            pending.append(k)
+        else:
+            flags, results[k] = folded
+            outputs[k] = Bit.from_flags(model, *flags)
+    if not pending:
+        return outputs, results
+
+    api = _matrix_api() if BATCH_GADGETS else None
+    if gadget in (xor_with_ul_input, xor_with_ul_input_no_delta_b) and XOR_ENCODING in PER_BIT_XOR_ENCODINGS:
+        api = None
+    if api is not None:
+        n_inputs = len(jobs[pending[0]][0])
+        for k in pending:
+            inputs = jobs[k][0]
+            if len(inputs) != n_inputs or any(type(f) not in (int, gp.Var) for i in inputs for f in (i.ul, i.r, i.b, i.cond)):
+                api = None
+                break
+
+    if api is None:
+        for k in pending:
+            inputs, name = jobs[k]
+            outputs[k] = Bit(model, name, bit_type)
+            results[k] = _call_gadget(gadget, model, inputs, outputs[k], name)
+        return outputs, results
+
+    # Batch jobs in groups sharing the same constant inputs; these are passed to
+    # the gadget as constant bits so that it can fold them
+    np, sp = api
+    groups = {}
+    for k in pending:
+        signature = tuple(_constant_flags(i) for i in jobs[k][0])
+        groups.setdefault(signature, []).append(k)
+    for signature, members in groups.items():
+        group_outputs, group_results = _emit_group(model, np, sp, [jobs[k] for k in members], signature, gadget, bit_type)
+        for k, output, result in zip(members, group_outputs, group_results):
+            outputs[k] = output
+            results[k] = result
+    return outputs, results
+
+
+def _constant_flags(bit):
+    """Flags of a bit if they are all integer constants, None otherwise."""
+    flags = (bit.ul, bit.r, bit.b, bit.cond)
+    for f in flags:
+        if type(f) != int:
+            return None
+    return flags
+
+
+def _emit_group(model, np, sp, jobs, signature, gadget, bit_type):
+    """Run one batched gadget call for jobs with the same constant input signature."""
+    n = len(jobs)
+    layer = _LayerModel(model, [name for _, name in jobs])
+
+    # One column Bit per input position, one output column Bit
+    input_columns = []
+    for k, constant in enumerate(signature):
+        if constant is not None:
+            input_columns.append(Bit.from_flags(layer, *constant))
+            continue
+        input_columns.append(Bit.from_flags(layer, *[
+            _flag_column(np, sp, [getattr(inputs[k], flag) for inputs, _ in jobs])
+            for flag in ('ul', 'r', 'b', 'cond')
+        ]))
+    output_column = Bit(layer, _JOB, bit_type)
+    column_vars = _call_gadget(gadget, layer, input_columns, output_column, _JOB)
+
+    def split(value):
+        if type(value) == int:
+            return [value] * n
+        return value.tolist()
+
+    flags = [split(getattr(output_column, flag)) for flag in ('ul', 'r', 'b', 'cond')]
+    split_vars = {key: split(value) for key, value in column_vars.items()}
+    outputs = [Bit.from_flags(model, *[f[j] for f in flags]) for j in range(n)]
+    results = [{key: value[j] for key, value in split_vars.items()} for j in range(n)]
+    return outputs, results
+
+
+def live_mask(live, positions):
+    """
+    Per-job live flags for emit_xor_layer / emit_and_layer.
+
+    Parameters:
+    - live: set of live positions, or None to instantiate every job
+    - positions: position of each job, in job order
+
+    Returns:
+    - list of booleans in job order, or None if live is None
+    """
+    if live is None:
+        return None
+    return [p in live for p in positions]
+
+
+def emit_xor_layer(model, jobs, gadget=xor_with_ul_input, bit_type='', live=None):
+    """
+    Create the output bits of a whole layer of XOR operations, e.g. all theta column parities.
+
+    Parameters:
+    - model: Gurobi model object
+    - jobs: list of (inputs, operation_name), one per output bit; all jobs take the same number of inputs
+    - gadget: xor_with_ul_input, xor_without_ul_input or xor_with_ul_input_no_delta_b
+    - bit_type: bit type of the output bits, as in Bit
+    - live: optional list of booleans, one per job; jobs marked False get a constant 'uc'
+      output bit and the zero result of dead_result instead of a gadget
+
+    Returns:
+    - outputs: list of output Bits in job order
+    - results: list of dicts returned by gadget, in job order
+    """
+    return _emit_layer(model, jobs, gadget, bit_type, live)
+
+
+def emit_and_layer(model, jobs, gadget=and_operation, bit_type='', live=None):
+    """
+    Create the output bits of a whole layer of AND operations, e.g. all chi AND terms.
+
+    Parameters:
+    - model: Gurobi model object
+    - jobs: list of ((input1, input2), operation_name), one per output bit
+    - gadget: and_operation or and_operation_no_cond
+    - bit_type: bit type of the output bits, as in Bit
+    - live: optional list of booleans, one per job; jobs marked False get a constant 'uc'
+      output bit and the zero result of dead_result instead of a gadget
+
+    Returns:
+    - outputs: list of output Bits in job order
+    - results: list of dicts returned by gadget, in job order
+    """
+    return _emit_layer(model, jobs, gadget, bit_type, live)
@@ -0,0 +1,641 @@
+from functools import partial, reduce
+
+from base_MILP.operation_MILP import BIT_TYPE_FLAGS
+
+# Flag bits of the uint8 type codes
+UL, R, B, COND = 1, 2, 4, 8
+
+# Type code of every named bit type
+TYPE_CODES = {name: ul * UL | r * R | b * B | cond * COND for name, (ul, r, b, cond) in BIT_TYPE_FLAGS.items()}
+
+
+def encode(values):
+    """
+    Type codes of flag values.
+
+    Parameters:
+    - values: nested lists of (ul, r, b, cond) tuples, e.g. from warm_start.state_values
+
+    Returns:
+    - uint8 array of the nesting shape
+    """
+    import numpy as np
+    flags = np.asarray(values, dtype=np.uint8)
+    return flags[..., 0] * UL | flags[..., 1] * R | flags[..., 2] * B | flags[..., 3] * COND
+
+
+def decode(codes):
+    """
+    Flag values of type codes, the inverse of encode (e.g. for warm_start.set_start).
+
+    Parameters:
+    - codes: uint8 array
+
+    Returns:
+    - nested lists of (ul, r, b, cond) tuples
+    """
+    import numpy as np
+    codes = np.asarray(codes)
+    flags = np.stack([(codes & flag) != 0 for flag in (UL, R, B, COND)], -1).astype(int)
+    if flags.ndim == 1:
+        return tuple(flags.tolist())
+    return [decode(c) for c in codes]
+
+
+def _has(codes, flag):
+    """Bool array: the flag is set."""
+    return (codes & flag) != 0
+
+
+def _pack(ul, r, b):
+    """Type codes of bool ul/r/b arrays (cond 0)."""
+    import numpy as np
+    return ul.view(np.uint8) | r.view(np.uint8) << 1 | b.view(np.uint8) << 2
+
+
+def _any(inputs, test):
+    """Bool array: the test holds for some input."""
+    import numpy as np
+    return reduce(np.logical_or, [test(codes) for codes in inputs])
+
+
+def _decision(value):
+    """A decision (scalar or array) as a bool array."""
+    import numpy as np
+    return np.asarray(value, dtype=bool)
+
+
+# Gadget rules: inputs are a list of type code arrays of the same shape (a pair for the AND
+# gadgets); decisions are scalars or arrays of that shape and are masked to the values the gadget
+# allows, so that the returned results are a feasible point of the gadget; the output condition
+# flag is always 0. Checked against operation_MILP by check_rules.
+
+def xor_with_ul_input(inputs, delta_r=0, delta_b=0):
+    """
+    Rule of operation_MILP.xor_with_ul_input.
+    Red (blue) cancellation needs a red (blue) input and no pure nonlinear input; blue
+    cancellation also needs no nonlinear input. After a red cancellation only a nonlinear blue
+    input keeps the output nonlinear.
+
+    Returns:
+    - output type codes and dict of delta_r, delta_b, has_ul and new_cond
+    """
+    import numpy as np
+    union = reduce(np.bitwise_or, inputs)
+    has_ul, has_r, has_b = _has(union, UL), _has(union, R), _has(union, B)
+    any_u = _any(inputs, lambda codes: codes & (UL | R | B) == UL)
+    any_ub = _any(inputs, lambda codes: codes & (UL | B) == UL | B)
+    delta_r = _decision(delta_r) & has_r & ~any_u
+    delta_b = _decision(delta_b) & has_b & ~has_ul
+    output = _pack(np.where(delta_r, any_ub, has_ul), has_r & ~delta_r & ~any_u, has_b & ~delta_b & ~any_u)
+    return output, {'delta_r': delta_r, 'delta_b': delta_b, 'has_ul': has_ul, 'new_cond': np.zeros_like(has_ul)}
+
+
+def xor_with_ul_input_no_delta_b(inputs, delta_r=0, delta_b=0):
+    """Rule of operation_MILP.xor_with_ul_input_no_delta_b: xor_with_ul_input without blue cancellation (delta_b is ignored)."""
+    return xor_with_ul_input(inputs, delta_r, 0)
+
+
+def xor_without_ul_input(inputs, delta_r=0, delta_b=0):
+    """
+    Rule of operation_MILP.xor_without_ul_input: the output is linear, a colour survives unless cancelled.
+
+    Returns:
+    - output type codes and dict of delta_r, delta_b, has_ul and new_cond
+    """
+    import numpy as np
+    union = reduce(np.bitwise_or, inputs)
+    has_r, has_b = _has(union, R), _has(union, B)
+    delta_r = _decision(delta_r) & has_r
+    delta_b = _decision(delta_b) & has_b
+    zeros = np.zeros_like(has_r)
+    output = _pack(zeros, has_r & ~delta_r, has_b & ~delta_b)
+    return output, {'delta_r': delta_r, 'delta_b': delta_b, 'has_ul': zeros, 'new_cond': zeros}
+
+
+def and_operation(inputs, CT=0, const_cond=0):
+    """
+    Rule of operation_MILP.and_operation.
+    CT needs a red input against a blue one, no red-blue input and no pure nonlinear input, and
+    makes the output nonlinear red and blue. const_cond (if no CT) needs a coloured or nonlinear
+    input, at most one nonlinear input, and makes the output constant. Otherwise the output is
+    nonlinear if an input is or both are coloured, and keeps a colour unless an input is pure
+    nonlinear or red meets blue.
+
+    Returns:
+    - output type codes and dict of CT and const_cond
+    """
+    first, second = inputs
+    union = first | second
+    has_ul, has_r, has_b = _has(union, UL), _has(union, R), _has(union, B)
+    new_ul = _has(first, R | B) & _has(second, R | B)
+    input_u = _any(inputs, lambda codes: codes & (UL | R | B) == UL)
+    has_g = _any(inputs, lambda codes: codes & (R | B) == R | B)
+    create_u = _has(first, R) & _has(second, B) | _has(first, B) & _has(second, R)
+    CT = _decision(CT) & create_u & ~has_g & ~input_u
+    const_cond = _decision(const_cond) & ~CT & _has(union, UL | R | B) & ~(_has(first, UL) & _has(second, UL))
+    keep = ~input_u & ~create_u
+    output = _pack(has_ul | new_ul, CT | has_r & keep, CT | has_b & keep)
+    output[const_cond] = 0
+    return output, {'CT': CT, 'const_cond': const_cond}
+
+
+def and_operation_no_cond(inputs, CT=0, const_cond=0):
+    """Rule of operation_MILP.and_operation_no_cond: and_operation without conditional constants (const_cond is ignored)."""
+    return and_operation(inputs, CT, 0)
+
+
+def check_rules(arities=(1, 2, 3)):
+    """
+    Check every rule against the relation of its operation_MILP gadget (see gadget_verifier):
+    for every input type combination, the decisions that survive the masking must be exactly
+    the feasible ones, and the output and results of each must be a feasible point.
+
+    Parameters:
+    - arities: input counts of the XOR gadgets
+
+    Returns:
+    - list of (gadget name, input types, decisions) where the rule and the gadget disagree
+    """
+    import numpy as np
+    from itertools import product
+    from base_MILP import gadget_verifier, operation_MILP
+
+    checks = [(getattr(operation_MILP, rule.__name__), rule, n, ('delta_r', 'delta_b'))
+              for rule in (xor_with_ul_input, xor_with_ul_input_no_delta_b, xor_without_ul_input) for n in arities]
+    checks += [(getattr(operation_MILP, rule.__name__), rule, 2, ('CT', 'const_cond'))
+               for rule in (and_operation, and_operation_no_cond)]
+    errors = []
+    for gadget, rule, n, names in checks:
+        relation, _, _ = gadget_verifier.gadget_relation(gadget, n)
+        for combination, points in relation.items():
+            feasible = {tuple(dict(results).get(name, 0) for name in names) for _, results in points}
+            inputs = [np.array([TYPE_CODES[t]], dtype=np.uint8) for t in combination]
+            allowed = set()
+            for wanted in product((0, 1), repeat=2):
+                output, results = rule(inputs, *wanted)
+                decisions = tuple(int(results[name][0]) for name in names)
+                allowed.add(decisions)
+                point = (tuple(int(output[0] & flag != 0) for flag in (UL, R, B, COND)),
+                         tuple((key, int(value[0])) for key, value in sorted(results.items())))
+                if point not in points:
+                    errors.append((gadget.__name__, combination, decisions))
+            if points and allowed != feasible:
+                errors.append((gadget.__name__, combination, tuple(sorted(feasible ^ allowed))))
+    return errors
+
+
+def _step(decisions, name):
+    """Decisions of one gadget step of a layer (empty if none are given)."""
+    return (decisions or {}).get(name, {})
+
+
+def _split(decisions, shape, positions):
+    """Decisions of a full layer restricted to the positions of the last axis that are gadgets."""
+    import numpy as np
+    return {key: np.broadcast_to(_decision(value), shape)[..., positions] for key, value in decisions.items()}
+
+
+def _scatter(shape, results, positions):
+    """Full layer results from the results of the gadget positions of the last axis (0 elsewhere)."""
+    import numpy as np
+    full = {}
+    for key, value in results.items():
+        full[key] = np.zeros(shape, dtype=value.dtype)
+        full[key][..., positions] = value
+    return full
+
+
+def _partial_xor(gadget, state, xor_inputs, decisions):
+    """
+    XOR of some positions of the last axis of a state, the other positions are copied
+    (the temp1/new steps of P_S).
+
+    Parameters:
+    - xor_inputs: dict from output position to its input positions
+    """
+    positions = sorted(xor_inputs)
+    inputs = [state[..., [xor_inputs[x][k] for x in positions]] for k in range(2)]
+    bits, results = gadget(inputs, **_split(decisions, state.shape, positions))
+    new_state = state.copy()
+    new_state[..., positions] = bits
+    return new_state, _scatter(state.shape, results, positions)
+
+
+def _exclusive(codes):
+    """Per candidate: no bit is both red and blue."""
+    return ~(codes & (R | B) == R | B).reshape(len(codes), -1).any(1)
+
+
+_permutations = {}
+
+
+def _permute(state, permutation):
+    """Apply a bit permutation of a cipher module (rho, pi, rho_west, ...) to a batch of states."""
+    import numpy as np
+    shape = state.shape[1:]
+    key = (permutation, shape)
+    if key not in _permutations:
+        # The module function applied to a state holding the flat index of every bit
+        _permutations[key] = np.array(permutation(np.arange(np.prod(shape)).reshape(shape).tolist())).reshape(-1)
+    return state.reshape(len(state), -1)[:, _permutations[key]].reshape(state.shape)
+
+
+# Layers: layer(state, decisions) with a batch of states (candidates on axis 0) and a dict from
+# gadget step ('C', 'D', 'new', 'and', 'temp1', 'temp2') to its decisions; returns the new state,
+# a dict of intermediate states, a dict from gadget step to its results (same shapes as the step
+# outputs, e.g. [n][z][x] for C) and a bool array telling which candidates the model admits.
+
+def keccak_theta(state, decisions=None, variant='generic'):
+    """
+    Keccak theta as built by Keccak_MILP.create_theta_operation ('generic'),
+    create_second_theta_operation ('second') or create_first_theta_operation ('first').
+    State codes [n][z][y][x].
+    """
+    import numpy as np
+    n, lanes = state.shape[:2]
+    if variant == 'first':
+        zeros = np.zeros((n, lanes, 5), dtype=bool)
+        row = state[:, :, 0, :]
+        results = {'C': {'delta_r': _has(row, R), 'delta_b': _has(row, B), 'new_cond': zeros},
+                   'D': {'delta_r': zeros, 'delta_b': zeros, 'new_cond': zeros},
+                   'new': {key: np.zeros(state.shape, dtype=bool) for key in ('delta_r', 'delta_b', 'new_cond')}}
+        constant = np.zeros((n, lanes, 5), dtype=np.uint8)
+        return state, {'C': constant, 'D': constant}, results, True
+
+    gadget = xor_with_ul_input if variant == 'second' else xor_with_ul_input_no_delta_b
+    # C[z][x] = A[z][0][x] ⊕ ... ⊕ A[z][4][x]
+    C, C_results = gadget([state[:, :, y, :] for y in range(5)], **_step(decisions, 'C'))
+    # D[z][x] = C[z][x-1] ⊕ C[z-1][x+1]
+    D, D_results = gadget([np.roll(C, 1, axis=2), np.roll(np.roll(C, 1, axis=1), -1, axis=2)], **_step(decisions, 'D'))
+    # A'[z][y][x] = A[z][y][x] ⊕ D[z][x]
+    new_state, new_results = gadget([state, D[:, :, None, :]], **_step(decisions, 'new'))
+    return new_state, {'C': C, 'D': D}, {'C': C_results, 'D': D_results, 'new': new_results}, True
+
+
+def keccak_rho(state, decisions=None):
+    """Keccak_MILP.rho on [n][z][y][x] codes."""
+    from base_MILP import Keccak_MILP
+    return _permute(state, Keccak_MILP.rho), {}, {}, True
+
+
+def keccak_pi(state, decisions=None):
+    """Keccak_MILP.pi on [n][z][y][x] codes."""
+    from base_MILP import Keccak_MILP
+    return _permute(state, Keccak_MILP.pi), {}, {}, True
+
+
+def _chi(state, axis, and_gadget, xor_gadget, decisions):
+    """A[i] ⊕ (A[i+1] AND A[i+2]) along an axis of the state."""
+    import numpy as np
+    and_bits, and_results = and_gadget([np.roll(state, -1, axis=axis), np.roll(state, -2, axis=axis)],
+                                       **_step(decisions, 'and'))
+    new_state, new_results = xor_gadget([state, and_bits], **_step(decisions, 'new'))
+    return new_state, and_bits, and_results, new_results
+
+
+def _first_chi_512(state):
+    """Keccak_MILP.create_first_chi_operation_512, with every column flag r_col as large as its constraints allow."""
+    import numpy as np
+    r, b = _has(state, R), _has(state, B)
+    ul_new = np.zeros(state.shape, dtype=bool)
+    r_new = np.zeros(state.shape, dtype=bool)
+    b_new = np.zeros(state.shape, dtype=bool)
+    const_cond = np.zeros(state.shape, dtype=np.uint8)
+    rows = [0, 2, 4]
+
+    # Red and blue cannot be adjacent
+    feasible = ~((r[:, :, rows, 0] & b[:, :, rows, 1]) | (b[:, :, rows, 0] & r[:, :, rows, 1])).any((1, 2))
+
+    r_col_0 = r[:, :, [0, 1, 2, 4], 0].any(2)
+    r_col_4 = r[:, :, rows, 0].any(2)
+    for y in rows:
+        r0, r1 = r[:, :, y, 0], r[:, :, y, 1]
+        r_new[:, :, y, 0] = r0 | r1 & r_col_0
+        b_new[:, :, y, 0] = b[:, :, y, 0]
+        r_new[:, :, y, 1] = r1
+        b_new[:, :, y, 1] = b[:, :, y, 1]
+        ul_new[:, :, y, 4] = r0 & r1
+        r_new[:, :, y, 4] = r0
+    # Row y=1
+    r0, b0 = r[:, :, 1, 0], b[:, :, 1, 0]
+    r_new[:, :, 1, 0] = r0
+    b_new[:, :, 1, 0] = b0
+    r_new[:, :, 1, 4] = r0 & r_col_4
+    const_cond[:, :, 1, 3] = b0.astype(np.uint8) + r0
+    const_cond[:, :, 1, 4] = b0.astype(np.uint8) + (r0 & ~r_new[:, :, 1, 4])
+    # Row y=3
+    r1, b1 = r[:, :, 3, 1], b[:, :, 3, 1]
+    r_new[:, :, 3, 0] = r1 & r_col_0
+    r_new[:, :, 3, 1] = r1
+    b_new[:, :, 3, 1] = b1
+    const_cond[:, :, 3, 0] = b1.astype(np.uint8) + (r1 & ~r_new[:, :, 3, 0])
+    const_cond[:, :, 3, 4] = b1.astype(np.uint8) + r1
+    return _pack(ul_new, r_new, b_new), const_cond, feasible
+
+
+def _first_chi_384(state):
+    """Keccak_MILP.create_first_chi_operation_384, with every column flag r_col as large as its constraints allow."""
+    import numpy as np
+    r, b = _has(state, R), _has(state, B)
+    ul_new = np.zeros(state.shape, dtype=bool)
+    r_new = np.zeros(state.shape, dtype=bool)
+    b_new = np.zeros(state.shape, dtype=bool)
+    const_cond = np.zeros(state.shape, dtype=np.uint8)
+    three, two = [0, 1, 3], [2, 4]
+
+    # Red and blue cannot be in the same row, and no nonlinear bit in rows 2 and 4
+    def crossed(i, j, rows):
+        return (r[:, :, rows, i] & b[:, :, rows, j]) | (b[:, :, rows, i] & r[:, :, rows, j])
+    conflict = (crossed(0, 1, three) | crossed(0, 2, three) | crossed(2, 1, three)).any((1, 2))
+    conflict |= (crossed(0, 1, two) | (r[:, :, two, 0] & r[:, :, two, 1])).any((1, 2))
+
+    r_col_1 = r[:, :, :, 1].any(2)
+    r1_new = r[:, :, three, 1] | r[:, :, three, 2] & r_col_1[:, :, None]
+    r_col_0 = r[:, :, :, 0].any(2) | (r[:, :, three, 2] | r1_new).any(2)
+    r_col_4 = (r[:, :, three, 0] | r[:, :, three, 1]).any(2)
+    for k, y in enumerate(three):
+        r0, r1, r2 = r[:, :, y, 0], r[:, :, y, 1], r[:, :, y, 2]
+        ul_new[:, :, y, 0] = r2 & r1
+        r_new[:, :, y, 0] = r_col_0 & (r0 | r2 | r1_new[:, :, k])
+        b_new[:, :, y, 0] = b[:, :, y, 0]
+        r_new[:, :, y, 1] = r1_new[:, :, k]
+        b_new[:, :, y, 1] = b[:, :, y, 1]
+        r_new[:, :, y, 2] = r2
+        b_new[:, :, y, 2] = b[:, :, y, 2]
+        ul_new[:, :, y, 4] = r0 & r1
+        r_new[:, :, y, 4] = r0 | r1
+    for y in two:
+        r0, r1, b0, b1 = r[:, :, y, 0], r[:, :, y, 1], b[:, :, y, 0], b[:, :, y, 1]
+        r_new[:, :, y, 0] = r0 | r1 & r_col_0
+        b_new[:, :, y, 0] = b0
+        r_new[:, :, y, 1] = r1
+        b_new[:, :, y, 1] = b1
+        r_new[:, :, y, 4] = r0 & r_col_4
+        const_cond[:, :, y, 0] = (b1 & ~b0).astype(np.uint8) + (r1 & ~r_new[:, :, y, 0])
+        const_cond[:, :, y, 4] = (b0.astype(np.uint8) + b1 + (r0 & ~r_new[:, :, y, 4]) + (r1 & ~r_new[:, :, y, 4]))
+    return _pack(ul_new, r_new, b_new), const_cond, ~conflict
+
+
+def keccak_chi(state, decisions=None, variant='generic'):
+    """
+    Keccak chi as built by Keccak_MILP.create_chi_operation ('generic'), create_second_chi_operation
+    ('second'), create_first_chi_operation_512 ('first_512') or create_first_chi_operation_384 ('first_384').
+    Condition constants are not propagated, so the second chi takes no const_cond; the first chis
+    have no decisions and report the const_cond of their AND terms.
+    State codes [n][z][y][x].
+    """
+    import numpy as np
+    if variant in ('first_512', 'first_384'):
+        new_state, const_cond, feasible = (_first_chi_512 if variant == 'first_512' else _first_chi_384)(state)
+        zeros = np.zeros(state.shape, dtype=bool)
+        results = {'and': {'CT': zeros, 'const_cond': const_cond},
+                   'new': {'delta_r': zeros, 'delta_b': zeros, 'has_ul': zeros, 'new_cond': zeros}}
+        return new_state, {}, results, feasible
+    if variant == 'second':
+        gadgets = (and_operation_no_cond, xor_with_ul_input_no_delta_b)
+    else:
+        gadgets = (and_operation_no_cond, xor_with_ul_input)
+    new_state, and_bits, and_results, new_results = _chi(state, 3, *gadgets, decisions)
+    return new_state, {'and': and_bits}, {'and': and_results, 'new': new_results}, True
+
+
+def xoodyak_theta(state, decisions=None, variant='generic'):
+    """
+    Xoodyak theta as built by Xoodyak_MILP.create_theta_operation ('generic') or
+    create_first_theta_operation ('first', where C and D cannot be both red and blue).
+    State codes [n][z][y][x].
+    """
+    import numpy as np
+    gadget = xor_without_ul_input if variant == 'first' else xor_with_ul_input_no_delta_b
+    # C[z][x] = A[z][0][x] ⊕ A[z][1][x] ⊕ A[z][2][x]
+    C, C_results = gadget([state[:, :, y, :] for y in range(3)], **_step(decisions, 'C'))
+    # D[z][x] = C[z-5][x-1] ⊕ C[z-14][x-1]
+    shifted = np.roll(C, 1, axis=2)
+    D, D_results = gadget([np.roll(shifted, 5, axis=1), np.roll(shifted, 14, axis=1)], **_step(decisions, 'D'))
+    # A'[z][y][x] = A[z][y][x] ⊕ D[z][x]
+    new_state, new_results = gadget([state, D[:, :, None, :]], **_step(decisions, 'new'))
+    feasible = _exclusive(C) & _exclusive(D) if variant == 'first' else True
+    return new_state, {'C': C, 'D': D}, {'C': C_results, 'D': D_results, 'new': new_results}, feasible
+
+
+def xoodyak_rho_west(state, decisions=None):
+    """Xoodyak_MILP.rho_west on [n][z][y][x] codes."""
+    from base_MILP import Xoodyak_MILP
+    return _permute(state, Xoodyak_MILP.rho_west), {}, {}, True
+
+
+def xoodyak_rho_east(state, decisions=None):
+    """Xoodyak_MILP.rho_east on [n][z][y][x] codes."""
+    from base_MILP import Xoodyak_MILP
+    return _permute(state, Xoodyak_MILP.rho_east), {}, {}, True
+
+
+def xoodyak_chi(state, decisions=None, variant='generic'):
+    """
+    Xoodyak chi as built by Xoodyak_MILP.create_chi_operation ('generic') or create_first_chi_operation
+    ('first', without const_cond as condition constants are not propagated).
+    State codes [n][z][y][x].
+    """
+    new_state, and_bits, and_results, new_results = _chi(state, 2, and_operation_no_cond, xor_with_ul_input_no_delta_b,
+                                                         decisions)
+    return new_state, {'and': and_bits}, {'and': and_results, 'new': new_results}, True
+
+
+def ascon_P_S(state, decisions=None, variant='generic'):
+    """
+    Ascon P_S as built by Ascon_MILP.create_P_S_operation ('generic') or create_second_P_S_operation
+    ('second', without const_cond as condition constants are not propagated).
+    State codes [n][z][x].
+    """
+    temp1_gadget = xor_without_ul_input if variant == 'second' else xor_with_ul_input_no_delta_b
+    temp_state_1, temp1_results = _partial_xor(temp1_gadget, state, {0: (0, 4), 2: (1, 2), 4: (3, 4)},
+                                               _step(decisions, 'temp1'))
+    temp_state_2, and_bits, and_results, temp2_results = _chi(
+        temp_state_1, 2, and_operation_no_cond, xor_with_ul_input_no_delta_b,
+        {'and': _step(decisions, 'and'), 'new': _step(decisions, 'temp2')})
+    new_state, new_results = _partial_xor(xor_with_ul_input_no_delta_b, temp_state_2, {0: (0, 4), 1: (1, 0), 3: (2, 3)},
+                                          _step(decisions, 'new'))
+    states = {'temp_state_1': temp_state_1, 'and': and_bits, 'temp_state_2': temp_state_2}
+    results = {'temp1': temp1_results, 'and': and_results, 'temp2': temp2_results, 'new': new_results}
+    return new_state, states, results, True
+
+
+def ascon_P_L(state, decisions=None, variant='generic'):
+    """
+    Ascon P_L as built by Ascon_MILP.create_P_L_operation ('generic') or create_first_P_L_operation
+    ('first', whose outputs must be linear: a red cancellation is forced wherever an input is
+    nonlinear). State codes [n][z][x].
+    """
+    import numpy as np
+    from base_MILP import Ascon_MILP
+    gadget = xor_with_ul_input if variant == 'first' else xor_with_ul_input_no_delta_b
+    # A'[z][x] = A[z][x] ⊕ A[z+offset_0][x] ⊕ A[z+offset_1][x]
+    inputs = [state] + [np.stack([np.roll(state[:, :, x], -offsets[k], axis=1)
+                                  for x, offsets in enumerate(Ascon_MILP.P_L_offsets)], 2) for k in range(2)]
+    decisions = dict(_step(decisions, 'new'))
+    if variant == 'first':
+        # Linear outputs: a nonlinear input must be cancelled
+        decisions['delta_r'] = _decision(decisions.get('delta_r', 0)) | _has(reduce(np.bitwise_or, inputs), UL)
+    new_state, new_results = gadget(inputs, **decisions)
+    feasible = ~_has(new_state, UL).reshape(len(state), -1).any(1) if variant == 'first' else True
+    return new_state, {}, {'new': new_results}, feasible
+
+
+def keccak_plan(theta, chi):
+    """
+    Layers of a Keccak-f model, rounds theta, rho, pi, chi.
+
+    Parameters:
+    - theta: theta variant of every round ('first', 'second', 'generic'), as in the model_config of the search scripts
+    - chi: chi variant of every round ('first_512', 'first_384', 'second', 'generic')
+
+    Returns:
+    - plan for evaluate
+    """
+    return [[('theta', partial(keccak_theta, variant=t)), ('rho', keccak_rho), ('pi', keccak_pi),
+             ('chi', partial(keccak_chi, variant=c))] for t, c in zip(theta, chi)]
+
+
+def xoodyak_plan(theta, chi):
+    """
+    Layers of a Xoodoo model, rounds theta, rho_west, chi, rho_east.
+
+    Parameters:
+    - theta: theta variant of every round ('first', 'generic')
+    - chi: chi variant of every round ('first', 'generic'); rounds past its end are theta only,
+      as the last round of the Xoodyak searches
+
+    Returns:
+    - plan for evaluate
+    """
+    plan = []
+    for round_num, t in enumerate(theta):
+        steps = [('theta', partial(xoodyak_theta, variant=t))]
+        if round_num < len(chi):
+            steps += [('rho_west', xoodyak_rho_west), ('chi', partial(xoodyak_chi, variant=chi[round_num])),
+                      ('rho_east', xoodyak_rho_east)]
+        plan.append(steps)
+    return plan
+
+
+def ascon_plan(P_S, P_L):
+    """
+    Layers of an Ascon model, rounds P_S, P_L.
+
+    Parameters:
+    - P_S: P_S variant of every round ('second', 'generic'), or None for a P_S layer that is not
+      mirrored (the first-round S-box models of Ascon_MILP): evaluate then starts from its output
+    - P_L: P_L variant of every round ('first', 'generic')
+
+    Returns:
+    - plan for evaluate
+    """
+    plan = []
+    for s, l in zip(P_S, P_L):
+        steps = [] if s is None else [('P_S', partial(ascon_P_S, variant=s))]
+        plan.append(steps + [('P_L', partial(ascon_P_L, variant=l))])
+    return plan
+
+
+def evaluate(initial, plan, decisions=None):
+    """
+    Propagate a batch of colourings through the layers of a plan.
+
+    Parameters:
+    - initial: uint8 type codes of the initial states, candidates on axis 0 (e.g. [n][z][y][x])
+    - plan: list of rounds, each a list of (name, layer), e.g. from keccak_plan
+    - decisions: optional dict from (round_num, layer name, gadget step) to the decisions of the
+      step, e.g. {(1, 'theta', 'C'): {'delta_r': array [n][z][x]}}; missing decisions are 0 (no
+      cancellation, no CT), 1 everywhere cancels wherever the gadget allows it
+
+    Returns:
+    - trace: dict with 'initial', 'states' (one dict per round of the layer outputs and their
+      intermediate states), 'results' (dict from (round_num, layer name, gadget step) to the
+      results of the step, i.e. the decisions actually taken and has_ul), 'final' (last state)
+      and 'feasible' (bool per candidate, False where a layer constraint is violated)
+    """
+    import numpy as np
+    initial = np.asarray(initial, dtype=np.uint8)
+    decisions = decisions or {}
+    trace = {'initial': initial, 'states': [], 'results': {}, 'feasible': np.ones(len(initial), dtype=bool)}
+    state = initial
+    for round_num, steps in enumerate(plan):
+        states = {}
+        for name, layer in steps:
+            layer_decisions = {key[2]: value for key, value in decisions.items() if key[:2] == (round_num, name)}
+            state, intermediate, results, feasible = layer(state, layer_decisions)
+            states.update(intermediate)
+            states[name] = state
+            for step, step_results in results.items():
+                trace['results'][(round_num, name, step)] = step_results
+            trace['feasible'] &= feasible
+        trace['states'].append(states)
+    trace['final'] = state
+    return trace
+
+
+def total(trace, key):
+    """
+    Sum of one result over all gadget steps, per candidate.
+
+    Parameters:
+    - trace: dict from evaluate
+    - key: 'delta_r', 'delta_b', 'new_cond', 'CT' or 'const_cond'
+
+    Returns:
+    - int array [n]
+    """
+    import numpy as np
+    n = len(trace['initial'])
+    counts = np.zeros(n, dtype=int)
+    for results in trace['results'].values():
+        if key in results:
+            counts += results[key].reshape(n, -1).sum(1)
+    return counts
+
+
+def count(codes, flag):
+    """Number of bits with a flag (UL, R, B or COND) set, per candidate."""
+    return _has(codes, flag).reshape(len(codes), -1).sum(1)
+
+
+def degrees_of_freedom(trace):
+    """
+    Red and blue degrees of freedom of the search scripts: initial red (blue) bits minus red (blue) cancellations.
+
+    Returns:
+    - (red, blue) int arrays [n]
+    """
+    return (count(trace['initial'], R) - total(trace, 'delta_r'),
+            count(trace['initial'], B) - total(trace, 'delta_b'))
+
+
+def temp_degree(red, blue, equations, cut=0):
+    """temp_degree of the search scripts: min(red - cut, blue - cut, equations), per candidate."""
+    import numpy as np
+    return np.minimum(np.minimum(red - cut, blue - cut), equations)
+
+
+def equations(state, groups, coloured=False):
+    """
+    Matching equations of the search scripts: an equation counts if every bit of its group is
+    usable, i.e. linear (the `equation <= 1 - ul` rows) or, with coloured, linear or coloured
+    (the `equation <= 1 - ul + r + b` rows).
+
+    Parameters:
+    - state: uint8 type codes, candidates on axis 0 (usually trace['final'])
+    - groups: list of equations, each a list of bit positions (e.g. (z, y, x)) without the candidate axis
+    - coloured: also count coloured nonlinear bits as usable
+
+    Returns:
+    - int array [n]
+    """
+    import numpy as np
+    usable = ~_has(state, UL)
+    if coloured:
+        usable |= _has(state, R | B)
+    counts = np.zeros(len(state), dtype=int)
+    for group in groups:
+        counts += usable[(slice(None),) + tuple(np.array(group).T)].all(1)
+    return counts
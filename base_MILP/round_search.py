@@ -0,0 +1,124 @@
+import time
+
+import gurobipy as gp
+
+from base_MILP.model_cache import cached_model
+from base_MILP.scheme_sweep import apply_scheme
+from base_MILP.warm_start import set_start, state_values
+
+
+def prefix_states(handles, state_keys):
+    """
+    States of a built model in round order: the initial state, then the states of every
+    round under state_keys (entries that are None, e.g. the missing chi of a last round, are skipped).
+    A model with more rounds has the states of a model with fewer rounds as a prefix.
+
+    Parameters:
+    - handles: builder handles with 'initial_state' and 'intermediate_states'
+    - state_keys: keys of the per-round dicts of intermediate_states, in evaluation order
+
+    Returns:
+    - list of states
+    """
+    states = [handles['initial_state']]
+    for round_state in handles['intermediate_states']:
+        states += [round_state[k] for k in state_keys if round_state.get(k) is not None]
+    return states
+
+
+def extend_rounds(build, rounds, job, state_keys, config=None, prepare=None, solve=None,
+                  time_limit=None, hint=False, name="MILP", env=None):
+    """
+    Round-incremental search for one blue scheme: solve the model with the fewest rounds,
+    then seed the flags of the shared prefix of the next model from its solution (as MIP
+    start or as variable hints) and solve that one, up to the last round count.
+    Gurobi completes the partial start, so the longer searches begin with an incumbent.
+
+    Parameters:
+    - build: function(model, num_rounds) building the rounds and returning the handles
+      ('colours', 'initial_state', 'intermediate_states')
+    - rounds: increasing round counts, e.g. range(2, num_rounds + 1)
+    - job: tuple (key, scheme_index, ..., blue_scheme) as for scheme_runner.run_schemes
+    - state_keys: keys of the round states shared between the round counts, see prefix_states
+    - config: optional function(num_rounds) giving the model cache configuration; None builds every model
+    - prepare: optional function(job, model, handles) setting the other bounds of the job
+    - solve: optional function(job, model, handles) solving the model of the last round count
+      and returning its metrics (e.g. the solve_scheme of the script); plain optimize otherwise
+    - time_limit: optional TimeLimit of the solves before the last round count
+    - hint: seed VarHintVal instead of Start
+    - name: Gurobi model name
+    - env: optional Gurobi environment
+
+    Returns:
+    - list with one dict per round count: rounds, status, objective, bound, runtime,
+      seeded (number of variables seeded), change (objective minus the previous one), metrics
+    """
+    rounds = list(rounds)
+    report = []
+    values = None
+    for k, num_rounds in enumerate(rounds):
+        if config is not None:
+            model, handles = cached_model(config(num_rounds), lambda m: build(m, num_rounds), name, env=env)
+        else:
+            model = gp.Model(name, env)
+            handles = build(model, num_rounds)
+        apply_scheme(handles['colours'], job[-1])
+        if prepare is not None:
+            prepare(job, model, handles)
+
+        states = prefix_states(handles, state_keys)
+        seeded = 0
+        if values is not None:
+            # zip stops at the end of the shorter prefix
+            for state, state_value in zip(states, values):
+                seeded += set_start(state, state_value, hint)
+            print(f"{num_rounds} rounds: seeded {seeded} variables from the {rounds[k - 1]}-round solution")
+
+        last = k == len(rounds) - 1
+        start = time.time()
+        metrics = None
+        if last and solve is not None:
+            metrics = solve(job, model, handles)
+        else:
+            if not last and time_limit is not None:
+                model.setParam('TimeLimit', time_limit)
+            model.optimize()
+
+        row = {'rounds': num_rounds, 'status': model.Status, 'objective': None, 'bound': None,
+               'runtime': time.time() - start, 'seeded': seeded, 'change': None, 'metrics': metrics}
+        if model.SolCount > 0:
+            row['objective'] = model.ObjVal
+            row['bound'] = model.ObjBound
+            values = [state_values(state) for state in states]
+            if report and report[-1]['objective'] is not None:
+                row['change'] = row['objective'] - report[-1]['objective']
+        else:
+            # Nothing to seed the next round count with
+            values = None
+        report.append(row)
+        model.dispose()
+
+    print(round_table(job, report))
+    return report
+
+
+def round_table(job, report):
+    """
+    Text table of an extend_rounds report.
+
+    Parameters:
+    - job: job of the report
+    - report: list returned by extend_rounds
+
+    Returns:
+    - table string
+    """
+    def cell(value):
+        return f"{value:>12.4f}" if isinstance(value, (int, float)) else f"{'-':>12}"
+
+    lines = [f"Job {tuple(job[:-1])}",
+             f"{'rounds':>8}{'status':>8}{'objective':>12}{'bound':>12}{'change':>12}{'runtime':>12}{'seeded':>8}"]
+    for row in report:
+        lines.append(f"{row['rounds']:>8}{row['status']:>8}" + cell(row['objective']) + cell(row['bound']) +
+                     cell(row['change']) + cell(row['runtime']) + f"{row['seeded']:>8}")
+    return "\n".join(lines)
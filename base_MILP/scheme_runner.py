@@ -0,0 +1,334 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import gurobipy as gp
+from gurobipy import GRB
+
+from base_MILP import model_cache, scheme_sweep
+from base_MILP.model_cache import cached_model
+from base_MILP.scheme_sweep import apply_scheme
+
+# Gurobi threads per scheme solve; MILP parallel efficiency drops quickly past 8-16 threads,
+# so a large machine is better used by several solves at once
+THREADS_PER_JOB = 8
+
+# Metrics shown in the ranked table, the table is sorted by the first one
+SUMMARY_KEYS = ('temp_degree', 'Red_variables', 'Blue_variables', 'Total_equations')
+
+# Share the best objective found so far between the workers: it is the Cutoff of every new
+# solve, and a running solve stops once its bound cannot beat it
+SHARED_CUTOFF = True
+
+# Seconds between two reads of the shared incumbent in the callback
+CUTOFF_POLL = 1.0
+
+# Bound every scheme first and solve them best bound first, skipping those whose bound
+# cannot beat the best objective found so far
+SCREEN_SCHEMES = True
+
+# 0 bounds a scheme by the LP relaxation, n > 0 by the bound of a MIP solve limited to n nodes
+SCREEN_NODE_LIMIT = 0
+
+# Model and handles of the worker process, loaded once by _init_worker
+_worker = dict()
+
+
+def _init_worker(config, build, name, threads, sweep, incumbent):
+    """Load the shared model of the sweep in a worker process."""
+    _worker.update(build=build, name=name, threads=threads, sweep=sweep, incumbent=incumbent)
+    if sweep:
+        _worker['model'], _worker['handles'] = cached_model(config, build, name)
+        _worker['model'].setParam('Threads', threads)
+
+
+def _run_job(solve, prepare, job):
+    """Apply the scheme of job to the worker's model and solve it."""
+    if _worker['sweep']:
+        model = _worker['model']
+        handles = _worker['handles']
+    else:
+        model = gp.Model(_worker['name'])
+        handles = _worker['build'](model)
+        model.setParam('Threads', _worker['threads'])
+    apply_scheme(handles['colours'], job[-1])
+    if prepare is not None:
+        prepare(job, model, handles)
+    metrics = solve(job, model, handles)
+    if model.SolCount > 0:
+        # Score of the solution as a maximization, seeds the shared incumbent of later runs
+        metrics.setdefault('score', -model.ModelSense * model.ObjVal)
+    return metrics
+
+
+def _cutoff_callback(model, where):
+    """Publish new incumbents and stop once the bound cannot beat the best one of all workers."""
+    incumbent, lock = model._incumbent
+    sense = model.ModelSense
+    if where == GRB.Callback.MIPSOL:
+        score = -sense * model.cbGet(GRB.Callback.MIPSOL_OBJ)
+        with lock:
+            if score > incumbent.value:
+                incumbent.value = score
+    elif where == GRB.Callback.MIP:
+        now = time.time()
+        if now - model._last_poll < CUTOFF_POLL:
+            return
+        model._last_poll = now
+        bound = -sense * model.cbGet(GRB.Callback.MIP_OBJBND)
+        best = -sense * model.cbGet(GRB.Callback.MIP_OBJBST)
+        if bound <= incumbent.value + 1e-6 and best < incumbent.value:
+            # Another scheme already reached what this one can reach at best
+            model.terminate()
+
+
+def optimize(model):
+    """
+    Optimize a model inside a run_schemes worker. With SHARED_CUTOFF the best objective
+    of all workers is the Cutoff of the solve and the solve is terminated once its bound
+    cannot beat it; outside of a worker, and for models with hierarchical objectives
+    (NumObj > 1, no single objective to cut off), this is a plain optimize.
+
+    Parameters:
+    - model: Gurobi model object
+
+    Returns:
+    - True if the model has a solution, False if it was cut off by the other schemes
+    """
+    shared = _worker.get('incumbent')
+    if shared is None or model.NumObj > 1:
+        model.optimize()
+        return model.SolCount > 0
+
+    incumbent, lock = shared
+    sense = model.ModelSense
+    if incumbent.value > -GRB.INFINITY:
+        model.setParam('Cutoff', -sense * incumbent.value)
+    else:
+        model.setParam('Cutoff', sense * GRB.INFINITY)
+    model._incumbent = shared
+    model._last_poll = 0
+    model.optimize(_cutoff_callback)
+    return model.SolCount > 0
+
+
+def scheme_bounds(model, handles, jobs, prepare=None, node_limit=SCREEN_NODE_LIMIT):
+    """
+    Cheap upper bound on the objective of every scheme, from the LP relaxation of the
+    model or from a node-limited MIP solve. Only bounds change between two schemes, so
+    the LP solves start from the previous basis.
+
+    Parameters:
+    - model: Gurobi model object of the sweep (changed in place, restored afterwards)
+    - handles: builder handles, must contain 'colours'
+    - jobs: list of jobs, the last entry of a job is its blue scheme
+    - prepare: optional function(job, model, handles) applying the other per-job bounds
+    - node_limit: 0 for the LP relaxation, else the node limit of the MIP solves
+
+    Returns:
+    - list with the bound of every job as a maximization score (-inf if infeasible)
+    """
+    variables = model.getVars()
+    vtypes = model.getAttr('VType', variables)
+    output_flag = model.Params.OutputFlag
+    model.setParam('OutputFlag', 0)
+    if node_limit:
+        model.setParam('NodeLimit', node_limit)
+    else:
+        model.setAttr('VType', variables, [GRB.CONTINUOUS] * len(variables))
+
+    sense = model.ModelSense
+    bounds = []
+    for number, job in enumerate(jobs):
+        apply_scheme(handles['colours'], job[-1])
+        if prepare is not None:
+            prepare(job, model, handles)
+        model.optimize()
+        if model.Status in (GRB.INFEASIBLE, GRB.INF_OR_UNBD, GRB.CUTOFF):
+            bound = -GRB.INFINITY
+        elif node_limit:
+            bound = -sense * model.ObjBound
+        elif model.Status == GRB.OPTIMAL:
+            bound = -sense * model.ObjVal
+        else:
+            bound = GRB.INFINITY
+        bounds.append(bound)
+        print(f"Screening {number + 1}/{len(jobs)}: job {tuple(job[:-1])} bound {bound}")
+
+    if node_limit:
+        model.setParam('NodeLimit', GRB.INFINITY)
+    else:
+        model.setAttr('VType', variables, vtypes)
+    model.setParam('OutputFlag', output_flag)
+    return bounds
+
+
+def load_results(path):
+    """
+    Results recorded by earlier runs.
+
+    Parameters:
+    - path: JSON lines file written by run_schemes
+
+    Returns:
+    - dict mapping the job id (job without its scheme, as a tuple) to its metrics
+    """
+    results = dict()
+    if path is None or not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                results[tuple(entry['job'])] = entry['metrics']
+    return results
+
+
+def ranked_table(results):
+    """
+    Text table of the results, best temp_degree first.
+
+    Parameters:
+    - results: dict mapping job ids to metrics (see load_results)
+
+    Returns:
+    - table string
+    """
+    def score(item):
+        value = item[1].get(SUMMARY_KEYS[0])
+        return -value if value is not None else float('inf')
+
+    lines = ["{:<16}".format('job') + "".join(f"{k:>18}" for k in SUMMARY_KEYS) + "  output"]
+    for job, metrics in sorted(results.items(), key=score):
+        cells = []
+        for k in SUMMARY_KEYS:
+            value = metrics.get(k)
+            cells.append(f"{value:>18.4f}" if isinstance(value, (int, float)) else f"{'-':>18}")
+        lines.append(f"{str(job):<16}" + "".join(cells) + f"  {metrics.get('output', '')}")
+    return "\n".join(lines)
+
+
+def run_schemes(config, build, solve, jobs, results_path, name="MILP", threads=THREADS_PER_JOB,
+                workers=None, done=None, prepare=None, screen=SCREEN_SCHEMES, skip=None):
+    """
+    Solve the blue schemes of a stage2_3 sweep on a local process pool.
+    Every worker loads the model once (from the model cache) and gets a Threads budget;
+    jobs already recorded in results_path are skipped, so an interrupted sweep resumes
+    where it stopped. With SHARED_CUTOFF the workers share their best objective, see optimize.
+    With screen the jobs are bounded first (scheme_bounds) and run best bound first as a
+    branch and bound over the schemes: a job whose bound cannot beat the best objective
+    found so far is recorded as pruned without being solved.
+
+    Parameters:
+    - config: builder configuration, see model_cache.fingerprint
+    - build: module-level function(model) building the rounds, handles must contain 'colours'
+    - solve: module-level function(job, model, handles) optimizing the model with the scheme
+      applied (through optimize), writing its output file and returning a dict of metrics
+      (see SUMMARY_KEYS, 'output')
+    - jobs: iterable of tuples (key, scheme_index, ..., blue_scheme); read lazily, so it may
+      depend on earlier results through done (read at once when screening, use skip then)
+    - results_path: JSON lines file collecting the metrics of every finished job; the ranked
+      table is written next to it (<results_path without extension>_ranked.txt)
+    - name: Gurobi model name
+    - threads: Gurobi threads per job
+    - workers: number of processes, cpu_count() // threads by default
+    - done: optional function(job_id, metrics) called in the main process for every finished
+      job (job_id is the job without its scheme), also for the results of earlier runs
+    - prepare: optional module-level function(job, model, handles) setting the bounds of a job
+      other than the colours, applied before solving and screening
+    - screen: bound and order the jobs before solving them
+    - skip: optional function(job) -> bool checked in the main process right before a job is
+      submitted (and before screening), e.g. to drop the schemes of a key that done marked as
+      solved; unlike a filter inside jobs it still applies after screening read jobs at once
+
+    Returns:
+    - dict mapping job ids to metrics, including the results of earlier runs
+    """
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads)
+    results = load_results(results_path)
+    if done is not None:
+        for job_id, metrics in results.items():
+            done(job_id, metrics)
+
+    def record(job_id, metrics):
+        results[job_id] = metrics
+        with open(results_path, 'a') as f:
+            f.write(json.dumps({'job': list(job_id), 'metrics': metrics}) + "\n")
+        print(f"Job {job_id} finished: {metrics}")
+        if done is not None:
+            done(job_id, metrics)
+
+    # Best objective (as a maximization score) of the finished jobs
+    scores = [m['score'] for m in results.values() if m.get('score') is not None]
+    best = max(scores, default=-GRB.INFINITY)
+
+    # Fill the model cache once here, so that the workers only load the model
+    sweep = scheme_sweep.SCHEME_SWEEP
+    if screen:
+        model, handles = cached_model(config, build, name)
+        jobs = [job for job in jobs if tuple(job[:-1]) not in results and not (skip is not None and skip(job))]
+        bounds = scheme_bounds(model, handles, jobs, prepare)
+        del model, handles
+        order = sorted(range(len(jobs)), key=lambda k: -bounds[k])
+        bound_of = {tuple(jobs[k][:-1]): bounds[k] for k in order}
+        jobs = [jobs[k] for k in order]
+    elif sweep and model_cache.USE_MODEL_CACHE:
+        cached_model(config, build, name)
+
+    # Spawned workers re-import the modules, so the flags of this process are passed on
+    context = multiprocessing.get_context('spawn')
+    incumbent = None
+    if SHARED_CUTOFF:
+        manager = context.Manager()
+        incumbent = (manager.Value('d', best), manager.Lock())
+    initargs = (config, build, name, threads, sweep, incumbent)
+    with ProcessPoolExecutor(workers, context, _init_worker, initargs) as pool:
+        pending = dict()
+        jobs = iter(jobs)
+        exhausted = False
+        while True:
+            # Keep every worker busy, pulling new jobs only when a slot is free
+            while not exhausted and len(pending) < workers:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                    break
+                job_id = tuple(job[:-1])
+                if job_id in results or (skip is not None and skip(job)):
+                    continue
+                if screen:
+                    if incumbent is not None:
+                        best = max(best, incumbent[0].value)
+                    if bound_of[job_id] <= best + 1e-6:
+                        record(job_id, {'status': 'pruned', 'bound': bound_of[job_id]})
+                        continue
+                pending[pool.submit(_run_job, solve, prepare, job)] = job
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                job = pending.pop(future)
+                job_id = tuple(job[:-1])
+                try:
+                    metrics = future.result()
+                except Exception as e:
+                    # Not recorded, so the job is retried on the next run
+                    print(f"Job {job_id} failed: {e}")
+                    continue
+                if screen:
+                    metrics.setdefault('bound', bound_of[job_id])
+                if metrics.get('score') is not None:
+                    best = max(best, metrics['score'])
+                record(job_id, metrics)
+    if incumbent is not None:
+        manager.shutdown()
+
+    table = ranked_table(results)
+    print(table)
+    with open(os.path.splitext(results_path)[0] + '_ranked.txt', 'w') as f:
+        f.write(table + "\n")
+    return results
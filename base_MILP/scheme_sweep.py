@@ -0,0 +1,74 @@
+import gurobipy as gp
+from gurobipy import GRB
+
+from base_MILP.model_cache import cached_model
+
+# Build the round network once and apply every blue scheme through variable bounds;
+# when disabled every scheme gets a fresh build (same model, only slower)
+SCHEME_SWEEP = True
+
+
+def add_colour(model, bits, name):
+    """
+    Give initial bits a shared pair of binaries r/b for their colour, fixed per scheme by apply_scheme.
+
+    Parameters:
+    - model: Gurobi model object
+    - bits: Bits taking the colour of one scheme position
+    - name: variable name prefix
+
+    Returns:
+    - (r, b) pair of variables
+    """
+    r = model.addVar(vtype=GRB.BINARY, name=f"{name}_r")
+    b = model.addVar(vtype=GRB.BINARY, name=f"{name}_b")
+    for bit in bits:
+        bit.r = r
+        bit.b = b
+    return r, b
+
+
+def apply_scheme(colours, scheme):
+    """
+    Fix the colour variables to a blue scheme: blue positions get r=0, b=1,
+    red positions get b=0 and leave r to the solver.
+
+    Parameters:
+    - colours: dict mapping the scheme position (z, y, x) to its (r, b) variables
+    - scheme: blue scheme, position (z, y, x) is blue if scheme[z][y][x] >= 0.5
+    """
+    for (z, y, x), (r, b) in colours.items():
+        if scheme[z][y][x] >= 0.5:
+            r.LB, r.UB = 0, 0
+            b.LB, b.UB = 1, 1
+        else:
+            r.LB, r.UB = 0, 1
+            b.LB, b.UB = 0, 0
+
+
+def sweep(config, build, jobs, name="MILP", env=None):
+    """
+    Solve-ready models for a list of blue schemes.
+    With SCHEME_SWEEP the model is built (or loaded from the model cache) once and each
+    scheme only changes the bounds of the colour variables, so Gurobi keeps the model
+    and can start from the previous incumbent instead of paying the full build again.
+
+    Parameters:
+    - config: builder configuration, see model_cache.fingerprint
+    - build: function(model) building the rounds; its handles must contain 'colours' (see apply_scheme)
+    - jobs: iterable of tuples whose last entry is the blue scheme; read lazily
+    - name: Gurobi model name
+    - env: optional Gurobi environment
+
+    Returns:
+    - generator of (job, model, handles) with the scheme of job applied
+    """
+    model = handles = None
+    if SCHEME_SWEEP:
+        model, handles = cached_model(config, build, name, env=env)
+    for job in jobs:
+        if not SCHEME_SWEEP:
+            model = gp.Model(name, env)
+            handles = build(model)
+        apply_scheme(handles['colours'], job[-1])
+        yield job, model, handles
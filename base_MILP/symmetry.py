@@ -0,0 +1,132 @@
+import gurobipy as gp
+
+
+def rotate_places(places, shift, lanes):
+    """
+    Rotate positions along z.
+
+    Parameters:
+    - places: positions (z, ...) with z first
+    - shift: rotation amount
+    - lanes: lane size (64 for Keccak, 32 for Xoodyak)
+
+    Returns:
+    - list of rotated positions, in the same order
+    """
+    return [((place[0] + shift) % lanes,) + tuple(place[1:]) for place in places]
+
+
+def structure_shifts(fixed, lanes):
+    """
+    z-rotations that map the fixed positions onto themselves.
+    Only these are symmetries of the initial state: any other shift moves a fixed (padding)
+    position onto a free one, so the rotated scheme sees a different state around it.
+
+    Parameters:
+    - fixed: positions (z, ...) that are not free in the initial state
+    - lanes: lane size
+
+    Returns:
+    - list of shifts, starting with 0
+    """
+    fixed = set(fixed)
+    return [shift for shift in range(lanes) if set(rotate_places(fixed, shift, lanes)) == fixed]
+
+
+def z_rotations(places, lanes, fixed=()):
+    """
+    Distinct z-rotations of a set of positions under the shifts that preserve the fixed positions.
+    The round functions are equivariant under z-rotation, so these rotations are schemes with the
+    same result. With padding that has no rotational symmetry this is only places itself.
+
+    Parameters:
+    - places: positions (z, ...) with z first
+    - lanes: lane size
+    - fixed: positions that are not free in the initial state
+
+    Returns:
+    - list of rotated position lists, starting with places itself
+    """
+    seen = set()
+    rotations = []
+    for shift in structure_shifts(fixed, lanes):
+        rotated = rotate_places(places, shift, lanes)
+        key = frozenset(rotated)
+        if key in seen:
+            continue
+        seen.add(key)
+        rotations.append(rotated)
+    return rotations
+
+
+def blue_places(scheme):
+    """
+    Blue positions of a scheme.
+
+    Parameters:
+    - scheme: nested lists [z][y][x], blue where the value is >= 0.5
+
+    Returns:
+    - list of (z, y, x)
+    """
+    return [(z, y, x) for z in range(len(scheme)) for y in range(len(scheme[z]))
+            for x in range(len(scheme[z][y])) if scheme[z][y][x] >= 0.5]
+
+
+def canonical_places(places, lanes, fixed=()):
+    """
+    Canonical representative of a set of positions under z-rotation: the smallest sorted
+    rotation among those that preserve the fixed positions.
+
+    Parameters:
+    - places: positions (z, ...) with z first
+    - lanes: lane size
+    - fixed: positions that are not free in the initial state
+
+    Returns:
+    - sorted tuple of positions
+    """
+    return min(tuple(sorted(rotated)) for rotated in z_rotations(places, lanes, fixed))
+
+
+def unique_schemes(schemes, lanes, fixed=()):
+    """
+    Drop the schemes that are z-rotations of an earlier one, counting only the rotations
+    that map the fixed positions onto themselves (see structure_shifts).
+
+    Parameters:
+    - schemes: list of blue schemes [z][y][x] (one entry of all_solutions)
+    - lanes: lane size
+    - fixed: scheme positions (z, y, x) that are not free in the initial state
+
+    Returns:
+    - list of (scheme_index, scheme) with the index in schemes, like enumerate
+    """
+    seen = set()
+    unique = []
+    for index, scheme in enumerate(schemes):
+        key = canonical_places(blue_places(scheme), lanes, fixed)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append((index, scheme))
+    return unique
+
+
+def add_rotation_breaking(model, blue, lanes, z=0):
+    """
+    Symmetry breaking for a stage1 model: a blue bit in slice z, so that the solver only
+    explores the rotations of a scheme that start at z. Schemes whose every such rotation
+    hits a fixed position are cut off as well, so this is only exact without padding.
+
+    Parameters:
+    - model: Gurobi model object
+    - blue: dict mapping the free positions (z, ...) to their blue variables
+    - lanes: lane size
+    - z: slice that must hold a blue bit
+
+    Returns:
+    - the added constraint
+    """
+    return model.addConstr(gp.quicksum(var for place, var in blue.items() if place[0] % lanes == z) >= 1,
+                           name=f"rotation_breaking_z{z}")
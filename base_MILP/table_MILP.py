@@ -0,0 +1,351 @@
+import json
+import os
+
+import gurobipy as gp
+from gurobipy import GRB
+
+from base_MILP import operation_MILP
+from base_MILP.operation_MILP import Bit
+
+# Directory of the cached tables (one JSON file per table)
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+
+# Seed and number of randomized passes of the clause derivation
+TABLE_SEED = 1
+TABLE_PASSES = 6
+
+# Largest number of variable columns of a table (the derivation enumerates all 2^n points)
+TABLE_MAX_COLUMNS = 24
+
+_tables = {}
+
+
+def enumerate_relation(build):
+    """
+    All feasible flag combinations of a small gadget network.
+    The network is built once with free input flags and every solution is enumerated
+    (PoolSearchMode 2); solutions are projected onto the columns.
+
+    Parameters:
+    - build: function(model) building the network and returning a list of (column name, flag)
+      pairs: the input and output flags and the gadget results to keep
+
+    Returns:
+    - columns: names of the columns that are variables
+    - constants: dict of the columns that are integer constants
+    - points: set of feasible value tuples of the variable columns
+    """
+    folding = operation_MILP.FOLD_CONSTANTS
+    operation_MILP.FOLD_CONSTANTS = False
+    try:
+        m = gp.Model()
+        m.Params.OutputFlag = 0
+        m.Params.Threads = 1
+        pairs = build(m)
+    finally:
+        operation_MILP.FOLD_CONSTANTS = folding
+    columns = [name for name, flag in pairs if type(flag) != int]
+    constants = {name: flag for name, flag in pairs if type(flag) == int}
+    flags = [flag for name, flag in pairs if type(flag) != int]
+
+    m.Params.PoolSearchMode = 2
+    m.Params.PoolSolutions = GRB.MAXINT
+    m.optimize()
+    points = set()
+    for k in range(m.SolCount):
+        m.Params.SolutionNumber = k
+        points.add(tuple(int(round(flag.Xn)) for flag in flags))
+    m.dispose()
+    return columns, constants, points
+
+
+def _invalid_bits(np, columns, codes):
+    """Codes whose input or output bits set cond together with ul, r or b (excluded by the Bit constraints)."""
+    invalid = np.zeros(len(codes), dtype=bool)
+    prefixes = {name.rsplit('.', 1)[0] for name in columns if name.endswith('.cond')}
+    for prefix in prefixes:
+        cond = (codes >> columns.index(f"{prefix}.cond")) & 1
+        for flag in ('ul', 'r', 'b'):
+            if f"{prefix}.{flag}" in columns:
+                invalid |= (cond & (codes >> columns.index(f"{prefix}.{flag}")) & 1) == 1
+    return invalid
+
+
+def derive_clauses(columns, points, seed=TABLE_SEED, passes=TABLE_PASSES):
+    """
+    Inequalities describing a 0/1 relation exactly.
+    Every infeasible point is cut off by a clause: a cube of fixed column values that
+    contains no feasible point, grown greedily literal by literal (randomized order).
+    The clauses of all passes are reduced by a greedy set cover over the infeasible points.
+    Points whose bits set cond together with ul, r or b are left out, the Bit constraints exclude them.
+
+    Parameters:
+    - columns: column names, see enumerate_relation
+    - points: set of feasible value tuples
+    - seed: seed of the literal orders
+    - passes: number of randomized passes generating candidate clauses
+
+    Returns:
+    - list of clauses, each a list of (column index, value) pairs; the clause excludes the
+      points with all these columns at their values
+    """
+    import numpy as np
+
+    n = len(columns)
+    if n > TABLE_MAX_COLUMNS:
+        raise ValueError(f"Table with {n} columns exceeds TABLE_MAX_COLUMNS = {TABLE_MAX_COLUMNS}")
+    codes = np.arange(1 << n, dtype=np.int64)
+    feasible = np.array(sorted(sum(v << i for i, v in enumerate(p)) for p in points), dtype=np.int64)
+    excluded = np.ones(1 << n, dtype=bool)
+    excluded[feasible] = False
+    excluded &= ~_invalid_bits(np, columns, codes)
+    infeasible = codes[excluded]
+    full = (1 << n) - 1
+    rng = np.random.default_rng(seed)
+
+    # Candidate cubes: one per uncovered infeasible point and pass
+    candidates = set()
+    for _ in range(passes):
+        covered = np.zeros(len(infeasible), dtype=bool)
+        while not covered.all():
+            point = int(infeasible[np.argmax(~covered)])
+            mask = full
+            for i in rng.permutation(n):
+                smaller = mask & ~(1 << int(i))
+                if not (((feasible ^ point) & smaller) == 0).any():
+                    mask = smaller
+            candidates.add((mask, point & mask))
+            covered |= ((infeasible ^ point) & mask) == 0
+
+    # Greedy set cover, then drop the cubes covered by the others
+    candidates = sorted(candidates)
+    covers = [((infeasible ^ value) & mask) == 0 for mask, value in candidates]
+    covered = np.zeros(len(infeasible), dtype=bool)
+    chosen = []
+    while not covered.all():
+        k = max(range(len(candidates)), key=lambda k: int((covers[k] & ~covered).sum()))
+        chosen.append(k)
+        covered |= covers[k]
+    for k in list(chosen):
+        rest = [j for j in chosen if j != k]
+        if np.logical_or.reduce([covers[j] for j in rest]).all():
+            chosen = rest
+
+    return [[(i, (value >> i) & 1) for i in range(n) if mask >> i & 1]
+            for mask, value in (candidates[k] for k in chosen)]
+
+
+def load_table(name, build):
+    """
+    Table of a gadget network, read from TABLE_DIR or derived and written there on first use.
+
+    Parameters:
+    - name: table name, also the file name
+    - build: network builder, see enumerate_relation
+
+    Returns:
+    - dict with columns, constants, points (number of feasible points) and clauses
+    """
+    if name in _tables:
+        return _tables[name]
+    path = os.path.join(TABLE_DIR, f"{name}.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            table = json.load(f)
+    else:
+        columns, constants, points = enumerate_relation(build)
+        table = {
+            'columns': columns,
+            'constants': constants,
+            'points': len(points),
+            'clauses': derive_clauses(columns, points),
+        }
+        os.makedirs(TABLE_DIR, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(table, f)
+    _tables[name] = table
+    return table
+
+
+def add_table(model, table, values, name=""):
+    """
+    Constrain flags to a table.
+    Constant flags are substituted: a clause they already satisfy is dropped.
+
+    Parameters:
+    - model: Gurobi model object
+    - table: table from load_table
+    - values: dict mapping every column name to its flag (variable or integer constant)
+    - name: constraint name prefix
+
+    Returns:
+    - number of constraints added
+    """
+    count = 0
+    flags = [values[column] for column in table['columns']]
+    for k, clause in enumerate(table['clauses']):
+        terms = []
+        for i, value in clause:
+            flag = flags[i]
+            literal = 1 - flag if value else flag
+            if type(flag) == int:
+                if literal == 1:
+                    break
+                continue
+            terms.append(literal)
+        else:
+            if not terms:
+                raise ValueError(f"Constant flags of {name} are outside the table")
+            model.addConstr(gp.quicksum(terms) >= 1, name=f"{name}_table{k}")
+            count += 1
+    return count
+
+
+def excludes(table, values):
+    """
+    True if the constant flags among values alone violate a clause of the table,
+    i.e. the gadget network has no solution for them.
+
+    Parameters:
+    - table: table from load_table
+    - values: dict mapping column names to flags (variables or integer constants); missing columns are free
+    """
+    columns = table['columns']
+    for clause in table['clauses']:
+        if all(type(values.get(columns[i])) == int and values[columns[i]] == value for i, value in clause):
+            return True
+    return False
+
+
+def table_bit(model, name, pattern, table, prefix):
+    """
+    Output bit of a table: a variable for every flag that is a column, the table constant otherwise.
+
+    Parameters:
+    - model: Gurobi model object
+    - name: variable name prefix
+    - pattern: flag pattern of the output bit, as in Bit ('*' for a free flag)
+    - table: table from load_table
+    - prefix: column prefix of the bit in the table, e.g. 'o'
+
+    Returns:
+    - Bit
+    """
+    flags = []
+    for flag, value in zip(('ul', 'r', 'b', 'cond'), pattern):
+        column = f"{prefix}.{flag}"
+        if value != '*':
+            flags.append(value)
+        elif column in table['constants']:
+            flags.append(table['constants'][column])
+        else:
+            flags.append(model.addVar(vtype=GRB.BINARY, name=f"{name}_{flag}"))
+    return Bit.from_flags(model, *flags)
+
+
+def table_results(model, name, table, prefix):
+    """
+    Gadget result dict of a table: a variable for every result column, the table constant otherwise.
+
+    Parameters:
+    - model: Gurobi model object
+    - name: variable name prefix
+    - table: table from load_table
+    - prefix: column prefix of the gadget, e.g. 'and'
+
+    Returns:
+    - dict from result key to flag
+    """
+    results = {}
+    for column, value in table['constants'].items():
+        if column.startswith(prefix + '.'):
+            results[column[len(prefix) + 1:]] = value
+    for column in table['columns']:
+        if column.startswith(prefix + '.'):
+            key = column[len(prefix) + 1:]
+            results[key] = model.addVar(vtype=GRB.BINARY, name=f"{name}_{key}")
+    return results
+
+
+def bit_columns(prefix, bit):
+    """(column name, flag) pairs of the four flags of a bit."""
+    return [(f"{prefix}.{flag}", getattr(bit, flag)) for flag in ('ul', 'r', 'b', 'cond')]
+
+
+def result_columns(prefix, results):
+    """(column name, flag) pairs of a gadget result dict."""
+    return [(f"{prefix}.{key}", value) for key, value in sorted(results.items())]
+
+
+def chi_network(and_gadget, xor_gadget):
+    """
+    Builder of one chi-like output bit a ⊕ (b AND c) for load_table: an AND gadget and an
+    XOR gadget, with the intermediate AND bit projected out.
+    Columns: the flags of a, b, c and of the output o, the AND results 'and.*' and the XOR results 'xor.*'.
+    """
+    def build(model):
+        a, b, c = [Bit(model, f"chi_{name}") for name in 'abc']
+        and_bit = Bit(model, "chi_and", ('*', '*', '*', 0))
+        and_vars = and_gadget(model, b, c, and_bit, "chi_and")
+        output = Bit(model, "chi_o", ('*', '*', '*', 0))
+        xor_vars = xor_gadget(model, [a, and_bit], output, "chi_xor")
+        return (bit_columns('a', a) + bit_columns('b', b) + bit_columns('c', c) + bit_columns('o', output) +
+                result_columns('and', and_vars) + result_columns('xor', xor_vars))
+    return build
+
+
+def chi_table(and_gadget, xor_gadget):
+    """Table of chi_network for a pair of gadgets."""
+    return load_table(f"chi_{and_gadget.__name__}_{xor_gadget.__name__}", chi_network(and_gadget, xor_gadget))
+
+
+def add_chi_bit(model, table, inputs, name, and_name):
+    """
+    One chi-like output bit a ⊕ (b AND c) constrained by a chi_table.
+
+    Parameters:
+    - model: Gurobi model object
+    - table: table from chi_table
+    - inputs: bits (a, b, c)
+    - name: name prefix of the output bit and the XOR results
+    - and_name: name prefix of the AND results
+
+    Returns:
+    - output: new Bit with cond 0
+    - and_vars: AND result dict (CT, const_cond)
+    - xor_vars: XOR result dict (delta_r, delta_b, has_ul, new_cond)
+    """
+    output = table_bit(model, name, ('*', '*', '*', 0), table, 'o')
+    and_vars = table_results(model, and_name, table, 'and')
+    xor_vars = table_results(model, name, table, 'xor')
+    values = dict(bit_columns('o', output) + result_columns('and', and_vars) + result_columns('xor', xor_vars))
+    for prefix, bit in zip('abc', inputs):
+        values.update(bit_columns(prefix, bit))
+    add_table(model, table, values, name)
+    return output, and_vars, xor_vars
+
+
+def is_constant(bits):
+    """True if every flag of the bits is an integer constant (the gadgets fold such bits)."""
+    return all(type(f) == int for bit in bits for f in (bit.ul, bit.r, bit.b, bit.cond))
+
+
+def relaxation_report(model):
+    """
+    Size and LP bound of a built model, to compare encodings.
+
+    Parameters:
+    - model: Gurobi model object with its objective set
+
+    Returns:
+    - dict with vars, binaries, constrs, lp_bound and lp_runtime
+    """
+    model.update()
+    report = {'vars': model.NumVars, 'binaries': model.NumBinVars, 'constrs': model.NumConstrs}
+    relaxed = model.relax()
+    relaxed.Params.OutputFlag = 0
+    relaxed.optimize()
+    report['lp_bound'] = relaxed.ObjVal if relaxed.Status == GRB.OPTIMAL else None
+    report['lp_runtime'] = relaxed.Runtime
+    relaxed.dispose()
+    return report
@@ -0,0 +1,54 @@
+import gurobipy as gp
+
+FLAGS = ('ul', 'r', 'b', 'cond')
+
+
+def _flag_value(flag):
+    """Solution value of a flag, constants stay as they are."""
+    if isinstance(flag, (int, float)):
+        return int(flag)
+    if isinstance(flag, gp.LinExpr):
+        return int(round(flag.getValue()))
+    return int(round(flag.X))
+
+
+def state_values(state):
+    """
+    Flag values of a solved state.
+
+    Parameters:
+    - state: nested lists [z][...] of Bits (or BitState) of a model with a solution
+
+    Returns:
+    - nested lists of the same shape holding (ul, r, b, cond) tuples of ints
+    """
+    if hasattr(state, 'ul') and hasattr(state, 'cond'):
+        return tuple(_flag_value(getattr(state, flag)) for flag in FLAGS)
+    return [state_values(state[i]) for i in range(len(state))]
+
+
+def set_start(state, values, hint=False):
+    """
+    Set the flags of a state as MIP start (or as variable hints).
+    Only variable flags are set; constant flags of the target model are skipped.
+
+    Parameters:
+    - state: nested lists [z][...] of Bits (or BitState)
+    - values: nested lists of (ul, r, b, cond) tuples of the same shape
+    - hint: set VarHintVal instead of Start
+
+    Returns:
+    - number of variables set
+    """
+    if hasattr(state, 'ul') and hasattr(state, 'cond'):
+        count = 0
+        for flag, value in zip(FLAGS, values):
+            var = getattr(state, flag)
+            if isinstance(var, gp.Var):
+                if hint:
+                    var.VarHintVal = value
+                else:
+                    var.Start = value
+                count += 1
+        return count
+    return sum(set_start(state[i], values[i], hint) for i in range(len(state)))
@@ -0,0 +1,276 @@
+import gurobipy as gp
+from gurobipy import GRB
+
+from base_MILP import operation_MILP, table_MILP
+from base_MILP.operation_MILP import Bit, bounded_flag, xor_with_ul_input
+
+# Largest number of inputs of an XOR described by a table in the 'table' encoding (4 columns per input);
+# wider XORs, e.g. the 5-input Keccak column parities, keep the gadget constraints
+XOR_TABLE_MAX_INPUTS = 3
+
+
+def _flag(model, vtype, name):
+    """New flag variable in [0, 1]."""
+    return model.addVar(ub=1, vtype=vtype, name=name)
+
+
+def _or(model, xs, name, vtype=GRB.BINARY, aggregated=False):
+    """
+    OR of {0,1} variables or constants, like operation_MILP.or_flag.
+    The OR variable z is tied to the n variable inputs either by z >= x for every input and
+    z <= sum(x), which fix z on every 0/1 input so that z can be continuous, or by the two
+    counting rows z <= sum(x) and n z >= sum(x) (aggregated), which need z binary.
+    """
+    if any(type(x) == int and x == 1 for x in xs):
+        return 1
+    xs = [x for x in xs if type(x) != int]
+    if not xs:
+        return 0
+    z = _flag(model, vtype, name)
+    model.addConstr(z <= gp.quicksum(xs))
+    if aggregated:
+        model.addConstr(len(xs) * z >= gp.quicksum(xs))
+    else:
+        for x in xs:
+            model.addConstr(z >= x)
+    return z
+
+
+def _and_flag(model, lower, upper):
+    """
+    Continuous flag t with lower <= t <= u for every u in upper, like operation_MILP.bounded_flag.
+    Used for the type indicators u = ul AND NOT r AND NOT b and ub = ul AND b, whose bounds meet
+    on every 0/1 input; constants that force the value give the integer instead.
+    """
+    lo = max(0, lower) if type(lower) == int else 0
+    hi = min([1] + [u for u in upper if type(u) == int])
+    if lo == hi:
+        return lo
+    t = _flag(model, GRB.CONTINUOUS, "")
+    if type(lower) != int:
+        model.addConstr(t >= lower)
+    for u in upper:
+        if type(u) != int:
+            model.addConstr(t <= u)
+    return t
+
+
+def _linear(model, inputs, output, operation_name, delta_b_allowed, aggregated):
+    """
+    Linear encodings of the XOR gadgets ('continuous' and 'aggregated').
+    The rows of xor_with_ul_input_no_delta_b, with the helper flags has_r/has_b/has_ul and the
+    per-input type indicators continuous ('continuous'), or with the OR helpers as counting rows
+    and every group of per-input output rows summed into one counting row ('aggregated').
+    The type indicators are continuous and the delta flags binary in both.
+    """
+    n = len(inputs)
+    helper = GRB.BINARY if aggregated else GRB.CONTINUOUS
+    has_r = _or(model, [i.r for i in inputs], f"{operation_name}_has_r", helper, aggregated)
+    has_b = _or(model, [i.b for i in inputs], f"{operation_name}_has_b", helper, aggregated)
+    has_ul = _or(model, [i.ul for i in inputs], f"{operation_name}_has_ul", helper, aggregated)
+
+    delta_r = bounded_flag(model, [], [has_r], f"{operation_name}_delta_r")
+    if delta_b_allowed:
+        delta_b = bounded_flag(model, [], [1 - has_ul, has_b], f"{operation_name}_delta_b")
+    else:
+        delta_b = 0
+
+    # Pure nonlinear inputs (type u) and nonlinear blue inputs (type ub/ug)
+    input_u = [_and_flag(model, i.ul - i.r - i.b, [i.ul, 1 - i.r, 1 - i.b]) for i in inputs]
+    input_ub = [_and_flag(model, i.ul + i.b - 1, [i.ul, i.b]) for i in inputs]
+    sum_u = gp.quicksum(input_u)
+    sum_ub = gp.quicksum(input_ub)
+
+    # Output nonlinear flag: (some input ub) OR (has_ul AND NOT delta_r)
+    model.addConstr(output.ul >= has_ul - delta_r)
+    model.addConstr(output.ul <= has_ul)
+    model.addConstr(output.ul <= 1 - delta_r + sum_ub)
+    if aggregated:
+        model.addConstr(n * output.ul >= sum_ub)
+    else:
+        for ub in input_ub:
+            model.addConstr(output.ul >= ub)
+
+    # Output condition constant flag
+    model.addConstr(output.cond <= 1 - has_ul)
+
+    # Output red and blue flags: a pure nonlinear input leaves neither colour nor cancellation
+    for flag, has, delta in ((output.r, has_r, delta_r), (output.b, has_b, delta_b)):
+        model.addConstr(flag <= has)
+        model.addConstr(flag >= has - delta - sum_u)
+        if aggregated:
+            model.addConstr(n * (flag + delta) + sum_u <= n)
+        else:
+            for if_u in input_u:
+                model.addConstr(flag + if_u + delta <= 1)
+
+    return {
+        "delta_r": delta_r,
+        "delta_b": delta_b,
+        'has_ul': has_ul,
+        'new_cond': 0,
+    }
+
+
+def _general_or(model, xs, name):
+    """OR of {0,1} variables or constants as a Gurobi OR general constraint."""
+    if any(type(x) == int and x == 1 for x in xs):
+        return 1
+    xs = [x for x in xs if type(x) != int]
+    if not xs:
+        return 0
+    if len(xs) == 1:
+        return xs[0]
+    z = model.addVar(vtype=GRB.BINARY, name=name)
+    model.addGenConstrOr(z, xs)
+    return z
+
+
+def _implies(model, flag, value, lhs, sense, rhs):
+    """Constraint lhs sense rhs if flag == value: an indicator constraint, or a plain row (or nothing) for a constant flag."""
+    lhs = gp.LinExpr() + lhs
+    if lhs.size() == 0:
+        constant = lhs.getConstant()
+        if {GRB.LESS_EQUAL: constant <= rhs, GRB.GREATER_EQUAL: constant >= rhs, GRB.EQUAL: constant == rhs}[sense]:
+            return
+    if type(flag) != int:
+        model.addGenConstrIndicator(flag, value, lhs, sense, rhs)
+    elif flag == value:
+        model.addLConstr(lhs, sense, rhs)
+
+
+def _indicator_type(model, expression, threshold):
+    """Binary t = [expression >= threshold] for an integer expression of input flags, by two indicator constraints."""
+    if type(expression) == int:
+        return int(expression >= threshold)
+    t = model.addVar(vtype=GRB.BINARY)
+    model.addGenConstrIndicator(t, True, expression, GRB.GREATER_EQUAL, threshold)
+    model.addGenConstrIndicator(t, False, expression, GRB.LESS_EQUAL, threshold - 1)
+    return t
+
+
+def _indicator(model, inputs, output, operation_name, delta_b_allowed):
+    """
+    Indicator encoding of the XOR gadgets ('indicator').
+    The ORs are Gurobi OR general constraints, the per-input type flags follow from indicator
+    constraints, and the output flags are set by indicator constraints on delta_r and on
+    any_u (some input is of type u) instead of big-M rows.
+    """
+    has_r = _general_or(model, [i.r for i in inputs], f"{operation_name}_has_r")
+    has_b = _general_or(model, [i.b for i in inputs], f"{operation_name}_has_b")
+    has_ul = _general_or(model, [i.ul for i in inputs], f"{operation_name}_has_ul")
+
+    delta_r = bounded_flag(model, [], [has_r], f"{operation_name}_delta_r")
+    if delta_b_allowed:
+        delta_b = bounded_flag(model, [], [1 - has_ul, has_b], f"{operation_name}_delta_b")
+    else:
+        delta_b = 0
+
+    any_u = _general_or(model, [_indicator_type(model, i.ul - i.r - i.b, 1) for i in inputs],
+                        f"{operation_name}_any_u")
+    input_ub = _general_or(model, [_indicator_type(model, i.ul + i.b, 2) for i in inputs],
+                           f"{operation_name}_input_ub")
+
+    # Output nonlinear flag: has_ul without red cancellation, input_ub with it
+    _implies(model, delta_r, False, output.ul - has_ul, GRB.EQUAL, 0)
+    _implies(model, delta_r, True, output.ul - input_ub, GRB.EQUAL, 0)
+
+    # Output condition constant flag
+    _implies(model, has_ul, True, output.cond, GRB.LESS_EQUAL, 0)
+
+    # Output red and blue flags: the colour either survives or cancels, unless an input is of type u
+    for flag, has, delta in ((output.r, has_r, delta_r), (output.b, has_b, delta_b)):
+        _implies(model, any_u, True, flag + delta, GRB.LESS_EQUAL, 0)
+        _implies(model, any_u, False, flag + delta - has, GRB.EQUAL, 0)
+
+    return {
+        "delta_r": delta_r,
+        "delta_b": delta_b,
+        'has_ul': has_ul,
+        'new_cond': 0,
+    }
+
+
+def xor_network(gadget, n):
+    """
+    Builder of one n-input XOR gadget for table_MILP.load_table, always with the gadget constraints.
+    Columns: the flags of the inputs i0, i1, ..., of the output o and the gadget results 'xor.*'.
+    """
+    def build(model):
+        encoding = operation_MILP.XOR_ENCODING
+        operation_MILP.XOR_ENCODING = 'gadget'
+        try:
+            inputs = [Bit(model, f"xor_i{k}") for k in range(n)]
+            output = Bit(model, "xor_o")
+            xor_vars = gadget(model, inputs, output, "xor")
+        finally:
+            operation_MILP.XOR_ENCODING = encoding
+        columns = []
+        for k, bit in enumerate(inputs):
+            columns += table_MILP.bit_columns(f"i{k}", bit)
+        return columns + table_MILP.bit_columns('o', output) + table_MILP.result_columns('xor', xor_vars)
+    return build
+
+
+def xor_table(gadget, n):
+    """Table of an n-input XOR gadget."""
+    return table_MILP.load_table(f"xor_{gadget.__name__}_{n}", xor_network(gadget, n))
+
+
+def _table(gadget, model, inputs, output, operation_name):
+    """
+    Table encoding of the XOR gadgets ('table'): the exact projected relation of table_MILP, without helper flags.
+    Returns None if the constant flags already violate the table (the gadget constraints are infeasible then).
+    """
+    table = xor_table(gadget, len(inputs))
+    values = dict(table_MILP.bit_columns('o', output))
+    for k, bit in enumerate(inputs):
+        values.update(table_MILP.bit_columns(f"i{k}", bit))
+    if table_MILP.excludes(table, values):
+        return None
+    xor_vars = table_MILP.table_results(model, operation_name, table, 'xor')
+    values.update(table_MILP.result_columns('xor', xor_vars))
+    table_MILP.add_table(model, table, values, operation_name)
+    return xor_vars
+
+
+def encode_xor(gadget, model, inputs, output, operation_name, encoding):
+    """
+    Constraints of xor_with_ul_input or xor_with_ul_input_no_delta_b in another encoding.
+    All encodings describe the same relation between the input flags, the output flags and the
+    returned delta_r, delta_b and has_ul; they differ in helper variables and rows:
+    - 'continuous': the gadget rows, with every helper flag continuous (only delta_r/delta_b binary)
+    - 'aggregated': OR helpers by two counting rows, one counting row per output colour instead of one per input
+    - 'indicator': OR general constraints and indicator constraints instead of big-M rows
+    - 'table': table_MILP table of the whole gadget, for at most XOR_TABLE_MAX_INPUTS inputs
+      (the gadget constraints otherwise)
+
+    Parameters:
+    - gadget: xor_with_ul_input or xor_with_ul_input_no_delta_b
+    - model: Gurobi model object (or the layer proxy of operation_MILP for the linear encodings)
+    - inputs: list of input bits
+    - output: output bit
+    - operation_name: operation name for variable naming
+    - encoding: 'continuous', 'aggregated', 'indicator' or 'table'
+
+    Returns:
+    - dict of delta_r, delta_b, has_ul and new_cond, as returned by the gadget
+    """
+    delta_b_allowed = gadget is xor_with_ul_input
+    if encoding == 'continuous':
+        return _linear(model, inputs, output, operation_name, delta_b_allowed, False)
+    if encoding == 'aggregated':
+        return _linear(model, inputs, output, operation_name, delta_b_allowed, True)
+    if encoding == 'indicator':
+        return _indicator(model, inputs, output, operation_name, delta_b_allowed)
+    if encoding == 'table':
+        if len(inputs) <= XOR_TABLE_MAX_INPUTS:
+            xor_vars = _table(gadget, model, inputs, output, operation_name)
+            if xor_vars is not None:
+                return xor_vars
+        operation_MILP.XOR_ENCODING = 'gadget'
+        try:
+            return gadget(model, inputs, output, operation_name)
+        finally:
+            operation_MILP.XOR_ENCODING = encoding
+    raise ValueError(f"Unsupported XOR encoding: {encoding} (only 'gadget', 'continuous', 'aggregated', 'indicator', 'table')")